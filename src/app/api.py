@@ -1,23 +1,43 @@
 """Flask API路由"""
+import os
 import tempfile
 from flask import Flask
 from flasgger import Swagger
 
+from .json_provider import create_json_provider
+from .logger_config import logger
 from .swagger_config import get_swagger_config, get_swagger_template
-from .middleware import register_cleanup_middleware
+from .middleware import register_cleanup_middleware, register_request_log_level_middleware
+from .render_backends import select_render_backend
+from .result_cache import ResultCache
+from .row_cache import RowParseCache
+from .worker_pool import get_extraction_pool
 from .handlers import (
     register_health_route,
     register_pdf_to_json_route,
+    register_preflight_route,
     register_pdf_to_csv_route,
     register_csv_to_json_route
 )
 
+# 运行模式：full（全部接口）或 csv（只提供CSV转JSON，不加载pandas/camelot、不启动提取进程池）
+APP_PROFILES = ('full', 'csv')
+
 
 def create_app() -> Flask:
     """创建Flask应用"""
+    profile = os.getenv('APP_PROFILE', 'full').lower()
+    if profile not in APP_PROFILES:
+        logger.warning(f"未知的运行模式 '{profile}'，使用full")
+        profile = 'full'
+    
     app = Flask(__name__)
+    app.json = create_json_provider(app)
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB限制
     app.config['UPLOAD_FOLDER'] = tempfile.gettempdir()
+    app.config['RESULT_CACHE'] = ResultCache.from_env()
+    app.config['ROW_CACHE'] = RowParseCache.from_env()
+    app.config['APP_PROFILE'] = profile
     
     # 配置Swagger
     swagger_config = get_swagger_config()
@@ -26,11 +46,24 @@ def create_app() -> Flask:
     
     # 注册中间件
     register_cleanup_middleware(app)
+    register_request_log_level_middleware(app)
     
     # 注册路由
     register_health_route(app)
-    register_pdf_to_json_route(app)
-    register_pdf_to_csv_route(app)
+    if profile == 'full':
+        register_pdf_to_json_route(app)
+        register_preflight_route(app)
+        register_pdf_to_csv_route(app)
     register_csv_to_json_route(app)
     
+    if profile == 'csv':
+        logger.info("以CSV专用模式启动：只提供CSV转JSON接口")
+        return app
+    
+    # 选定lattice渲染后端（需在提取进程启动前完成，提取进程继承该选择）
+    select_render_backend()
+    
+    # 预先启动PDF提取进程池，避免首个请求承担进程启动和依赖导入开销
+    get_extraction_pool()
+    
     return app
@@ -0,0 +1,103 @@
+"""表格提取引擎对比基准模块
+
+用法:
+    python -m app.benchmark 课程表.pdf [--pages all] [--repeat 3]
+
+对每一页分别用camelot（先lattice后stream）和矢量划线引擎提取表格，
+输出两者的耗时以及提取结果是否完全一致。
+"""
+import argparse
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import pandas as pd
+import pypdfium2 as pdfium
+
+from .pdf_parser import PDFParser
+from .preflight import resolve_pages
+from .vector_parser import VectorTableParser
+
+
+def compare_engines(pdf_path: str, pages: str = 'all', repeat: int = 1) -> List[Dict[str, Any]]:
+    """
+    对比camelot与矢量引擎的提取速度和结果
+
+    两个引擎都在当前进程内直接执行（不经过提取进程池），耗时取多次运行的最小值。
+
+    Args:
+        pdf_path: PDF文件路径
+        pages: 页码（camelot页码格式）
+        repeat: 每个引擎每页的运行次数
+
+    Returns:
+        每页一条记录：page、camelot_seconds、vector_seconds、speedup、
+        camelot_shape、vector_shape、identical（DataFrame是否完全一致）
+    """
+    results = []
+    for page in _page_numbers(pdf_path, pages):
+        camelot_seconds, camelot_tables = _timed(
+            lambda: PDFParser._read_sequential(pdf_path, pages=str(page)), repeat
+        )
+        vector_seconds, vector_tables = _timed(
+            lambda: VectorTableParser.extract_tables(pdf_path, page), repeat
+        )
+        camelot_df = camelot_tables[0][0] if camelot_tables else None
+        vector_df = vector_tables[0][0] if vector_tables else None
+
+        results.append({
+            'page': page,
+            'camelot_seconds': round(camelot_seconds, 3),
+            'vector_seconds': round(vector_seconds, 3),
+            'speedup': round(camelot_seconds / vector_seconds, 1) if vector_seconds else None,
+            'camelot_shape': list(camelot_df.shape) if camelot_df is not None else None,
+            'vector_shape': list(vector_df.shape) if vector_df is not None else None,
+            'identical': _same_table(camelot_df, vector_df)
+        })
+    return results
+
+
+def _page_numbers(pdf_path: str, pages: str) -> List[int]:
+    """按pypdfium2读取的页数把页码参数解析为页码列表"""
+    document = pdfium.PdfDocument(pdf_path)
+    try:
+        return resolve_pages(pages, len(document))
+    finally:
+        document.close()
+
+
+def _timed(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    """多次执行fn，返回最短耗时和最后一次的结果"""
+    best = float('inf')
+    result = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _same_table(left: pd.DataFrame, right: pd.DataFrame) -> bool:
+    if left is None or right is None:
+        return False
+    return left.shape == right.shape and bool((left.values == right.values).all())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='对比camelot与矢量引擎的表格提取速度和结果')
+    parser.add_argument('pdf_path', help='PDF文件路径')
+    parser.add_argument('--pages', default='all', help='页码，如 1、1,3-5、2-end、all（默认all）')
+    parser.add_argument('--repeat', type=int, default=1, help='每页每个引擎的运行次数（取最短耗时）')
+    args = parser.parse_args()
+
+    results = compare_engines(args.pdf_path, args.pages, args.repeat)
+    print(f"{'页码':>4}  {'camelot(秒)':>11}  {'vector(秒)':>10}  {'加速比':>6}  结果一致")
+    for row in results:
+        speedup = f"{row['speedup']}x" if row['speedup'] is not None else '-'
+        print(f"{row['page']:>4}  {row['camelot_seconds']:>11.3f}  {row['vector_seconds']:>10.3f}  "
+              f"{speedup:>6}  {'是' if row['identical'] else '否'}")
+    return 0 if all(row['identical'] for row in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
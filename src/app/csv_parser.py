@@ -1,9 +1,43 @@
 """CSV转JSON模块"""
-import pandas as pd
+import atexit
+import csv
+import itertools
+import multiprocessing
+import os
+import numpy as np
 import re
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from functools import lru_cache
+from typing import IO, TYPE_CHECKING, Iterator, List, Dict, Any, NamedTuple, Optional, Sequence, Tuple, Union
 from pathlib import Path
 from .logger_config import logger
+from .row_cache import LineageState, RowParseCache, diff_classes
+from .timetable_grid import PeriodEntry, TimetableGrid
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_parse_pool_initialized = False
+_parse_pool_lock = threading.Lock()
+
+
+class LayoutPlan(NamedTuple):
+    """由表头编译出的取值计划：每个星期的第1-9节分别取哪一列"""
+    # 按星期、节次顺序排列的数据列索引
+    columns: np.ndarray
+    # 每个星期的 (星期名, 在columns中的起始位置, 节数)，按WEEKDAYS顺序，未找到的星期节数为0
+    days: Tuple[Tuple[str, int, int], ...]
+
+
+class CellToken(NamedTuple):
+    """单元格的解析结果（与节次无关，按单元格原文缓存复用）"""
+    course: str
+    teacher: Optional[str]
+    is_class_teacher: bool
+    # 课程名为完全重复模式时拆分出的两部分（如"选修课选修课"），否则为None
+    split: Optional[Tuple[str, str]]
 
 
 class CSVParser:
@@ -19,17 +53,35 @@ class CSVParser:
     }
     # 每个星期对应的课程数（固定为9节）
     PERIODS_PER_DAY = 9
+    # 班级命名格式：年级 + 可选分隔符（.或·） + 数字 + 班，如 初一.1班、高二3班
+    CLASS_NAME_PATTERN = re.compile(r'^[初高][一二三四五六七八九十\d]+[\.·]?\d+班')
+    # 单元格解析缓存的条目上限（同一课程/教师组合在全区课表中重复出现成千上万次）
+    CELL_CACHE_SIZE = int(os.getenv('CSV_CELL_CACHE_SIZE', '8192'))
+    # 班级行数达到该值时分块在CSV解析进程池中并行解析（0为不并行）
+    PARALLEL_MIN_ROWS = int(os.getenv('CSV_PARALLEL_MIN_ROWS', '2000'))
+    # 并行解析时每块的班级行数
+    PARALLEL_CHUNK_ROWS = int(os.getenv('CSV_PARALLEL_CHUNK_ROWS', '500'))
+    # CSV解析进程数（0为不并行）
+    PARALLEL_WORKERS = int(os.getenv('CSV_PARALLEL_WORKERS', str(min(4, os.cpu_count() or 1))))
     
     @staticmethod
-    def parse_to_json(csv_path: str) -> Optional[Dict[str, Any]]:
+    def new_grid(capacity: int = 64) -> TimetableGrid:
+        """创建按WEEKDAYS、每天PERIODS_PER_DAY节排列的空课表"""
+        return TimetableGrid(CSVParser.WEEKDAYS, CSVParser.PERIODS_PER_DAY, capacity)
+    
+    @staticmethod
+    def parse_to_json(csv_path: str) -> Optional[TimetableGrid]:
         """
         解析CSV文件并转换为JSON格式
         
+        用标准库csv逐行读取，不依赖pandas（CSV转JSON接口可以在不加载pandas/camelot的进程中运行）。
+        班级行很多时分块并行解析（见_parse_class_rows）。
+        
         Args:
             csv_path: CSV文件路径
             
         Returns:
-            解析后的课表数据字典，失败返回None
+            解析后的课表，失败返回None
         """
         logger.info(f"开始解析CSV文件: {csv_path}")
         
@@ -38,57 +90,295 @@ class CSVParser:
             return None
         
         try:
-            # 读取CSV
-            logger.info("读取CSV文件...")
-            df = pd.read_csv(csv_path, header=None, keep_default_na=False)
-            logger.info(f"CSV文件维度: {df.shape[0]} 行 x {df.shape[1]} 列")
+            with open(csv_path, newline='', encoding='utf-8-sig') as f:
+                return CSVParser._parse_class_rows(CSVParser._read_class_rows(f))
+        except Exception as e:
+            from .worker_pool import ExtractionLimitExceeded
+            if isinstance(e, ExtractionLimitExceeded):
+                # 超出请求的时间预算，交给接口返回422
+                raise
+            logger.error(f"CSV解析失败: {e}", exc_info=True)
+            return None
+    
+    @staticmethod
+    def parse_incremental(
+        csv_path: str,
+        school_id: str,
+        row_cache: RowParseCache
+    ) -> Optional[Tuple[TimetableGrid, Dict[str, Any]]]:
+        """
+        增量解析CSV文件：同一文档谱系中内容未变化的班级行直接复用上一次上传的解析结果
+        
+        谱系为学校ID + 表头签名；只解析内容哈希发生变化的行（始终在当前进程内逐行解析）。
+        
+        Args:
+            csv_path: CSV文件路径
+            school_id: 学校ID
+            row_cache: 行解析缓存
+            
+        Returns:
+            (课表, 变化报告)，失败返回None。变化报告包含lineage、previous_version（谱系中是否有上一次上传）、
+            changed_classes（发生变化或新增的班级）、removed_classes（本次不再出现的班级）、
+            reparsed_rows、reused_rows
+        """
+        logger.info(f"开始增量解析CSV文件: {csv_path}（学校ID: {school_id}）")
+        
+        if not Path(csv_path).exists():
+            logger.error(f"CSV文件不存在: {csv_path}")
+            return None
+        
+        try:
+            grid = CSVParser.new_grid()
+            key = None
+            previous = None
+            rows: Dict[bytes, Tuple[PeriodEntry, ...]] = {}
+            classes: Dict[str, bytes] = {}
+            total = 0
+            reparsed = 0
+            with open(csv_path, newline='', encoding='utf-8-sig') as f:
+                for class_name, cells, plan in CSVParser._read_class_rows(f):
+                    if key is None:
+                        key = RowParseCache.lineage_key(school_id, plan.columns.tolist(), plan.days)
+                        previous = row_cache.get(key)
+                    
+                    total += 1
+                    row_hash = RowParseCache.row_hash(cells)
+                    periods = rows.get(row_hash)
+                    if periods is None and previous is not None:
+                        periods = previous.rows.get(row_hash)
+                    if periods is None:
+                        periods = tuple(CSVParser._iter_class_periods(cells, plan))
+                        reparsed += 1
+                    rows[row_hash] = periods
+                    # 班级名重复时保留最后一次出现的数据
+                    classes[class_name] = row_hash
+                    grid.set_class(class_name, periods)
+        except Exception as e:
+            logger.error(f"CSV解析失败: {e}", exc_info=True)
+            return None
+        
+        if key is not None:
+            row_cache.set(key, LineageState(rows, classes))
+        changed, removed = diff_classes(previous, classes)
+        changes = {
+            'lineage': key,
+            'previous_version': previous is not None,
+            'changed_classes': changed,
+            'removed_classes': removed,
+            'reparsed_rows': reparsed,
+            'reused_rows': total - reparsed
+        }
+        logger.info(f"增量解析完成: 重新解析 {reparsed} 行，复用 {changes['reused_rows']} 行，"
+                    f"变化班级 {len(changed)} 个，移除班级 {len(removed)} 个")
+        return grid, changes
+    
+    @staticmethod
+    def iter_classes(
+        source: Union[str, Path, IO[str]]
+    ) -> Iterator[Tuple[str, Dict[str, List[Dict[str, Any]]]]]:
+        """
+        流式解析CSV文件，逐个产出班级课表
+        
+        使用标准库csv逐行读取，只保留表头编译出的取值计划，内存占用与文件大小无关，
+        适合合并后的大型CSV边解析边输出。解析规则与parse_to_json一致，
+        但按文件中的行顺序产出；班级名重复时会产出多次（parse_to_json保留最后一次）。
+        
+        Args:
+            source: CSV文件路径，或已打开的文本流
+            
+        Yields:
+            (班级名, 该班级的课程表字典)
+            
+        Raises:
+            ValueError: 表格行数不足3行或表头中没有任何星期列
+        """
+        if isinstance(source, (str, Path)):
+            logger.info(f"开始流式解析CSV文件: {source}")
+            with open(source, newline='', encoding='utf-8-sig') as f:
+                yield from CSVParser.iter_classes(f)
+            return
+        
+        for class_name, cells, plan in CSVParser._read_class_rows(source):
+            yield class_name, CSVParser._parse_class_cells(cells, plan)
+    
+    @staticmethod
+    def _parse_class_rows(rows: Iterator[Tuple[str, List[str], LayoutPlan]]) -> TimetableGrid:
+        """
+        把班级行解析为课表（班级名重复时保留最后一次出现的数据）
+        
+        班级行数达到PARALLEL_MIN_ROWS且启用了CSV解析进程池时，按PARALLEL_CHUNK_ROWS行分块，
+        连同表头取值计划一起提交到进程池并行解析，各块结果按原顺序合并；
+        同时在途的块数不超过进程数的两倍，读取与解析交替进行。
+        等待各块结果受当前请求的提取时间预算限制（见worker_pool.request_deadline）。
+        
+        Raises:
+            ExtractionTimeout: 并行解析超出请求的时间预算
+        
+        Args:
+            rows: _read_class_rows产出的班级行
+            
+        Returns:
+            解析后的课表
+        """
+        pool = None
+        head: List[Tuple[str, List[str], LayoutPlan]] = []
+        if CSVParser.PARALLEL_MIN_ROWS > 0:
+            head = list(itertools.islice(rows, CSVParser.PARALLEL_MIN_ROWS))
+            if len(head) == CSVParser.PARALLEL_MIN_ROWS:
+                pool = _get_parse_pool()
+        rows = itertools.chain(head, rows)
+        
+        if pool is None:
+            grid = CSVParser.new_grid(max(64, len(head)))
+            for class_name, cells, plan in rows:
+                grid.set_class(class_name, CSVParser._iter_class_periods(cells, plan))
+            return grid
+        
+        # 延迟导入，避免CSV解析模块依赖进程池模块的加载顺序
+        from .worker_pool import check_request_deadline, remaining_request_time, request_deadline
+        
+        chunk_size = max(1, CSVParser.PARALLEL_CHUNK_ROWS)
+        logger.info(f"班级行超过 {CSVParser.PARALLEL_MIN_ROWS} 行，每 {chunk_size} 行一块在CSV解析进程池中并行解析")
+        grid = CSVParser.new_grid(len(head) * 2)
+        pending = []
+        
+        def merge_next() -> None:
+            chunk, plan, job = pending.pop(0)
+            remaining = remaining_request_time()
+            try:
+                part = job.result(timeout=max(0.0, remaining) if remaining is not None else None)
+            except FuturesTimeout:
+                for _, _, other in pending:
+                    other.cancel()
+                check_request_deadline()
+                raise
+            except Exception as e:
+                logger.warning(f"班级行分块并行解析异常，改为在当前进程解析: {e}")
+                part = CSVParser._parse_class_chunk(chunk, plan)
+            grid.update(part)
+        
+        chunks = 0
+        with request_deadline():
+            while True:
+                block = list(itertools.islice(rows, chunk_size))
+                if not block:
+                    break
+                plan = block[0][2]
+                chunk = [(class_name, cells) for class_name, cells, _ in block]
+                pending.append((chunk, plan, pool.submit(CSVParser._parse_class_chunk, chunk, plan)))
+                chunks += 1
+                if len(pending) >= CSVParser.PARALLEL_WORKERS * 2:
+                    merge_next()
+            while pending:
+                merge_next()
+        
+        logger.info(f"并行解析完成: {chunks} 块，{len(grid)} 个班级")
+        return grid
+    
+    @staticmethod
+    def _parse_class_chunk(chunk: List[Tuple[str, List[str]]], plan: LayoutPlan) -> TimetableGrid:
+        """
+        解析一块班级行（在CSV解析进程中执行）
+        
+        Args:
+            chunk: [(班级名, 按取值计划取出的课程单元格)]
+            plan: 表头取值计划
+            
+        Returns:
+            该块的课表
+        """
+        grid = CSVParser.new_grid(len(chunk))
+        for class_name, cells in chunk:
+            grid.set_class(class_name, CSVParser._iter_class_periods(cells, plan))
+        return grid
+    
+    @staticmethod
+    def _read_class_rows(source: IO[str]) -> Iterator[Tuple[str, List[str], LayoutPlan]]:
+        """
+        逐行读取CSV，产出每个班级行按取值计划取出的课程单元格
+        
+        Yields:
+            (班级名, 课程单元格（已去除首尾空白）, 表头取值计划)
             
+        Raises:
+            ValueError: 表格行数不足3行或表头中没有任何星期列
+        """
+        # 跳过空行，第0行为星期表头，第1行为节次
+        rows = (row for row in csv.reader(source) if row)
+        header = next(rows, None)
+        period_row = next(rows, None)
+        if period_row is None:
+            raise ValueError("表格行数不足，至少需要3行")
+        plan = CSVParser.compile_layout_plan(header, len(header))
+        if plan is None:
+            raise ValueError("未找到任何星期列")
+        
+        width = len(header)
+        columns = plan.columns.tolist()
+        data_rows = 0
+        total = 0
+        for row in rows:
+            data_rows += 1
+            # 列数少于表头的行按空单元格补齐
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+            class_name = row[0].strip()
+            if not CSVParser._is_class_row(row, class_name):
+                continue
+            total += 1
+            yield class_name, [row[col].strip() for col in columns], plan
+        
+        if data_rows == 0:
+            raise ValueError("表格行数不足，至少需要3行")
+        logger.info(f"CSV解析完成，共解析 {total} 个班级")
+        logger.info(f"单元格解析缓存: {CSVParser.cell_cache_stats()}")
+    
+    @staticmethod
+    def parse_dataframe(df: 'pd.DataFrame') -> Optional[TimetableGrid]:
+        """
+        解析表格DataFrame并转换为JSON格式（无需经过CSV文件）
+        
+        Args:
+            df: 表格数据，列索引为0..n-1，无表头（如camelot的table.df）
+            
+        Returns:
+            解析后的课表，失败返回None
+        """
+        try:
             if len(df) < 3:
-                logger.error(f"CSV文件行数不足，至少需要3行，实际: {len(df)}")
+                logger.error(f"表格行数不足，至少需要3行，实际: {len(df)}")
                 return None
             
-            # 步骤1: 识别星期列位置
-            logger.info("步骤1: 识别星期列位置...")
-            header_row = df.iloc[0]
-            weekday_start_cols = CSVParser._find_weekday_start_columns(header_row)
-            logger.info(f"星期列起始位置: {weekday_start_cols}")
-            
-            if not weekday_start_cols:
+            # 步骤1: 把表头编译为取值计划（星期列位置 -> 每个星期第1-9节对应的列）
+            logger.info("步骤1: 编译表头取值计划...")
+            plan = CSVParser.compile_layout_plan(df.iloc[0], df.shape[1])
+            if plan is None:
                 logger.error("未找到任何星期列")
                 return None
             
-            # 步骤2: 确定每个星期对应的列范围
-            logger.info("步骤2: 确定每个星期对应的列范围...")
-            weekday_column_ranges = CSVParser._calculate_weekday_ranges(
-                weekday_start_cols, len(header_row)
-            )
-            logger.info(f"星期列范围: {weekday_column_ranges}")
+            # 步骤2: 识别班级行
+            logger.info("步骤2: 识别班级行...")
+            body = df.to_numpy(dtype=object)[2:]
+            class_names = [str(value).strip() for value in body[:, 0]]
+            class_rows = [
+                index for index, class_name in enumerate(class_names)
+                if CSVParser._is_class_row(body[index], class_name)
+            ]
+            logger.info(f"班级行: {len(class_rows)}/{len(body)}")
             
-            # 步骤3: 解析每个班级的数据
+            # 步骤3: 一次性取出全部班级行的课程单元格，逐班级解析
             logger.info("步骤3: 开始解析班级数据...")
-            timetable = {}
-            class_count = 0
-            
-            for row_idx in range(2, len(df)):
-                row = df.iloc[row_idx]
-                class_name = str(row.iloc[0]).strip() if len(row) > 0 else ''
-                
-                # 判断是否是班级行：第1列非空且符合班级命名格式
-                if not CSVParser._is_class_row(row, class_name):
-                    logger.debug(f"跳过第{row_idx}行（不是班级行）: {class_name}")
-                    continue
-                
-                logger.info(f"解析班级: {class_name} (第{row_idx}行)")
-                timetable[class_name] = CSVParser._parse_class_schedule(
-                    row, weekday_column_ranges
-                )
-                class_count += 1
-                
-                # 记录每个班级的课程数
-                total_periods = sum(len(periods) for periods in timetable[class_name].values())
-                logger.debug(f"  班级 {class_name} 总课时数: {total_periods}")
+            cells = body[np.ix_(np.asarray(class_rows, dtype=np.intp), plan.columns)]
+            timetable = CSVParser.new_grid(len(class_rows))
+            for index, row_cells in zip(class_rows, cells.tolist()):
+                class_name = class_names[index]
+                logger.debug("解析班级: %s (第%d行)", class_name, index + 2)
+                timetable.set_class(class_name, CSVParser._iter_class_periods(
+                    [str(value).strip() for value in row_cells], plan
+                ))
             
-            logger.info(f"CSV解析完成，共解析 {class_count} 个班级")
+            logger.info(f"CSV解析完成，共解析 {len(class_rows)} 个班级")
+            logger.info(f"单元格解析缓存: {CSVParser.cell_cache_stats()}")
             return timetable
             
         except Exception as e:
@@ -96,23 +386,139 @@ class CSVParser:
             return None
     
     @staticmethod
-    def _find_weekday_start_columns(header_row: pd.Series) -> Dict[str, int]:
+    def parse_dataframes(dfs: List['pd.DataFrame']) -> Optional[TimetableGrid]:
         """
-        找出每个星期第一次出现的列索引（起始列）
+        解析多个表格（如PDF的多个页面，或同一页被拆成多段星期的表格）并按班级名拼接为一个课表
+        
+        表格总行数达到PARALLEL_MIN_ROWS且启用了CSV解析进程池时，多个表格在进程池中并行解析，
+        等待受当前请求的提取时间预算限制；否则（通常PDF每页只有几十到几百行）在当前进程内逐个解析，
+        不为此序列化DataFrame。结果按表格顺序拼接。
+        
+        Args:
+            dfs: 按页码顺序排列的表格数据列表
+            
+        Returns:
+            合并后的课表，全部解析失败返回None
+            
+        Raises:
+            ExtractionTimeout: 并行解析超出请求的时间预算
+        """
+        if len(dfs) == 1:
+            return CSVParser.parse_dataframe(dfs[0])
+        
+        # 延迟导入，避免CSV解析模块依赖进程池模块的加载顺序
+        from .worker_pool import check_request_deadline, remaining_request_time
+        pool = None
+        total_rows = sum(len(df) for df in dfs)
+        if 0 < CSVParser.PARALLEL_MIN_ROWS <= total_rows:
+            pool = _get_parse_pool()
+        jobs = [pool.submit(CSVParser.parse_dataframe, df) for df in dfs] if pool is not None else []
+        
+        merged = None
+        for index, df in enumerate(dfs, start=1):
+            logger.info(f"解析第 {index}/{len(dfs)} 个表格...")
+            try:
+                if jobs:
+                    remaining = remaining_request_time()
+                    timetable = jobs[index - 1].result(timeout=max(0.0, remaining) if remaining is not None else None)
+                else:
+                    timetable = CSVParser.parse_dataframe(df)
+            except FuturesTimeout:
+                for job in jobs[index:]:
+                    job.cancel()
+                check_request_deadline()
+                raise
+            except Exception as e:
+                logger.warning(f"第 {index} 个表格解析异常: {e}")
+                timetable = None
+            if timetable is None:
+                logger.warning(f"第 {index} 个表格解析失败，已跳过")
+                continue
+            
+            if merged is None:
+                merged = CSVParser.new_grid(len(timetable))
+            merged.merge(timetable)
+        
+        return merged
+    
+    @staticmethod
+    def check_structure(dfs: List['pd.DataFrame']) -> Dict[str, int]:
+        """
+        检查提取出的表格是否具备课表结构（不解析课程）
+        
+        Args:
+            dfs: 同一页的表格列表（一周可能被拆成多个表格）
+        
+        Returns:
+            {'weekdays': 表头中识别到的不同星期数, 'classes': 符合班级命名格式的不同班级数}
+        """
+        weekdays = set()
+        classes = set()
+        for df in dfs:
+            if len(df) == 0:
+                continue
+            weekdays.update(CSVParser._find_weekday_start_columns(df.iloc[0]))
+            for value in df.iloc[2:, 0]:
+                class_name = str(value).strip()
+                if CSVParser.CLASS_NAME_PATTERN.match(class_name):
+                    classes.add(class_name)
+        return {'weekdays': len(weekdays), 'classes': len(classes)}
+    
+    @staticmethod
+    def compile_layout_plan(header_row: Sequence[Any], total_columns: int) -> Optional[LayoutPlan]:
+        """
+        把表头编译为取值计划
+        
+        每个星期从其起始列开始取9列（不超过下一个星期的起始列和表格总列数），
+        依次对应第1-9节。同一表头的全部班级行共用一个计划。
         
         Args:
             header_row: CSV第一行（标题行）
+            total_columns: 表格总列数
+            
+        Returns:
+            取值计划，表头中没有任何星期时返回None
+        """
+        weekday_start_cols = CSVParser._find_weekday_start_columns(header_row)
+        logger.info(f"星期列起始位置: {weekday_start_cols}")
+        if not weekday_start_cols:
+            return None
+        
+        weekday_column_ranges = CSVParser._calculate_weekday_ranges(weekday_start_cols, total_columns)
+        logger.info(f"星期列范围: {weekday_column_ranges}")
+        
+        columns: List[int] = []
+        days = []
+        for weekday in CSVParser.WEEKDAYS:
+            if weekday not in weekday_column_ranges:
+                days.append((weekday, len(columns), 0))
+                continue
+            start_col, end_col = weekday_column_ranges[weekday]
+            # 星期标题所在列即第1节的数据列，最多9列
+            stop_col = min(start_col + CSVParser.PERIODS_PER_DAY, end_col, total_columns)
+            day_columns = list(range(start_col, max(start_col, stop_col)))
+            days.append((weekday, len(columns), len(day_columns)))
+            columns.extend(day_columns)
+        return LayoutPlan(np.asarray(columns, dtype=np.intp), tuple(days))
+    
+    @staticmethod
+    def _find_weekday_start_columns(header_row: Sequence[Any]) -> Dict[str, int]:
+        """
+        找出每个星期第一次出现的列索引（起始列）
+        
+        Args:
+            header_row: CSV第一行（标题行），pd.Series或单元格值序列
             
         Returns:
             字典，键为星期名，值为该星期第一次出现的列索引
         """
+        header_cells = [str(value) for value in header_row]
         weekday_start_cols = {}
         for weekday in CSVParser.WEEKDAYS:
-            for col_idx in range(len(header_row)):
-                cell = str(header_row.iloc[col_idx])
+            for col_idx, cell in enumerate(header_cells):
                 if weekday in cell:
                     weekday_start_cols[weekday] = col_idx
-                    logger.debug(f"找到 {weekday} 在第 {col_idx} 列")
+                    logger.debug("找到 %s 在第 %d 列", weekday, col_idx)
                     break
         return weekday_start_cols
     
@@ -148,17 +554,17 @@ class CSVParser:
                     break
             
             weekday_ranges[weekday] = (start_col, end_col)
-            logger.debug(f"{weekday}: 列范围 {start_col} 到 {end_col} (共 {end_col - start_col} 列)")
+            logger.debug("%s: 列范围 %d 到 %d (共 %d 列)", weekday, start_col, end_col, end_col - start_col)
         
         return weekday_ranges
     
     @staticmethod
-    def _is_class_row(row: pd.Series, first_cell: str) -> bool:
+    def _is_class_row(row: Sequence[Any], first_cell: str) -> bool:
         """
         判断是否是班级行
         
         Args:
-            row: 数据行
+            row: 数据行的单元格值序列（按列位置索引）
             first_cell: 第一列的值
             
         Returns:
@@ -185,132 +591,76 @@ class CSVParser:
         if len(row) > 1:
             # 检查第2列之后是否有非空数据
             for col_idx in range(1, min(len(row), 10)):  # 只检查前10列
-                cell_value = str(row.iloc[col_idx]).strip()
+                cell_value = str(row[col_idx]).strip()
                 if cell_value and cell_value != '' and cell_value != 'nan':
                     return True
         
         return False
     
     @staticmethod
-    def _parse_class_schedule(
-        row: pd.Series, 
-        weekday_column_ranges: Dict[str, Tuple[int, int]]
-    ) -> Dict[str, List[Dict[str, Any]]]:
+    def _parse_class_cells(cells: Sequence[str], plan: LayoutPlan) -> Dict[str, List[Dict[str, Any]]]:
         """
         解析一个班级的课程表
         
         Args:
-            row: 班级数据行
-            weekday_column_ranges: 每个星期对应的列范围字典
+            cells: 按取值计划取出的该班级课程单元格（已去除首尾空白）
+            plan: 表头取值计划
             
         Returns:
             该班级的课程表字典
         """
-        schedule = {}
+        schedule: Dict[str, List[Dict[str, Any]]] = {weekday: [] for weekday, _, _ in plan.days}
+        for day, period, course, teacher, is_class_teacher in CSVParser._iter_class_periods(cells, plan):
+            schedule[plan.days[day][0]].append({
+                'period': period,
+                'course': course,
+                'teacher': teacher,
+                'is_class_teacher': is_class_teacher
+            })
+        return schedule
+    
+    @staticmethod
+    def _iter_class_periods(cells: Sequence[str], plan: LayoutPlan) -> Iterator[PeriodEntry]:
+        """
+        逐节解析一个班级的课程单元格
         
-        for weekday in CSVParser.WEEKDAYS:
-            schedule[weekday] = []
-            
-            if weekday not in weekday_column_ranges:
-                logger.debug(f"  {weekday}: 未找到列范围")
-                continue
-            
-            start_col, end_col = weekday_column_ranges[weekday]
-            
-            # 每个星期对应9节课，按列顺序对应第1-9节
-            # 根据CSV结构：星期标题列在标题行中，但在数据行中该列就是第一节课的数据
-            # 所以数据列从 start_col 开始，共9列
-            data_start_col = start_col
-            
-            # 计算实际的数据列范围（最多9列，或到下一个星期之前）
-            max_cols = min(data_start_col + CSVParser.PERIODS_PER_DAY, end_col, len(row))
-            
-            logger.debug(f"  {weekday}: 数据列范围 {data_start_col}-{max_cols}，解析9节课")
+        Args:
+            cells: 按取值计划取出的该班级课程单元格（已去除首尾空白）
+            plan: 表头取值计划
             
-            # 用于标记已处理的 period（避免重复处理）
-            processed_periods = set()
+        Yields:
+            (星期序号, 节次, 课程名, 教师名, 是否班主任)，按星期、节次顺序
+        """
+        for day, (_, offset, count) in enumerate(plan.days):
+            skip_next = False
             
-            # 按列顺序解析为第1-9节课
-            for period in range(1, CSVParser.PERIODS_PER_DAY + 1):
-                # 如果已经处理过，跳过
-                if period in processed_periods:
+            for index in range(count):
+                # 上一节拆分时已占用本节
+                if skip_next:
+                    skip_next = False
                     continue
                 
-                col_idx = data_start_col + period - 1
-                
-                # 如果超出范围，跳过
-                if col_idx >= max_cols or col_idx >= len(row):
-                    break
-                
-                cell_value = str(row.iloc[col_idx]).strip()
-                
                 # 空单元格表示该节课为空（正常现象）
-                if not cell_value or cell_value == '' or cell_value == 'nan':
+                cell_value = cells[offset + index]
+                if not cell_value or cell_value == 'nan':
                     continue
                 
-                # 检查是否需要拆分：先检查下一个 period 是否为空
-                next_period = period + 1
-                should_split = False
-                split_courses = None
+                token = CSVParser._tokenize_cell(cell_value)
+                if token is None:
+                    continue
                 
-                if next_period <= CSVParser.PERIODS_PER_DAY:
-                    next_col_idx = data_start_col + next_period - 1
-                    if next_col_idx < max_cols and next_col_idx < len(row):
-                        next_cell_value = str(row.iloc[next_col_idx]).strip()
-                        # 如果下一个单元格为空，检查当前单元格是否有重复模式
-                        if not next_cell_value or next_cell_value == '' or next_cell_value == 'nan':
-                            # 先解析当前单元格获取课程名
-                            temp_period_data = CSVParser._parse_cell(cell_value, period)
-                            if temp_period_data:
-                                course = temp_period_data['course']
-                                # 检测是否有重复模式
-                                split_result = CSVParser._detect_and_split_duplicate_course(course)
-                                if split_result:
-                                    should_split = True
-                                    split_courses = split_result
-                                    logger.debug(f"    检测到需要拆分: 第{period}节 '{course}' -> 第{period}节 '{split_result[0]}' + 第{next_period}节 '{split_result[1]}'")
+                period = index + 1
+                # 下一节为空且课程名是重复模式（如"选修课选修课"）时，拆分为连续两节
+                if token.split and index + 1 < count:
+                    next_value = cells[offset + index + 1]
+                    if not next_value or next_value == 'nan':
+                        yield day, period, token.split[0], token.teacher, token.is_class_teacher
+                        # 两节使用相同的教师信息
+                        yield day, period + 1, token.split[1], token.teacher, token.is_class_teacher
+                        skip_next = True
+                        continue
                 
-                # 如果需要拆分
-                if should_split and split_courses:
-                    # 解析当前单元格获取教师信息
-                    temp_period_data = CSVParser._parse_cell(cell_value, period)
-                    if temp_period_data:
-                        teacher = temp_period_data.get('teacher')
-                        is_class_teacher = temp_period_data.get('is_class_teacher', False)
-                        
-                        # 创建两个 period 的数据
-                        # 第一个 period
-                        period_data_1 = {
-                            'period': period,
-                            'course': split_courses[0],
-                            'teacher': teacher,
-                            'is_class_teacher': is_class_teacher
-                        }
-                        schedule[weekday].append(period_data_1)
-                        processed_periods.add(period)
-                        logger.debug(f"    第{period}节: {period_data_1['course']} - {period_data_1.get('teacher', '无')}")
-                        
-                        # 第二个 period
-                        period_data_2 = {
-                            'period': next_period,
-                            'course': split_courses[1],
-                            'teacher': teacher,  # 两个 period 使用相同的教师信息
-                            'is_class_teacher': is_class_teacher
-                        }
-                        schedule[weekday].append(period_data_2)
-                        processed_periods.add(next_period)
-                        logger.debug(f"    第{next_period}节: {period_data_2['course']} - {period_data_2.get('teacher', '无')}")
-                else:
-                    # 正常解析单元格
-                    period_data = CSVParser._parse_cell(cell_value, period)
-                    if period_data:
-                        schedule[weekday].append(period_data)
-                        processed_periods.add(period)
-                        logger.debug(f"    第{period}节: {period_data['course']} - {period_data.get('teacher', '无')}")
-            
-            logger.debug(f"  {weekday}: 共 {len(schedule[weekday])} 节课")
-        
-        return schedule
+                yield day, period, token.course, token.teacher, token.is_class_teacher
     
     @staticmethod
     def _detect_and_split_duplicate_course(course: str) -> Optional[Tuple[str, str]]:
@@ -328,11 +678,11 @@ class CSVParser:
             return None
         
         # 检测完全重复模式：如 "选修课选修课" -> ("选修课", "选修课")
-        # 使用正则表达式匹配：课程名是否为某个子串的完全重复
-        match = re.match(r'^(.+)\1$', course)
-        if match:
-            base_course = match.group(1)
-            logger.debug(f"检测到重复课程名: '{course}' -> '{base_course}' + '{base_course}'")
+        # 即长度为偶数且前后两半相同（线性时间，不用回溯正则 ^(.+)\1$）
+        half, odd = divmod(len(course), 2)
+        if not odd and course[:half] == course[half:]:
+            base_course = course[:half]
+            logger.debug("检测到重复课程名: '%s' -> '%s' + '%s'", course, base_course, base_course)
             return (base_course, base_course)
         
         return None
@@ -349,61 +699,101 @@ class CSVParser:
         Returns:
             解析后的课时数据字典，如果解析失败返回None
         """
+        token = CSVParser._tokenize_cell(cell_value)
+        if token is None:
+            return None
+        return CSVParser._period_data(period, token)
+    
+    @staticmethod
+    @lru_cache(maxsize=CELL_CACHE_SIZE)
+    def _tokenize_cell(cell_value: str) -> Optional[CellToken]:
+        """
+        单元格词法分析（按单元格原文缓存，相同内容只分析一次）
+        
+        Args:
+            cell_value: 单元格内容
+            
+        Returns:
+            课程、教师、是否班主任及重复课程名的拆分结果，没有课程名时返回None
+        """
         # 特殊活动
         if '班会' in cell_value:
-            return {
-                'period': period,
-                'course': '班会',
-                'teacher': None,
-                'is_class_teacher': False
-            }
+            return CellToken('班会', None, False, None)
         
         if '阳光体育' in cell_value:
-            return {
-                'period': period,
-                'course': '阳光体育',
-                'teacher': None,
-                'is_class_teacher': False
-            }
-        
-        # 解析课程和教师（用换行符分隔）
-        parts = cell_value.split('\n')
-        course = parts[0].strip() if len(parts) > 0 else ''
+            return CellToken('阳光体育', None, False, None)
+        
+        # 解析课程和教师（用换行符分隔，只需前两段）
+        parts = cell_value.split('\n', 2)
+        course = parts[0].strip()
         teacher = parts[1].strip() if len(parts) > 1 else None
         
         if not course:
             return None
         
-        # 清理教师名字
+        # 清理教师名字：处理（班）标识
         is_class_teacher = False
         if teacher:
-            # 处理（班）标识
-            if '（班）' in teacher:
-                teacher = teacher.replace('（班）', '')
-                is_class_teacher = True
-            elif '(班)' in teacher:
-                teacher = teacher.replace('(班)', '')
-                is_class_teacher = True
+            for marker in ('（班）', '(班)'):
+                if marker in teacher:
+                    teacher = teacher.replace(marker, '')
+                    is_class_teacher = True
+                    break
         
+        return CellToken(course, teacher, is_class_teacher, CSVParser._detect_and_split_duplicate_course(course))
+    
+    @staticmethod
+    def _period_data(period: int, token: CellToken, course: Optional[str] = None) -> Dict[str, Any]:
+        """由单元格解析结果生成课时数据字典（course用于拆分后的课程名）"""
         return {
             'period': period,
-            'course': course,
-            'teacher': teacher,
-            'is_class_teacher': is_class_teacher
+            'course': course if course is not None else token.course,
+            'teacher': token.teacher,
+            'is_class_teacher': token.is_class_teacher
         }
     
     @staticmethod
-    def get_statistics(timetable: Dict[str, Any]) -> Dict[str, Any]:
+    def cell_cache_stats() -> Dict[str, Any]:
+        """单元格解析缓存统计（当前进程）：命中/未命中次数、条目数与命中率"""
+        info = CSVParser._tokenize_cell.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'entries': info.currsize,
+            'max_entries': info.maxsize,
+            'hit_rate': round(info.hits / lookups, 4) if lookups else 0.0
+        }
+    
+    @staticmethod
+    def get_statistics(timetable: TimetableGrid) -> Dict[str, Any]:
         """获取统计信息"""
         total_classes = len(timetable)
-        total_periods = sum(
-            len(periods) 
-            for class_data in timetable.values() 
-            for periods in class_data.values()
-        )
+        total_periods = timetable.total_periods()
         
         return {
             'total_classes': total_classes,
             'total_periods': total_periods
         }
 
+
+
+def _get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    获取CSV分块并行解析的进程池（首次调用时创建），未启用时返回None
+    
+    与PDF提取进程池分开：解析进程以spawn方式启动，只导入CSV解析模块，不预先导入camelot/OpenCV。
+    CSV专用模式（APP_PROFILE=csv）下不启动任何子进程，始终在请求进程内解析。
+    """
+    global _parse_pool, _parse_pool_initialized
+    with _parse_pool_lock:
+        if not _parse_pool_initialized:
+            _parse_pool_initialized = True
+            if CSVParser.PARALLEL_WORKERS > 0 and os.getenv('APP_PROFILE', 'full').lower() != 'csv':
+                _parse_pool = ProcessPoolExecutor(
+                    max_workers=CSVParser.PARALLEL_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                atexit.register(_parse_pool.shutdown, wait=False, cancel_futures=True)
+                logger.info(f"CSV解析进程池已创建，进程数: {CSVParser.PARALLEL_WORKERS}")
+        return _parse_pool
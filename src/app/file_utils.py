@@ -1,4 +1,5 @@
 """文件处理工具函数"""
+import hashlib
 import os
 import uuid
 from flask import request, jsonify
@@ -84,3 +85,22 @@ def save_temp_file(file: FileStorage, upload_folder: str, default_ext: str = '.p
     file.save(temp_path)
     return temp_path
 
+
+
+def compute_file_hash(file: FileStorage) -> str:
+    """
+    计算上传文件内容的SHA-256（读取后会把文件指针复位）
+    
+    Args:
+        file: Flask文件对象
+        
+    Returns:
+        十六进制SHA-256摘要
+    """
+    sha256 = hashlib.sha256()
+    stream = file.stream
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(64 * 1024), b''):
+        sha256.update(chunk)
+    stream.seek(0)
+    return sha256.hexdigest()
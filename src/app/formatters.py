@@ -1,41 +1,70 @@
 """数据格式化函数"""
 import time
-from typing import Dict, Any, Tuple, Optional
-from flask import jsonify
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Tuple, Optional
+from flask import current_app, jsonify
 
 from .csv_parser import CSVParser
 from .logger_config import logger
+from .row_cache import RowParseCache
+from .timetable_grid import TimetableGrid
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-def format_timetable(timetable: Dict[str, Any]) -> Dict[str, Any]:
-    """格式化课表数据为更清晰的结构"""
-    weekdays = ['星期一', '星期二', '星期三', '星期四', '星期五']
-    class_list = []
-    
-    for class_name, schedule in sorted(timetable.items()):
-        class_data = {
-            'class_name': class_name,
-            'schedule': {}
-        }
-        
-        for weekday in weekdays:
-            if weekday in schedule:
-                weekday_en = CSVParser.WEEKDAY_EN_MAP.get(weekday, weekday.lower())
-                class_data['schedule'][weekday_en] = schedule[weekday]
-        
-        class_list.append(class_data)
+
+def format_timetable(timetable: TimetableGrid) -> Dict[str, Any]:
+    """格式化课表数据为更清晰的结构（数组课表在此展开为课时字典）"""
+    class_list = [
+        format_class(class_name, timetable.schedule(class_name))
+        for class_name in sorted(timetable.class_names)
+    ]
     
     return {
         'classes': class_list
     }
 
 
-def csv_to_json_internal(csv_path: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[dict]]:
+def format_class(class_name: str, schedule: Dict[str, Any]) -> Dict[str, Any]:
+    """格式化单个班级的课表（星期名转换为英文键）"""
+    class_data = {
+        'class_name': class_name,
+        'schedule': {}
+    }
+    
+    for weekday in CSVParser.WEEKDAYS:
+        if weekday in schedule:
+            weekday_en = CSVParser.WEEKDAY_EN_MAP.get(weekday, weekday.lower())
+            class_data['schedule'][weekday_en] = schedule[weekday]
+    
+    return class_data
+
+
+def stream_csv_classes(classes: Iterator[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """
+    把流式解析出的班级课表逐个序列化为NDJSON行（每行一个班级，结构与classes数组的元素相同）
+    
+    Args:
+        classes: CSVParser.iter_classes产出的 (班级名, 课程表) 迭代器
+        
+    Yields:
+        以换行符结尾的JSON文本
+    """
+    for class_name, schedule in classes:
+        yield current_app.json.dumps(format_class(class_name, schedule)) + '\n'
+
+
+def csv_to_json_internal(
+    csv_path: str,
+    school_id: Optional[str] = None,
+    row_cache: Optional[RowParseCache] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[tuple]]:
     """
     内部函数：将CSV转换为JSON（复用代码）
     
     Args:
         csv_path: CSV文件路径
+        school_id: 学校ID，与row_cache同时提供时增量解析，并在结果中标出发生变化的班级
+        row_cache: 行解析缓存
         
     Returns:
         (formatted_data, statistics, error_response) 元组
@@ -45,16 +74,56 @@ def csv_to_json_internal(csv_path: str) -> Tuple[Optional[Dict[str, Any]], Optio
     logger.info("开始CSV转JSON转换")
     logger.info("=" * 60)
     conversion_start = time.time()
-    timetable = CSVParser.parse_to_json(csv_path)
+    changes = None
+    if school_id and row_cache is not None:
+        result = CSVParser.parse_incremental(csv_path, school_id, row_cache)
+        timetable, changes = result if result is not None else (None, None)
+    else:
+        timetable = CSVParser.parse_to_json(csv_path)
     conversion_time = time.time() - conversion_start
     logger.info(f"CSV转JSON耗时: {conversion_time:.2f}秒")
     
+    formatted_data, statistics, error_response = _format_parsed_timetable(timetable)
+    if changes is not None and formatted_data is not None:
+        # 标出相对同一谱系上一次上传发生变化的班级
+        changed = set(changes['changed_classes'])
+        for class_data in formatted_data['classes']:
+            class_data['changed'] = class_data['class_name'] in changed
+        formatted_data['changes'] = changes
+    return formatted_data, statistics, error_response
+
+
+def dataframes_to_json_internal(dfs: List['pd.DataFrame']) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[tuple]]:
+    """
+    内部函数：将PDF提取出的表格DataFrame直接转换为JSON（不经过CSV文件）
+    
+    Args:
+        dfs: 按页码顺序排列的表格数据，多个表格会合并为一个课表
+        
+    Returns:
+        (formatted_data, statistics, error_response) 元组
+    """
+    logger.info("=" * 60)
+    logger.info("开始表格转JSON转换")
+    logger.info("=" * 60)
+    conversion_start = time.time()
+    timetable = CSVParser.parse_dataframes(dfs)
+    conversion_time = time.time() - conversion_start
+    logger.info(f"表格转JSON耗时: {conversion_time:.2f}秒")
+    
+    return _format_parsed_timetable(timetable)
+
+
+def _format_parsed_timetable(
+    timetable: Optional[TimetableGrid]
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[tuple]]:
+    """格式化解析结果并计算统计信息"""
     if timetable is None:
         logger.error("CSV解析失败，无法转换为JSON")
-        return None, None, jsonify({
+        return None, None, (jsonify({
             'success': False,
             'message': 'CSV解析失败，无法转换为JSON'
-        }), 400
+        }), 400)
     
     # 格式化数据
     logger.info("格式化数据...")
@@ -68,4 +137,3 @@ def csv_to_json_internal(csv_path: str) -> Tuple[Optional[Dict[str, Any]], Optio
     logger.info(f"统计信息: {statistics}")
     
     return formatted_data, statistics, None
-
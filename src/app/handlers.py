@@ -1,13 +1,75 @@
 """API路由处理函数"""
+import itertools
 import os
 import time
-from flask import Flask, request, jsonify, send_file, g
+from flask import Flask, Response, request, jsonify, send_file, g, stream_with_context
 from werkzeug.utils import secure_filename
 
-from .pdf_parser import PDFParser
-from .file_utils import validate_file_upload, save_temp_file, ALLOWED_EXTENSIONS_PDF, ALLOWED_EXTENSIONS_CSV
-from .formatters import csv_to_json_internal
+from .file_utils import (
+    validate_file_upload, save_temp_file, compute_file_hash,
+    ALLOWED_EXTENSIONS_PDF, ALLOWED_EXTENSIONS_CSV
+)
+from .csv_parser import CSVParser
+from .formatters import csv_to_json_internal, dataframes_to_json_internal, stream_csv_classes
 from .logger_config import logger
+from .render_backends import render_backend_info
+from .result_cache import ResultCache
+from .worker_pool import ExtractionLimitExceeded, get_extraction_pool, request_deadline
+
+
+def limit_exceeded_response(error: ExtractionLimitExceeded):
+    """提取超出资源限制时的响应：422 + 区分超时/内存超限的错误码"""
+    logger.error(f"PDF提取超出资源限制（{error.error_code}）: {error}")
+    return jsonify({
+        'success': False,
+        'message': f'PDF提取超出资源限制: {error}',
+        'error_code': error.error_code
+    }), 422
+
+
+def preflight_rejected_response(report: dict):
+    """上传未通过预检时的响应：400 + 预检错误码与报告"""
+    return jsonify({
+        'success': False,
+        'message': report['message'],
+        'error_code': report['error_code'],
+        'preflight': report
+    }), 400
+
+
+def stream_csv_response(csv_path: str):
+    """
+    以NDJSON流式返回CSV解析结果（每行一个班级），响应关闭后删除临时文件
+    
+    先解析到第一个班级，表头无效时仍能返回400；其余班级边解析边输出。
+    临时文件在响应关闭时清理（call_on_close），客户端提前断开或响应体未被迭代时同样会删除。
+    """
+    classes = CSVParser.iter_classes(csv_path)
+    try:
+        first = next(classes, None)
+    except (ValueError, UnicodeDecodeError) as e:
+        logger.error(f"CSV流式解析失败: {e}")
+        g.temp_files_to_clean = [csv_path]
+        return jsonify({
+            'success': False,
+            'message': f'CSV解析失败，无法转换为JSON: {e}'
+        }), 400
+    
+    def generate():
+        head = [first] if first is not None else []
+        yield from stream_csv_classes(itertools.chain(head, classes))
+    
+    def cleanup():
+        classes.close()
+        try:
+            if os.path.exists(csv_path):
+                os.remove(csv_path)
+        except OSError as e:
+            logger.warning(f"清理临时文件失败 {csv_path}: {e}")
+    
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    response.call_on_close(cleanup)
+    return response
 
 
 def register_health_route(app: Flask) -> None:
@@ -21,7 +83,7 @@ def register_health_route(app: Flask) -> None:
         tags:
           - 系统
         summary: 健康检查
-        description: 检查API服务是否正常运行
+        description: 检查API服务是否正常运行，启用提取进程池时附带进程池状态与资源限制计数
         responses:
           200:
             description: 服务正常
@@ -31,13 +93,41 @@ def register_health_route(app: Flask) -> None:
                 status:
                   type: string
                   example: ok
+                extraction_pool:
+                  type: object
+                  description: 进程池配置（含单任务超时job_timeout与请求总预算request_timeout）与任务计数（timeouts、memory_limit_exceeded 为被终止的任务数）
+                render_backend:
+                  type: object
+                  description: lattice渲染后端（name）、选择方式（auto/configured）及各后端自检耗时
+                cell_cache:
+                  type: object
+                  description: 本进程单元格解析缓存的命中/未命中次数、条目数与命中率（hit_rate）
+                json_encoder:
+                  type: string
+                  description: 响应使用的JSON编码器（orjson、msgspec或stdlib）
+                  example: orjson
         """
         logger.debug("健康检查请求")
-        return jsonify({'status': 'ok'}), 200
+        health_info = {
+            'status': 'ok',
+            'render_backend': render_backend_info(),
+            'cell_cache': CSVParser.cell_cache_stats(),
+            'json_encoder': getattr(app.json, 'encoder_name', 'stdlib')
+        }
+        row_cache = app.config.get('ROW_CACHE')
+        if row_cache is not None:
+            health_info['row_cache'] = row_cache.stats()
+        pool = get_extraction_pool() if app.config.get('APP_PROFILE') != 'csv' else None
+        if pool is not None:
+            health_info['extraction_pool'] = pool.stats()
+        return jsonify(health_info), 200
 
 
 def register_pdf_to_json_route(app: Flask) -> None:
     """注册PDF转JSON路由"""
+    # PDF提取依赖（camelot/pandas）只在注册PDF接口时导入，CSV专用模式不加载
+    from .pdf_parser import PDFParser
+    from .preflight import PDFPreflight
     
     @app.route('/api/timetable/parse', methods=['POST'])
     def parse_timetable():
@@ -47,7 +137,7 @@ def register_pdf_to_json_route(app: Flask) -> None:
         tags:
           - 课程表
         summary: 解析PDF课程表
-        description: 上传PDF格式的课程表文件，返回结构化的JSON数据
+        description: 上传PDF格式的课程表文件，返回结构化的JSON数据。多页PDF按页并行提取；页面中的全部表格并行解析后按班级名拼接为一个课表。
         consumes:
           - multipart/form-data
         parameters:
@@ -56,6 +146,17 @@ def register_pdf_to_json_route(app: Flask) -> None:
             type: file
             required: true
             description: PDF格式的课程表文件（最大16MB）
+          - in: formData
+            name: pages
+            type: string
+            required: false
+            description: 提取的页码，如 1、1,3-5、2-end、all（默认1，可通过PDF_PAGES配置）
+          - in: formData
+            name: engine
+            type: string
+            required: false
+            enum: [camelot, vector, text]
+            description: 表格提取引擎，camelot（渲染识别）、vector（读取PDF矢量划线）或 text（按星期表头和班级名从文本层构建课表）；后两者更快，未找到表格时回退到camelot。默认camelot
         responses:
           200:
             description: 解析成功
@@ -125,8 +226,13 @@ def register_pdf_to_json_route(app: Flask) -> None:
                     page:
                       type: integer
                       example: 1
+                parsing_reports:
+                  type: array
+                  description: 提取到多个表格时（多页，或同一页被拆成多个表格）每个表格的解析报告（按页码、表格顺序排序）
+                  items:
+                    type: object
           400:
-            description: 请求错误（文件缺失、格式错误或解析失败）
+            description: 请求错误（文件缺失、格式错误、未通过预检或解析失败）
             schema:
               type: object
               properties:
@@ -136,6 +242,29 @@ def register_pdf_to_json_route(app: Flask) -> None:
                 message:
                   type: string
                   example: PDF解析失败，无法提取表格
+                error_code:
+                  type: string
+                  description: 未通过预检时的错误码
+                  enum: [NOT_PDF, PDF_UNREADABLE, TOO_MANY_PAGES, PAGES_OUT_OF_RANGE, NO_TEXT_LAYER, NO_WEEKDAY_HEADER]
+                  example: NO_TEXT_LAYER
+                preflight:
+                  type: object
+                  description: 未通过预检时的预检报告
+          422:
+            description: PDF提取超出资源限制（单个任务超时、请求的提取时间超出预算或内存超限），提取进程已被终止
+            schema:
+              type: object
+              properties:
+                success:
+                  type: boolean
+                  example: false
+                message:
+                  type: string
+                  example: "PDF提取超出资源限制: 任务超时（120秒）"
+                error_code:
+                  type: string
+                  enum: [EXTRACTION_TIMEOUT, EXTRACTION_MEMORY_LIMIT]
+                  example: EXTRACTION_TIMEOUT
           500:
             description: 服务器内部错误
             schema:
@@ -160,32 +289,76 @@ def register_pdf_to_json_route(app: Flask) -> None:
         if error_response:
             return error_response
         
+        pages = request.form.get('pages', PDFParser.DEFAULT_PAGES).strip()
+        if not PDFParser.is_valid_pages(pages):
+            logger.warning(f"页码参数格式错误: {pages}")
+            return jsonify({
+                'success': False,
+                'message': f'页码参数格式错误: {pages}，示例: 1、1,3-5、2-end、all'
+            }), 400
+        
+        engine = request.form.get('engine', PDFParser.DEFAULT_ENGINE).strip()
+        if not PDFParser.is_valid_engine(engine):
+            logger.warning(f"提取引擎参数错误: {engine}")
+            return jsonify({
+                'success': False,
+                'message': f"提取引擎参数错误: {engine}，可选: {', '.join(PDFParser.ENGINES)}"
+            }), 400
+        
+        # 按文件内容查询结果缓存，命中时直接返回，不再调用PDFParser
+        result_cache = app.config.get('RESULT_CACHE')
+        content_hash = compute_file_hash(file)
+        logger.info(f"文件SHA-256: {content_hash}")
+        cache_key = ResultCache.make_key(
+            content_hash, pages=pages, engine=engine,
+            preflight=PDFPreflight.ENABLED, settings=PDFParser.output_settings()
+        )
+        if result_cache is not None:
+            cached_result = result_cache.get(cache_key)
+            if cached_result is not None:
+                total_time = time.time() - start_time
+                logger.info(f"命中结果缓存，总耗时: {total_time:.2f}秒")
+                return jsonify({
+                    'success': True,
+                    'message': '解析成功',
+                    **cached_result
+                }), 200
+        
         # 保存临时文件
         temp_pdf_path = save_temp_file(file, app.config['UPLOAD_FOLDER'], '.pdf')
         
-        csv_path = None
-        
         try:
-            # 步骤1: PDF -> CSV
+            # 预检: 拦截非PDF、扫描件和不含星期表头的上传，只提取含星期表头的页面
+            extract_pages = pages
+            if PDFPreflight.ENABLED:
+                preflight = PDFPreflight.inspect(temp_pdf_path, pages)
+                if not preflight['ok']:
+                    return preflight_rejected_response(preflight)
+                extract_pages = PDFPreflight.pages_spec(preflight)
+            
+            # 步骤1: PDF -> 表格（内存中的DataFrame，不写CSV文件）
             logger.info("=" * 60)
-            logger.info("步骤1: PDF转CSV")
+            logger.info("步骤1: PDF表格提取")
             logger.info("=" * 60)
             step1_start = time.time()
-            csv_path, parsing_report = PDFParser.extract_table(temp_pdf_path)
-            step1_time = time.time() - step1_start
-            logger.info(f"PDF转CSV耗时: {step1_time:.2f}秒")
-            
-            if csv_path is None:
-                logger.error("PDF解析失败，无法提取表格")
-                return jsonify({
-                    'success': False,
-                    'message': 'PDF解析失败，无法提取表格'
-                }), 400
-            
-            # 步骤2: CSV -> JSON（复用代码）
-            step2_start = time.time()
-            formatted_data, statistics, error_response = csv_to_json_internal(csv_path)
-            step2_time = time.time() - step2_start
+            with request_deadline():
+                page_tables = PDFParser.extract_pages(temp_pdf_path, extract_pages, engine=engine)
+                step1_time = time.time() - step1_start
+                logger.info(f"PDF表格提取耗时: {step1_time:.2f}秒")
+                
+                if not page_tables:
+                    logger.error("PDF解析失败，无法提取表格")
+                    return jsonify({
+                        'success': False,
+                        'message': 'PDF解析失败，无法提取表格'
+                    }), 400
+                
+                # 步骤2: 表格 -> JSON（复用代码），与提取共用请求的时间预算
+                step2_start = time.time()
+                formatted_data, statistics, error_response = dataframes_to_json_internal(
+                    [df for _, df, _ in page_tables]
+                )
+                step2_time = time.time() - step2_start
             
             if error_response:
                 return error_response
@@ -193,18 +366,28 @@ def register_pdf_to_json_route(app: Flask) -> None:
             total_time = time.time() - start_time
             logger.info("=" * 60)
             logger.info(f"请求处理完成，总耗时: {total_time:.2f}秒")
-            logger.info(f"  - PDF转CSV: {step1_time:.2f}秒")
-            logger.info(f"  - CSV转JSON: {step2_time:.2f}秒")
+            logger.info(f"  - PDF表格提取: {step1_time:.2f}秒")
+            logger.info(f"  - 表格转JSON: {step2_time:.2f}秒")
             logger.info("=" * 60)
             
+            result = {
+                'data': formatted_data,
+                'statistics': statistics,
+                'parsing_report': page_tables[0][2]
+            }
+            if len(page_tables) > 1:
+                result['parsing_reports'] = [report for _, _, report in page_tables]
+            if result_cache is not None:
+                result_cache.set(cache_key, result)
+            
             return jsonify({
                 'success': True,
                 'message': '解析成功',
-                'data': formatted_data,
-                'statistics': statistics,
-                'parsing_report': parsing_report
+                **result
             }), 200
             
+        except ExtractionLimitExceeded as e:
+            return limit_exceeded_response(e)
         except Exception as e:
             logger.error(f"处理失败: {e}", exc_info=True)
             return jsonify({
@@ -213,23 +396,151 @@ def register_pdf_to_json_route(app: Flask) -> None:
             }), 500
         
         finally:
-            # 确保所有临时文件都被清理
-            files_to_clean = [temp_pdf_path]
-            if csv_path:
-                files_to_clean.append(csv_path)
+            # 确保临时文件被清理
+            try:
+                if os.path.exists(temp_pdf_path):
+                    logger.debug(f"清理临时文件: {temp_pdf_path}")
+                    os.remove(temp_pdf_path)
+                    logger.debug(f"成功删除文件: {temp_pdf_path}")
+            except Exception as e:
+                logger.warning(f"清理临时文件失败 {temp_pdf_path}: {e}")
+
+
+def register_preflight_route(app: Flask) -> None:
+    """注册PDF预检路由"""
+    from .pdf_parser import PDFParser
+    from .preflight import PDFPreflight
+    
+    @app.route('/api/timetable/preflight', methods=['POST'])
+    def preflight_timetable():
+        """
+        预检PDF课程表
+        ---
+        tags:
+          - 课程表
+        summary: 预检PDF课程表
+        description: 不提取表格，只用毫秒级检查判断上传能否解析：文件头是否为PDF、能否打开、页数、页面是否有文本层（扫描件没有）、是否含星期表头。解析接口在提取前执行同样的检查。
+        consumes:
+          - multipart/form-data
+        parameters:
+          - in: formData
+            name: file
+            type: file
+            required: true
+            description: PDF格式的课程表文件（最大16MB）
+          - in: formData
+            name: pages
+            type: string
+            required: false
+            description: 检查的页码，如 1、1,3-5、2-end、all（默认1，可通过PDF_PAGES配置）
+        responses:
+          200:
+            description: 预检完成（是否通过见preflight.ok）
+            schema:
+              type: object
+              properties:
+                success:
+                  type: boolean
+                  example: true
+                message:
+                  type: string
+                  example: 预检通过
+                preflight:
+                  type: object
+                  properties:
+                    ok:
+                      type: boolean
+                      example: true
+                    error_code:
+                      type: string
+                      enum: [NOT_PDF, PDF_UNREADABLE, TOO_MANY_PAGES, PAGES_OUT_OF_RANGE, NO_TEXT_LAYER, NO_WEEKDAY_HEADER]
+                    message:
+                      type: string
+                    page_count:
+                      type: integer
+                      example: 3
+                    pages:
+                      type: array
+                      description: 解析时将提取的页码（含星期表头的页面）
+                      items:
+                        type: integer
+                    text_pages:
+                      type: array
+                      items:
+                        type: integer
+                    weekday_pages:
+                      type: array
+                      items:
+                        type: integer
+                    weekdays:
+                      type: array
+                      items:
+                        type: string
+                      example: [星期一, 星期二, 星期三, 星期四, 星期五]
+                    elapsed_ms:
+                      type: number
+                      format: float
+                      example: 3.2
+          400:
+            description: 请求错误（文件缺失或参数格式错误）
+            schema:
+              type: object
+              properties:
+                success:
+                  type: boolean
+                  example: false
+                message:
+                  type: string
+                  example: 未找到文件，请使用file字段上传文件
+          500:
+            description: 服务器内部错误
+            schema:
+              type: object
+              properties:
+                success:
+                  type: boolean
+                  example: false
+                message:
+                  type: string
+                  example: "处理失败: 错误信息"
+        """
+        logger.info("收到PDF预检请求")
+        
+        # 验证文件上传
+        file, error_response, status_code = validate_file_upload('file', ALLOWED_EXTENSIONS_PDF)
+        if error_response:
+            return error_response
+        
+        pages = request.form.get('pages', PDFParser.DEFAULT_PAGES).strip()
+        if not PDFParser.is_valid_pages(pages):
+            logger.warning(f"页码参数格式错误: {pages}")
+            return jsonify({
+                'success': False,
+                'message': f'页码参数格式错误: {pages}，示例: 1、1,3-5、2-end、all'
+            }), 400
+        
+        try:
+            # 直接检查内存中的文件内容，不保存临时文件
+            report = PDFPreflight.inspect(file.read(), pages)
+            return jsonify({
+                'success': True,
+                'message': '预检通过' if report['ok'] else report['message'],
+                'preflight': report
+            }), 200
             
-            for file_path in files_to_clean:
-                try:
-                    if os.path.exists(file_path):
-                        logger.debug(f"清理临时文件: {file_path}")
-                        os.remove(file_path)
-                        logger.debug(f"成功删除文件: {file_path}")
-                except Exception as e:
-                    logger.warning(f"清理临时文件失败 {file_path}: {e}")
+        except Exception as e:
+            logger.error(f"预检失败: {e}", exc_info=True)
+            return jsonify({
+                'success': False,
+                'message': f'处理失败: {str(e)}'
+            }), 500
 
 
 def register_pdf_to_csv_route(app: Flask) -> None:
     """注册PDF转CSV路由"""
+    # PDF提取依赖（camelot/pandas）只在注册PDF接口时导入，CSV专用模式不加载
+    from .pdf_parser import PDFParser
+    from .preflight import PDFPreflight
     
     @app.route('/api/pdf/to-csv', methods=['POST'])
     def pdf_to_csv():
@@ -278,7 +589,7 @@ def register_pdf_to_csv_route(app: Flask) -> None:
                 type: string
                 example: attachment; filename="table.csv"
           400:
-            description: 请求错误（文件缺失、格式错误或解析失败）
+            description: 请求错误（文件缺失、格式错误、未通过预检或解析失败）
             schema:
               type: object
               properties:
@@ -288,6 +599,29 @@ def register_pdf_to_csv_route(app: Flask) -> None:
                 message:
                   type: string
                   example: PDF解析失败，无法提取表格
+                error_code:
+                  type: string
+                  description: 未通过预检时的错误码
+                  enum: [NOT_PDF, PDF_UNREADABLE, TOO_MANY_PAGES, PAGES_OUT_OF_RANGE, NO_TEXT_LAYER, NO_WEEKDAY_HEADER]
+                  example: NO_TEXT_LAYER
+                preflight:
+                  type: object
+                  description: 未通过预检时的预检报告
+          422:
+            description: PDF提取超出资源限制（单个任务超时、请求的提取时间超出预算或内存超限），提取进程已被终止
+            schema:
+              type: object
+              properties:
+                success:
+                  type: boolean
+                  example: false
+                message:
+                  type: string
+                  example: "PDF提取超出资源限制: 任务超时（120秒）"
+                error_code:
+                  type: string
+                  enum: [EXTRACTION_TIMEOUT, EXTRACTION_MEMORY_LIMIT]
+                  example: EXTRACTION_TIMEOUT
           500:
             description: 服务器内部错误
             schema:
@@ -328,12 +662,20 @@ def register_pdf_to_csv_route(app: Flask) -> None:
         csv_path = None
         
         try:
+            # 预检: 拦截非PDF、扫描件和不含星期表头的上传（只提取第1页）
+            if PDFPreflight.ENABLED:
+                preflight = PDFPreflight.inspect(temp_pdf_path, '1')
+                if not preflight['ok']:
+                    g.temp_files_to_clean = [temp_pdf_path]
+                    return preflight_rejected_response(preflight)
+            
             # PDF -> CSV
             logger.info("=" * 60)
             logger.info("开始PDF转CSV转换")
             logger.info("=" * 60)
             conversion_start = time.time()
-            csv_path, parsing_report = PDFParser.extract_table(temp_pdf_path)
+            with request_deadline():
+                csv_path, parsing_report = PDFParser.extract_table(temp_pdf_path)
             conversion_time = time.time() - conversion_start
             logger.info(f"PDF转CSV耗时: {conversion_time:.2f}秒")
             
@@ -383,6 +725,9 @@ def register_pdf_to_csv_route(app: Flask) -> None:
                 etag=False
             )
             
+        except ExtractionLimitExceeded as e:
+            g.temp_files_to_clean = [temp_pdf_path]
+            return limit_exceeded_response(e)
         except Exception as e:
             logger.error(f"处理失败: {e}", exc_info=True)
             # 将需要清理的文件路径存储到g对象中，由after_request钩子清理
@@ -421,6 +766,8 @@ def register_csv_to_json_route(app: Flask) -> None:
           - 仅支持CSV格式文件，最大文件大小为16MB
           - CSV文件必须符合课程表格式要求（包含星期列和班级行）
           - 返回的JSON数据包含格式化后的课程表结构和统计信息
+          - 大型CSV可使用stream=true逐行解析、逐个班级返回，服务端内存占用与文件大小无关
+          - 每周重新上传同一学校的课表时可提供school_id，只重新解析发生变化的班级行并标出变化的班级
         consumes:
           - multipart/form-data
         parameters:
@@ -429,6 +776,17 @@ def register_csv_to_json_route(app: Flask) -> None:
             type: file
             required: true
             description: CSV格式的课程表文件（最大16MB），必须符合课程表格式要求
+          - in: formData
+            name: stream
+            type: boolean
+            required: false
+            default: false
+            description: 为true时以NDJSON（application/x-ndjson）流式返回，每行一个班级，按CSV中的行顺序输出，不含统计信息
+          - in: formData
+            name: school_id
+            type: string
+            required: false
+            description: 学校ID。提供时按学校ID+表头签名增量解析：只重新解析内容变化的班级行，每个班级附带changed标记，data.changes给出变化报告（流式返回时忽略）
         responses:
           200:
             description: 转换成功，返回JSON数据
@@ -492,6 +850,20 @@ def register_csv_to_json_route(app: Flask) -> None:
                 message:
                   type: string
                   example: CSV解析失败，无法转换为JSON
+          422:
+            description: 大型CSV分块并行解析超出请求的时间预算（EXTRACTION_REQUEST_TIMEOUT）
+            schema:
+              type: object
+              properties:
+                success:
+                  type: boolean
+                  example: false
+                message:
+                  type: string
+                  example: "CSV解析超出请求的时间预算: 请求的提取时间超出预算（300秒）"
+                error_code:
+                  type: string
+                  example: EXTRACTION_TIMEOUT
           500:
             description: 服务器内部错误
             schema:
@@ -529,9 +901,17 @@ def register_csv_to_json_route(app: Flask) -> None:
         # 保存临时文件
         temp_csv_path = save_temp_file(file, app.config['UPLOAD_FOLDER'], '.csv')
         
+        # 流式返回：逐行解析、逐个班级输出
+        if request.form.get('stream', 'false').lower() == 'true':
+            logger.info("以NDJSON流式返回解析结果")
+            return stream_csv_response(temp_csv_path)
+        
         try:
-            # CSV -> JSON（复用代码）
-            formatted_data, statistics, error_response = csv_to_json_internal(temp_csv_path)
+            # CSV -> JSON（复用代码）；提供学校ID时按谱系增量解析
+            school_id = request.form.get('school_id', '').strip() or None
+            formatted_data, statistics, error_response = csv_to_json_internal(
+                temp_csv_path, school_id=school_id, row_cache=app.config.get('ROW_CACHE')
+            )
             
             if error_response:
                 g.temp_files_to_clean = [temp_csv_path]
@@ -552,6 +932,14 @@ def register_csv_to_json_route(app: Flask) -> None:
                 'statistics': statistics
             }), 200
             
+        except ExtractionLimitExceeded as e:
+            logger.error(f"CSV解析超出请求的时间预算: {e}")
+            g.temp_files_to_clean = [temp_csv_path]
+            return jsonify({
+                'success': False,
+                'message': f'CSV解析超出请求的时间预算: {e}',
+                'error_code': e.error_code
+            }), 422
         except Exception as e:
             logger.error(f"处理失败: {e}", exc_info=True)
             # 将需要清理的文件路径存储到g对象中，由after_request钩子清理
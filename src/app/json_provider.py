@@ -0,0 +1,183 @@
+"""JSON响应编码模块"""
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Type
+
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+from .logger_config import logger
+
+# 可选的JSON编码器，按优先顺序排列：auto时选用第一个已安装的
+JSON_ENCODERS = ('orjson', 'msgspec', 'stdlib')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """
+    标准库json编码
+
+    与Flask默认实现相同；ensure_ascii=False时不转义非ASCII字符（中文直接以UTF-8输出，响应体积约为转义时的一半）。
+    """
+
+    encoder_name = 'stdlib'
+
+    def __init__(self, app: Flask, ensure_ascii: bool = True):
+        super().__init__(app)
+        self.ensure_ascii = ensure_ascii
+
+
+class _BytesJSONProvider(StdlibJSONProvider, ABC):
+    """
+    直接编码为UTF-8字节的JSON编码基类
+
+    response直接用编码出的字节构造响应，不经过str；子类实现_encode。
+    非ASCII字符总是直接以UTF-8输出（编码器不支持转义），JSON_ENSURE_ASCII=true时不选用。
+    default、sort_keys、compact的语义与Flask默认实现一致；
+    编码器不支持的对象（如超出64位的整数）或带额外参数的dumps调用交给标准库处理。
+    """
+
+    def __init__(self, app: Flask):
+        super().__init__(app, ensure_ascii=False)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._encode_or_fallback(obj, indent=False).decode('utf-8')
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._encode_or_fallback(obj, indent) + b'\n', mimetype=self.mimetype
+        )
+
+    def _encode_or_fallback(self, obj: Any, indent: bool) -> bytes:
+        try:
+            return self._encode(obj, indent)
+        except TypeError as e:
+            logger.debug("%s 无法编码，改用标准库json: %s", self.encoder_name, e)
+            separators = None if indent else (',', ':')
+            return json.dumps(
+                obj, default=self.default, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+                indent=2 if indent else None, separators=separators
+            ).encode('utf-8')
+
+    @abstractmethod
+    def _encode(self, obj: Any, indent: bool) -> bytes:
+        """编码为UTF-8字节，遇到不支持的对象时抛出TypeError"""
+
+
+class OrjsonJSONProvider(_BytesJSONProvider):
+    """
+    orjson编码
+
+    日期仍按Flask的HTTP日期格式输出；非字符串键转为字符串；NaN/Infinity输出为null（标准库输出非法的NaN）。
+    """
+
+    encoder_name = 'orjson'
+
+    def __init__(self, app: Flask):
+        import orjson
+
+        super().__init__(app)
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self._orjson.loads(s)
+
+    def _encode(self, obj: Any, indent: bool) -> bytes:
+        options = self._options
+        if self.sort_keys:
+            options |= self._orjson.OPT_SORT_KEYS
+        if indent:
+            options |= self._orjson.OPT_INDENT_2
+        return self._orjson.dumps(obj, default=self.default, option=options)
+
+
+class MsgspecJSONProvider(_BytesJSONProvider):
+    """
+    msgspec编码
+
+    日期按ISO 8601格式输出（msgspec原生支持，不经过default）；NaN/Infinity输出为null。
+    """
+
+    encoder_name = 'msgspec'
+
+    def __init__(self, app: Flask):
+        import msgspec
+
+        super().__init__(app)
+        self._msgspec = msgspec
+        # order参数需要msgspec 0.18+，不支持时抛出TypeError，由调用方改用下一个编码器
+        self._sorted_encoder = msgspec.json.Encoder(enc_hook=self.default, order='sorted')
+        self._encoder = msgspec.json.Encoder(enc_hook=self.default)
+        self._decoder = msgspec.json.Decoder()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self._decoder.decode(s)
+
+    def _encode(self, obj: Any, indent: bool) -> bytes:
+        encoder = self._sorted_encoder if self.sort_keys else self._encoder
+        try:
+            data = encoder.encode(obj)
+        except (self._msgspec.EncodeError, OverflowError) as e:
+            raise TypeError(str(e)) from e
+        if indent:
+            data = self._msgspec.json.format(data, indent=2)
+        return data
+
+
+_PROVIDERS: Dict[str, Type[StdlibJSONProvider]] = {
+    'orjson': OrjsonJSONProvider,
+    'msgspec': MsgspecJSONProvider,
+}
+
+
+def create_json_provider(app: Flask, encoder: Optional[str] = None) -> StdlibJSONProvider:
+    """
+    创建应用的JSON编码器（jsonify、NDJSON流式输出和请求JSON解析都经过它）
+
+    默认中文直接以UTF-8输出，按 JSON_ENCODER 选用编码器：
+    auto（默认）时按 orjson → msgspec → 标准库 选用第一个可用的编码器；
+    为具体编码器名时只尝试该编码器，不可用时回退到标准库。
+    JSON_ENSURE_ASCII=true 时与Flask默认行为一致，转义非ASCII字符；orjson和msgspec不支持转义
+    （编码后再转义与标准库一样慢），因此固定使用标准库。
+
+    Args:
+        app: Flask应用
+        encoder: 编码器名（不指定时读取JSON_ENCODER）
+
+    Returns:
+        JSON编码器，encoder_name为实际选用的编码器
+    """
+    configured = (encoder or os.getenv('JSON_ENCODER', 'auto')).lower()
+    ensure_ascii = os.getenv('JSON_ENSURE_ASCII', 'false').lower() == 'true'
+    if configured != 'auto' and configured not in JSON_ENCODERS:
+        logger.warning(f"未知的JSON编码器 '{configured}'，使用auto")
+        configured = 'auto'
+
+    if ensure_ascii:
+        if configured not in ('auto', 'stdlib'):
+            logger.warning(f"JSON_ENSURE_ASCII=true 只有标准库支持，不使用 {configured}")
+        return StdlibJSONProvider(app, ensure_ascii=True)
+
+    candidates = JSON_ENCODERS if configured == 'auto' else (configured,)
+    for name in candidates:
+        factory = _PROVIDERS.get(name)
+        if factory is None:
+            break
+        try:
+            provider = factory(app)
+        except (ImportError, TypeError, AttributeError) as e:
+            logger.info(f"JSON编码器 {name} 不可用: {type(e).__name__}")
+            continue
+        logger.info(f"选用JSON编码器: {name}")
+        return provider
+    logger.info("选用JSON编码器: stdlib")
+    return StdlibJSONProvider(app, ensure_ascii=False)
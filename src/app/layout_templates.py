@@ -0,0 +1,194 @@
+"""版面模板缓存模块"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .csv_parser import CSVParser
+from .logger_config import logger
+from .pdf_layout import PageLayout
+
+_template_cache: Optional['LayoutTemplateCache'] = None
+_template_cache_initialized = False
+_template_cache_lock = threading.Lock()
+
+
+class LayoutTemplateCache:
+    """
+    版面模板缓存
+
+    学校每周上传的课表通常使用同一模板。以页面版面指纹（页面尺寸、星期表头位置、
+    划线分布）为键，记录上次检测出的提取方法以及页面上每个表格的区域和列分隔线
+    （一周被拆成多个表格时逐个记录），下次直接作为camelot的table_areas/columns提示使用，
+    跳过重复检测。模板保存在磁盘目录中，可在所有提取进程间共享。
+    """
+
+    # 使用模板提示提取时，accuracy允许比模板记录值低多少
+    ACCURACY_TOLERANCE = 5.0
+
+    def __init__(self, template_dir: str):
+        """
+        Args:
+            template_dir: 模板保存目录
+        """
+        self.template_dir = Path(template_dir)
+        self.template_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['LayoutTemplateCache']:
+        """根据环境变量创建模板缓存，未设置LAYOUT_TEMPLATE_DIR时返回None"""
+        template_dir = os.getenv('LAYOUT_TEMPLATE_DIR')
+        if not template_dir:
+            return None
+        return cls(template_dir)
+
+    @staticmethod
+    def fingerprint(layout: PageLayout) -> str:
+        """
+        计算页面版面指纹
+
+        Args:
+            layout: 页面版面
+
+        Returns:
+            十六进制SHA-256指纹
+        """
+        parts = [f"page:{round(layout.width)}x{round(layout.height)}"]
+
+        # 星期表头文字位置（按4pt取整，容忍细微偏移）
+        for word in layout.words():
+            for weekday in CSVParser.WEEKDAYS:
+                if weekday in word.text:
+                    parts.append(f"{weekday}@{round(word.x0 / 4)},{round(word.y0 / 4)}")
+
+        # 划线分布（按2pt取整）
+        horizontal = sorted({round(s.y0 / 2) for s in layout.segments if s.is_horizontal})
+        vertical = sorted({round(s.x0 / 2) for s in layout.segments if s.is_vertical})
+        parts.append('h:' + ','.join(map(str, horizontal)))
+        parts.append('v:' + ','.join(map(str, vertical)))
+
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """读取模板，不存在返回None"""
+        path = self._path(fingerprint)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取版面模板失败 {path}: {e}")
+            return None
+
+    def set(self, fingerprint: str, template: Dict[str, Any]) -> None:
+        """保存模板（先写临时文件再原子替换）"""
+        path = self._path(fingerprint)
+        tmp_path = self.template_dir / f".{fingerprint}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(template, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            logger.info(f"保存版面模板: {fingerprint[:12]}（方法: {template['flavor']}）")
+        except OSError as e:
+            logger.warning(f"保存版面模板失败 {path}: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    @staticmethod
+    def build_template(
+        tables: Sequence[Tuple[pd.DataFrame, dict, Dict[str, Any]]],
+        use_hints: bool = True
+    ) -> Dict[str, Any]:
+        """
+        根据一次完整检测的结果生成模板
+
+        Args:
+            tables: 页面上提取出的全部表格 [(dataframe, parsing_report, geometry), ...]，
+                    geometry为表格几何信息（flavor、bbox、cols），同一次提取的flavor相同
+            use_hints: 下次是否使用表格区域/列分隔线提示（为False时只复用提取方法）
+
+        Returns:
+            模板字典
+        """
+        return {
+            'flavor': tables[0][2]['flavor'],
+            'tables': [
+                {
+                    'bbox': geometry['bbox'],
+                    'cols': geometry['cols'],
+                    'shape': list(df.shape),
+                    'weekdays': _weekday_count(df),
+                    'accuracy': parsing_report.get('accuracy', 0.0)
+                }
+                for df, parsing_report, geometry in tables
+            ],
+            'use_hints': use_hints
+        }
+
+    @staticmethod
+    def hints(template: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        把模板转换为camelot.read_pdf参数
+
+        Returns:
+            table_areas（每个表格一个区域，以及stream方法每个表格的columns）参数字典
+        """
+        if not template.get('use_hints'):
+            return {}
+        areas = []
+        columns = []
+        for table in template['tables']:
+            x1, y1, x2, y2 = table['bbox']
+            # camelot的table_areas格式为 "左,上,右,下"（PDF坐标）
+            areas.append(f"{x1},{y2},{x2},{y1}")
+            columns.append(','.join(str(col[0]) for col in table['cols'][1:]))
+        kwargs: Dict[str, Any] = {'table_areas': areas}
+        if template['flavor'] == 'stream':
+            kwargs['columns'] = columns
+        return kwargs
+
+    @staticmethod
+    def validate(template: Dict[str, Any], tables: Sequence[Tuple[pd.DataFrame, dict, Any]]) -> bool:
+        """
+        检查按模板提取的结果是否退化
+
+        表格数和全部表格识别到的星期总数须与模板一致，每个表格的列数须一致、
+        accuracy不得明显低于模板记录值。
+        """
+        expected = template['tables']
+        if len(tables) != len(expected):
+            return False
+        weekdays = sum(_weekday_count(df) for df, _, _ in tables)
+        if weekdays != sum(table['weekdays'] for table in expected):
+            return False
+        for (df, parsing_report, _), table in zip(tables, expected):
+            if len(df) == 0 or df.shape[1] != table['shape'][1]:
+                return False
+            accuracy = parsing_report.get('accuracy', 0.0)
+            if accuracy < table['accuracy'] - LayoutTemplateCache.ACCURACY_TOLERANCE:
+                return False
+        return True
+
+    def _path(self, fingerprint: str) -> Path:
+        return self.template_dir / f"{fingerprint}.json"
+
+
+def _weekday_count(df: pd.DataFrame) -> int:
+    """表格首行识别到的星期数"""
+    return len(CSVParser._find_weekday_start_columns(df.iloc[0])) if len(df) else 0
+
+
+def get_layout_template_cache() -> Optional[LayoutTemplateCache]:
+    """获取全局版面模板缓存（首次调用时按环境变量创建），未启用时返回None"""
+    global _template_cache, _template_cache_initialized
+    with _template_cache_lock:
+        if not _template_cache_initialized:
+            _template_cache = LayoutTemplateCache.from_env()
+            _template_cache_initialized = True
+        return _template_cache
@@ -1,10 +1,73 @@
 """日志配置模块"""
+import atexit
+import copy
 import logging
+import os
+import queue
+import random
 import sys
+from contextvars import ContextVar, Token
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import List, Optional, Tuple
 
+# 日志级别（DEBUG/INFO/WARNING/ERROR）
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# 日志文件路径（不设置则只输出到控制台）
+LOG_FILE = os.getenv('LOG_FILE') or None
+# 是否由后台线程写日志（调用方只把日志记录放入队列）
+LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() == 'true'
+# DEBUG日志的抽样比例（0-1），按请求覆盖日志级别时不抽样
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1.0'))
 
-def setup_logger(name: str = 'app', log_file: str = None, level: int = logging.INFO) -> logging.Logger:
+# 当前请求覆盖的日志级别（None表示使用日志记录器自身的级别）
+_request_level: ContextVar[Optional[int]] = ContextVar('request_log_level', default=None)
+
+# 异步日志：(日志记录器, 队列handler, 实际输出的handler列表, 后台写入线程)
+_async_outputs: List[Tuple[logging.Logger, QueueHandler, List[logging.Handler], QueueListener]] = []
+
+
+class AppLogger(logging.Logger):
+    """
+    应用日志记录器
+    
+    在判断级别时先检查当前请求覆盖的日志级别；未覆盖时按记录器级别判断，
+    DEBUG日志再按抽样比例放行。未放行的日志不会创建日志记录、不会格式化消息。
+    """
+    
+    debug_sample_rate = 1.0
+    
+    def isEnabledFor(self, level: int) -> bool:
+        if self.disabled or self.manager.disable >= level:
+            return False
+        override = _request_level.get()
+        if override is not None:
+            return level >= override
+        if not super().isEnabledFor(level):
+            return False
+        if level < logging.INFO and self.debug_sample_rate < 1.0:
+            return random.random() < self.debug_sample_rate
+        return True
+
+
+class _DeferredFormatQueueHandler(QueueHandler):
+    """只在调用线程展开消息参数，时间、代码位置等格式化交给后台写入线程"""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        # 参数须在调用线程展开，避免之后被修改
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logger(
+    name: str = 'app',
+    log_file: str = None,
+    level: int = logging.INFO,
+    async_output: bool = False,
+    debug_sample_rate: float = 1.0
+) -> logging.Logger:
     """
     配置日志记录器
     
@@ -12,12 +75,15 @@ def setup_logger(name: str = 'app', log_file: str = None, level: int = logging.I
         name: 日志记录器名称
         log_file: 日志文件路径（可选）
         level: 日志级别
-        
+        async_output: 是否由后台线程写日志（控制台、文件输出不再阻塞调用方）
+        debug_sample_rate: DEBUG日志的抽样比例（0-1）
+    
     Returns:
         配置好的日志记录器
     """
-    logger = logging.getLogger(name)
+    logger = _get_app_logger(name)
     logger.setLevel(level)
+    logger.debug_sample_rate = max(0.0, min(1.0, debug_sample_rate))
     
     # 避免重复添加handler
     if logger.handlers:
@@ -29,24 +95,102 @@ def setup_logger(name: str = 'app', log_file: str = None, level: int = logging.I
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     
+    # 输出handler不设级别，由日志记录器（含按请求覆盖的级别）统一控制
+    handlers: List[logging.Handler] = []
+    
     # 控制台输出
     console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    handlers.append(console_handler)
     
     # 文件输出（如果指定）
     if log_file:
         log_path = Path(log_file)
         log_path.parent.mkdir(parents=True, exist_ok=True)
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     
+    if not async_output:
+        for handler in handlers:
+            logger.addHandler(handler)
+        return logger
+    
+    # 异步输出：调用方只把日志记录放入队列，由后台线程格式化并写入
+    log_queue: 'queue.SimpleQueue[logging.LogRecord]' = queue.SimpleQueue()
+    queue_handler = _DeferredFormatQueueHandler(log_queue)
+    listener = QueueListener(log_queue, *handlers)
+    listener.start()
+    logger.addHandler(queue_handler)
+    _async_outputs.append((logger, queue_handler, handlers, listener))
     return logger
 
 
-# 创建默认日志记录器
-logger = setup_logger('app')
+def flush_logs() -> None:
+    """写出队列中剩余的日志，并改为直接写入（进程退出时自动调用）"""
+    listeners = [listener for _, _, _, listener in _async_outputs]
+    _use_sync_output()
+    for listener in listeners:
+        listener.stop()
 
+
+def set_request_log_level(level: Optional[int]) -> Token:
+    """
+    覆盖当前请求（当前上下文）的日志级别
+    
+    Returns:
+        用于reset_request_log_level恢复的令牌
+    """
+    return _request_level.set(level)
+
+
+def reset_request_log_level(token: Token) -> None:
+    """恢复set_request_log_level之前的日志级别"""
+    _request_level.reset(token)
+
+
+def parse_log_level(name: Optional[str]) -> Optional[int]:
+    """把级别名（如 DEBUG、info）转换为日志级别，无效时返回None"""
+    if not name:
+        return None
+    level = logging.getLevelName(name.strip().upper())
+    return level if isinstance(level, int) else None
+
+
+def _get_app_logger(name: str) -> AppLogger:
+    """获取AppLogger类型的日志记录器（不影响其他库创建的日志记录器）"""
+    original_class = logging.getLoggerClass()
+    logging.setLoggerClass(AppLogger)
+    try:
+        return logging.getLogger(name)
+    finally:
+        logging.setLoggerClass(original_class)
+
+
+def _use_sync_output() -> None:
+    """
+    去掉队列handler，改为直接写入
+    
+    fork出的子进程（提取进程）中没有后台写入线程，也改为直接写入，
+    并丢弃从父进程复制来的队列，避免重复输出或进程退出时丢失日志。
+    """
+    for logger, queue_handler, handlers, _ in _async_outputs:
+        logger.removeHandler(queue_handler)
+        for handler in handlers:
+            logger.addHandler(handler)
+    _async_outputs.clear()
+
+
+atexit.register(flush_logs)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_use_sync_output)
+
+
+# 创建默认日志记录器
+logger = setup_logger(
+    'app',
+    log_file=LOG_FILE,
+    level=parse_log_level(LOG_LEVEL) or logging.INFO,
+    async_output=LOG_ASYNC,
+    debug_sample_rate=LOG_DEBUG_SAMPLE_RATE
+)
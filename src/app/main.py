@@ -2,7 +2,9 @@
 import os
 from .api import create_app
 
-app = create_app()
+# 提取进程以spawn/forkserver方式启动时会以__mp_main__的名义重新导入入口模块，此时不创建应用
+if __name__ != '__mp_main__':
+    app = create_app()
 
 if __name__ == '__main__':
     host = os.getenv('FLASK_HOST', '0.0.0.0')
@@ -1,12 +1,45 @@
 """Flask中间件和钩子"""
 import os
-from flask import g
-from typing import TYPE_CHECKING
+from flask import g, request
+from typing import TYPE_CHECKING, Optional
 
 if TYPE_CHECKING:
     from flask import Flask, Response
 
-from .logger_config import logger
+from .logger_config import logger, parse_log_level, reset_request_log_level, set_request_log_level
+
+# 是否允许客户端通过请求头覆盖本次请求的日志级别
+LOG_REQUEST_OVERRIDE = os.getenv('LOG_REQUEST_OVERRIDE', 'false').lower() == 'true'
+# 覆盖日志级别的请求头
+LOG_LEVEL_HEADER = 'X-Log-Level'
+
+
+def register_request_log_level_middleware(app: 'Flask') -> None:
+    """
+    注册按请求覆盖日志级别的钩子
+    
+    启用LOG_REQUEST_OVERRIDE后，请求头X-Log-Level（如DEBUG）只对该请求的处理线程生效，
+    该请求的DEBUG日志不抽样；提交到提取进程中的任务不受影响。
+    """
+    if not LOG_REQUEST_OVERRIDE:
+        return
+    
+    @app.before_request
+    def override_log_level() -> None:
+        """按请求头覆盖本次请求的日志级别"""
+        header = request.headers.get(LOG_LEVEL_HEADER)
+        level = parse_log_level(header)
+        if header and level is None:
+            logger.warning(f"无效的日志级别请求头 {LOG_LEVEL_HEADER}: {header}")
+        if level is not None:
+            g.log_level_token = set_request_log_level(level)
+    
+    @app.teardown_request
+    def restore_log_level(error: Optional[BaseException]) -> None:
+        """请求结束后恢复日志级别"""
+        token = g.pop('log_level_token', None)
+        if token is not None:
+            reset_request_log_level(token)
 
 
 def register_cleanup_middleware(app: 'Flask') -> None:
@@ -19,9 +52,9 @@ def register_cleanup_middleware(app: 'Flask') -> None:
             for file_path in g.temp_files_to_clean:
                 try:
                     if os.path.exists(file_path):
-                        logger.debug(f"清理临时文件: {file_path}")
+                        logger.debug("清理临时文件: %s", file_path)
                         os.remove(file_path)
-                        logger.debug(f"成功删除文件: {file_path}")
+                        logger.debug("成功删除文件: %s", file_path)
                 except Exception as e:
                     logger.warning(f"清理临时文件失败 {file_path}: {e}")
         return response
@@ -0,0 +1,236 @@
+"""PDF页面版面读取模块（文本字符与划线）"""
+from typing import List, NamedTuple, Optional, Tuple
+
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.layout import LTChar, LTCurve, LTFigure, LTPage
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+
+# 线段粗细不超过该值（pt）时视为水平/垂直划线
+LINE_THICKNESS = 2.0
+# 文本行合并/插入空格的字符间距阈值（相对字符宽度），与camelot使用的pdfminer参数一致
+CHAR_MARGIN = 1.0
+WORD_MARGIN = 0.1
+
+
+class Char(NamedTuple):
+    """文本层中的单个字符及其位置（PDF坐标，原点在左下角）"""
+    text: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+
+class Word(NamedTuple):
+    """同一行内相邻字符组成的词"""
+    text: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+
+class Segment(NamedTuple):
+    """划线（来自PDF内容流中的线段与矩形边）"""
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+    @property
+    def is_horizontal(self) -> bool:
+        return abs(self.y1 - self.y0) <= LINE_THICKNESS and self.x1 - self.x0 > LINE_THICKNESS
+
+    @property
+    def is_vertical(self) -> bool:
+        return abs(self.x1 - self.x0) <= LINE_THICKNESS and self.y1 - self.y0 > LINE_THICKNESS
+
+
+class PageLayout(NamedTuple):
+    """单个页面的版面：页面尺寸、字符和划线"""
+    page_number: int
+    width: float
+    height: float
+    chars: List[Char]
+    segments: List[Segment]
+
+    def words(self) -> List[Word]:
+        """把字符按行合并为词"""
+        return group_words(self.chars)
+
+    def text_lines(self) -> List[Word]:
+        """把字符按内容流顺序合并为文本行"""
+        return group_text_lines(self.chars)
+
+
+def read_page_layouts(pdf_path: str, pages: Optional[List[int]] = None) -> List[PageLayout]:
+    """
+    读取PDF页面的字符与划线
+
+    只执行内容流解释，不做pdfminer的文本框分组分析，因此比完整版面分析快得多。
+
+    Args:
+        pdf_path: PDF文件路径
+        pages: 页码列表（从1开始），None表示全部页面
+
+    Returns:
+        按页码顺序排列的页面版面列表
+    """
+    page_numbers = None if pages is None else {page - 1 for page in pages}
+    layouts = []
+    with open(pdf_path, 'rb') as fp:
+        resource_manager = PDFResourceManager()
+        device = PDFPageAggregator(resource_manager, laparams=None)
+        interpreter = PDFPageInterpreter(resource_manager, device)
+        for index, page in enumerate(PDFPage.get_pages(fp, pagenos=page_numbers)):
+            interpreter.process_page(page)
+            lt_page = device.get_result()
+            layouts.append(_build_page_layout(lt_page, _page_number(index, pages)))
+    return layouts
+
+
+def read_page_layout(pdf_path: str, page: int = 1) -> Optional[PageLayout]:
+    """读取单个页面的版面，页码超出范围时返回None"""
+    layouts = read_page_layouts(pdf_path, [page])
+    return layouts[0] if layouts else None
+
+
+def group_words(chars: List[Char]) -> List[Word]:
+    """
+    按行合并字符为词
+
+    Args:
+        chars: 字符列表
+
+    Returns:
+        词列表，按从上到下、从左到右排序
+    """
+    if not chars:
+        return []
+
+    # 先按行聚类（基线接近），再在行内按水平间距切分
+    lines: List[List[Char]] = []
+    for char in sorted(chars, key=lambda c: (-c.y0, c.x0)):
+        tolerance = (char.y1 - char.y0) * 0.3
+        if lines and abs(lines[-1][0].y0 - char.y0) <= tolerance:
+            lines[-1].append(char)
+        else:
+            lines.append([char])
+
+    words = []
+    for line in lines:
+        line.sort(key=lambda c: c.x0)
+        current = [line[0]]
+        for char in line[1:]:
+            gap = char.x0 - current[-1].x1
+            if gap > (char.y1 - char.y0) * 0.5:
+                words.append(_merge_chars(current))
+                current = [char]
+            else:
+                current.append(char)
+        words.append(_merge_chars(current))
+    return words
+
+
+def group_text_lines(chars: List[Char]) -> List[Word]:
+    """
+    按内容流顺序把字符合并为文本行
+
+    与pdfminer的规则一致：内容流中相邻的两个字符垂直方向重叠、且水平间距小于
+    字符宽度时属于同一行；间距超过字符宽度的十分之一时在中间插入空格。
+    相邻单元格的文字即使在页面上首尾相接，也因为分属不同的绘制指令而不会被合并。
+    """
+    lines: List[Word] = []
+    current: List[Char] = []
+    text = ''
+    for char in chars:
+        if current:
+            prev = current[-1]
+            width = max(prev.x1 - prev.x0, char.x1 - char.x0)
+            height = min(prev.y1 - prev.y0, char.y1 - char.y0)
+            v_overlap = min(prev.y1, char.y1) - max(prev.y0, char.y0)
+            gap = char.x0 - prev.x1
+            if v_overlap > height * 0.5 and -width < gap < width * CHAR_MARGIN:
+                if gap > max(width, height) * WORD_MARGIN:
+                    text += ' '
+                current.append(char)
+                text += char.text
+                continue
+            lines.append(Word(text, *_bounds(current)))
+        current = [char]
+        text = char.text
+    if current:
+        lines.append(Word(text, *_bounds(current)))
+    return lines
+
+
+def best_overlap_index(x0: float, x1: float, edges: List[float]) -> int:
+    """
+    返回与 [x0, x1] 重叠最多的区间序号
+
+    Args:
+        x0, x1: 文本的左右边界
+        edges: 升序排列的区间边界
+
+    Returns:
+        区间序号（重叠相同时取靠左的区间）
+    """
+    best_index, best_overlap = 0, float('-inf')
+    for index in range(len(edges) - 1):
+        overlap = min(x1, edges[index + 1]) - max(x0, edges[index])
+        if overlap > best_overlap:
+            best_index, best_overlap = index, overlap
+    return best_index
+
+
+def _page_number(index: int, pages: Optional[List[int]]) -> int:
+    if pages is None:
+        return index + 1
+    return sorted(pages)[index]
+
+
+def _merge_chars(chars: List[Char]) -> Word:
+    return Word(''.join(c.text for c in chars), *_bounds(chars))
+
+
+def _bounds(chars: List[Char]) -> Tuple[float, float, float, float]:
+    return (
+        min(c.x0 for c in chars),
+        min(c.y0 for c in chars),
+        max(c.x1 for c in chars),
+        max(c.y1 for c in chars)
+    )
+
+
+def _build_page_layout(lt_page: LTPage, page_number: int) -> PageLayout:
+    """从pdfminer页面对象中收集字符和划线"""
+    chars: List[Char] = []
+    segments: List[Segment] = []
+
+    def collect(container) -> None:
+        for obj in container:
+            if isinstance(obj, LTChar):
+                text = obj.get_text()
+                if text.strip():
+                    chars.append(Char(text, obj.x0, obj.y0, obj.x1, obj.y1))
+            elif isinstance(obj, LTCurve):
+                segments.extend(_curve_segments(obj))
+            elif isinstance(obj, LTFigure):
+                collect(obj)
+
+    collect(lt_page)
+    return PageLayout(page_number, lt_page.width, lt_page.height, chars, segments)
+
+
+def _curve_segments(curve: LTCurve) -> List[Segment]:
+    """把线段/矩形/曲线转换为划线：细长的视为一条线，矩形取四条边"""
+    x0, y0, x1, y1 = curve.x0, curve.y0, curve.x1, curve.y1
+    if y1 - y0 <= LINE_THICKNESS or x1 - x0 <= LINE_THICKNESS:
+        return [Segment(x0, y0, x1, y1)]
+    return [
+        Segment(x0, y0, x1, y0),
+        Segment(x0, y1, x1, y1),
+        Segment(x0, y0, x0, y1),
+        Segment(x1, y0, x1, y1),
+    ]
@@ -1,13 +1,95 @@
 """PDF转CSV模块"""
+import csv
+import hashlib
+import os
+import re
+import time
+import uuid
 import camelot
+import pandas as pd
+import pypdfium2 as pdfium
+from camelot.handlers import PDFHandler
+from camelot.utils import remove_extra, validate_input
+from concurrent.futures import FIRST_COMPLETED, wait
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from .csv_parser import CSVParser
+from .layout_templates import LayoutTemplateCache, get_layout_template_cache
 from .logger_config import logger
+from .pdf_layout import read_page_layout
+from .raster_cache import CachedImageConversion, file_sha256, get_raster_cache
+from .render_backends import get_render_backend
+from .text_layer import TextLayerParser
+from .vector_parser import VectorTableParser
+from .worker_pool import (
+    ExtractionLimitExceeded,
+    ExtractionPool,
+    check_request_deadline,
+    get_extraction_pool,
+    remaining_request_time
+)
 
 
 class PDFParser:
     """PDF表格解析器"""
     
+    # 与camelot Table.to_csv一致的CSV写出参数
+    CSV_WRITE_KWARGS = {'encoding': 'utf-8', 'index': False, 'header': False, 'quoting': csv.QUOTE_ALL}
+    
+    # 提取模式：sequential（先lattice后stream）或 race（并行竞速）
+    EXTRACTION_MODE = os.getenv('PDF_EXTRACTION_MODE', 'sequential')
+    # 竞速胜者选择策略：prefer（按优先顺序）或 score（按解析报告评分）
+    RACE_POLICY = os.getenv('PDF_RACE_POLICY', 'prefer')
+    # 竞速总超时（秒），0表示不限制
+    RACE_TIMEOUT = float(os.getenv('PDF_RACE_TIMEOUT', '0'))
+    # 方法优先顺序
+    FLAVOR_PREFERENCE = ('lattice', 'stream')
+    # 默认提取的页码（camelot页码格式，如 '1'、'1,3-5'、'2-end'、'all'）
+    DEFAULT_PAGES = os.getenv('PDF_PAGES', '1')
+    # 页码格式校验
+    PAGES_PATTERN = re.compile(r'^(all|\d+(-(\d+|end))?(,\d+(-(\d+|end))?)*)$')
+    # 表格提取引擎：camelot（渲染页面后识别表格线）、vector（直接读取PDF矢量划线）
+    # 或 text（按星期表头和班级名从文本层构建课表）
+    ENGINES = ('camelot', 'vector', 'text')
+    DEFAULT_ENGINE = os.getenv('PDF_ENGINE', 'camelot')
+    # 参数搜索：提取结果accuracy低于下限时，在提取进程池中并行尝试PARAMETER_GRID中的参数组合
+    PARAMETER_SEARCH = os.getenv('PDF_PARAMETER_SEARCH', 'false').lower() == 'true'
+    PARAMETER_SEARCH_MIN_ACCURACY = float(os.getenv('PDF_PARAMETER_SEARCH_MIN_ACCURACY', '80'))
+    # 参数搜索的延迟预算（秒），超出后在已完成的候选中选出最优者
+    PARAMETER_SEARCH_BUDGET = float(os.getenv('PDF_PARAMETER_SEARCH_BUDGET', '20'))
+    # 表格区域裁剪：camelot提取前先从文本层定位课表区域，只渲染、分析该区域（启用版面模板缓存时裁剪页同样按模板提取）
+    CROP_TABLE_REGION = os.getenv('PDF_CROP_TABLE_REGION', 'false').lower() == 'true'
+    PARAMETER_GRID = (
+        ('lattice', {'line_scale': 40}),
+        ('lattice', {'line_scale': 60}),
+        ('lattice', {'process_background': True}),
+        ('stream', {}),
+        ('stream', {'row_tol': 10}),
+        ('stream', {'edge_tol': 500}),
+    )
+    
+    @staticmethod
+    def output_settings() -> Dict[str, Any]:
+        """
+        影响提取结果的配置（作为结果缓存键的一部分，任一项变化后不再命中之前的结果）
+        
+        Returns:
+            配置字典
+        """
+        return {
+            'extraction_mode': PDFParser.EXTRACTION_MODE,
+            'race_policy': PDFParser.RACE_POLICY,
+            'race_timeout': PDFParser.RACE_TIMEOUT,
+            'parameter_search': PDFParser.PARAMETER_SEARCH,
+            'parameter_search_min_accuracy': PDFParser.PARAMETER_SEARCH_MIN_ACCURACY,
+            'parameter_search_budget': PDFParser.PARAMETER_SEARCH_BUDGET,
+            'parameter_grid': PDFParser.PARAMETER_GRID,
+            'crop_table_region': PDFParser.CROP_TABLE_REGION,
+            'layout_template_dir': os.getenv('LAYOUT_TEMPLATE_DIR'),
+            'text_layer_min_confidence': TextLayerParser.MIN_CONFIDENCE,
+            'camelot_version': camelot.__version__
+        }
+    
     @staticmethod
     def extract_table(pdf_path: str) -> Tuple[Optional[str], Optional[dict]]:
         """
@@ -19,47 +101,764 @@ class PDFParser:
         Returns:
             (csv_path, parsing_report) 或 (None, None) 如果失败
         """
+        df, parsing_report = PDFParser.extract_dataframe(pdf_path)
+        if df is None:
+            return None, None
+        
+        try:
+            # 保存为CSV
+            csv_path = pdf_path.replace('.pdf', '_table.csv')
+            logger.info(f"保存CSV文件到: {csv_path}")
+            df.to_csv(csv_path, **PDFParser.CSV_WRITE_KWARGS)
+            
+            csv_size = Path(csv_path).stat().st_size
+            logger.info(f"CSV文件大小: {csv_size / 1024:.2f} KB")
+            logger.info(f"PDF转CSV成功完成")
+            
+            return csv_path, parsing_report
+            
+        except Exception as e:
+            logger.error(f"CSV保存失败: {e}", exc_info=True)
+            return None, None
+    
+    @staticmethod
+    def extract_dataframe(
+        pdf_path: str,
+        mode: Optional[str] = None,
+        page: int = 1,
+        engine: Optional[str] = None
+    ) -> Tuple[Optional[pd.DataFrame], Optional[dict]]:
+        """
+        从PDF的单个页面提取第一个表格，直接返回camelot的DataFrame（不写CSV文件）
+        
+        参数含义同extract_page_tables。
+        
+        Returns:
+            (dataframe, parsing_report) 或 (None, None) 如果失败
+            
+        Raises:
+            ExtractionLimitExceeded: 提取超时或内存超出上限（提取进程已被终止）
+        """
+        tables = PDFParser.extract_page_tables(pdf_path, mode, page, engine)
+        if not tables:
+            return None, None
+        return tables[0]
+    
+    @staticmethod
+    def extract_page_tables(
+        pdf_path: str,
+        mode: Optional[str] = None,
+        page: int = 1,
+        engine: Optional[str] = None
+    ) -> List[Tuple[pd.DataFrame, dict]]:
+        """
+        从PDF的单个页面提取全部表格（如一周被拆成周一至周三、周四至周五两个表格）
+        
+        Args:
+            pdf_path: PDF文件路径
+            mode: 提取模式，'sequential'（先lattice，无结果再stream）或
+                  'race'（lattice与stream在提取进程池中并行执行），默认取环境变量配置
+            page: 页码（从1开始）
+            engine: 提取引擎，'camelot'、'vector' 或 'text'（后两者未找到表格时回退到camelot，
+                    此时忽略mode），默认取环境变量配置
+            
+        Returns:
+            按camelot顺序排列的 [(dataframe, parsing_report), ...]，失败时返回空列表
+            
+        Raises:
+            ExtractionLimitExceeded: 提取超时或内存超出上限（提取进程已被终止）
+        """
         logger.info(f"开始解析PDF文件: {pdf_path}")
         
         if not Path(pdf_path).exists():
             logger.error(f"PDF文件不存在: {pdf_path}")
-            return None, None
+            return []
         
         file_size = Path(pdf_path).stat().st_size
         logger.info(f"PDF文件大小: {file_size / 1024:.2f} KB")
         
+        mode = mode or PDFParser.EXTRACTION_MODE
+        engine = engine or PDFParser.DEFAULT_ENGINE
+        
         try:
-            # 尝试lattice方法（适合有明确网格线的表格）
-            logger.info("尝试使用lattice方法提取表格...")
-            tables = camelot.read_pdf(pdf_path, flavor='lattice', pages='1')
-            logger.info(f"Lattice方法找到 {len(tables)} 个表格")
-            
-            # 如果lattice失败，尝试stream方法
-            if len(tables) == 0:
-                logger.warning("Lattice方法未找到表格，尝试stream方法...")
-                tables = camelot.read_pdf(pdf_path, flavor='stream', pages='1')
-                logger.info(f"Stream方法找到 {len(tables)} 个表格")
-            
-            if len(tables) == 0:
+            if engine != 'camelot':
+                tables = PDFParser._run_extraction(_page_worker(engine), pdf_path, page)
+            elif mode == 'race':
+                tables = PDFParser._race_flavors(pdf_path, pages=str(page))
+            else:
+                tables = PDFParser._run_extraction(_extract_page_worker, pdf_path, page)
+            
+            tables = PDFParser._improve_low_accuracy(pdf_path, page, tables)
+            if not tables:
                 logger.error("未能从PDF中提取到表格")
-                return None, None
+                return []
             
-            table = tables[0]
-            parsing_report = table.parsing_report
-            logger.info(f"表格形状: {table.shape}, 解析报告: {parsing_report}")
+            for df, parsing_report in tables:
+                logger.info(f"表格形状: {df.shape}, 解析报告: {parsing_report}")
             
-            # 保存为CSV
-            csv_path = pdf_path.replace('.pdf', '_table.csv')
-            logger.info(f"保存CSV文件到: {csv_path}")
-            table.to_csv(csv_path)
+            return tables
             
-            csv_size = Path(csv_path).stat().st_size
-            logger.info(f"CSV文件大小: {csv_size / 1024:.2f} KB")
-            logger.info(f"PDF转CSV成功完成")
+        except ExtractionLimitExceeded as e:
+            logger.error(f"PDF提取超出资源限制: {e}")
+            raise
+        except Exception as e:
+            logger.error(f"PDF解析失败: {e}", exc_info=True)
+            return []
+    
+    @staticmethod
+    def extract_pages(
+        pdf_path: str,
+        pages: Optional[str] = None,
+        mode: Optional[str] = None,
+        engine: Optional[str] = None
+    ) -> List[Tuple[int, pd.DataFrame, dict]]:
+        """
+        从PDF的多个页面提取全部表格，多页时在提取进程池中按页并行提取
+        
+        Args:
+            pdf_path: PDF文件路径
+            pages: 页码（camelot页码格式），默认取环境变量配置
+            mode: 提取模式（见extract_page_tables），多页时每页分别按该模式提取
+            engine: 提取引擎，'camelot'、'vector' 或 'text'，默认取环境变量配置
             
-            return csv_path, parsing_report
+        Returns:
+            按页码升序（同一页内按camelot顺序）排列的 [(page, dataframe, parsing_report), ...]，
+            未找到表格的页面会被跳过，全部失败时返回空列表
             
+        Raises:
+            ExtractionLimitExceeded: 任一页提取超时或内存超出上限
+        """
+        pages = pages or PDFParser.DEFAULT_PAGES
+        
+        if not Path(pdf_path).exists():
+            logger.error(f"PDF文件不存在: {pdf_path}")
+            return []
+        
+        try:
+            page_numbers = PDFHandler(pdf_path)._get_pages(pages)
         except Exception as e:
-            logger.error(f"PDF解析失败: {e}", exc_info=True)
-            return None, None
+            logger.error(f"解析页码失败 '{pages}': {e}", exc_info=True)
+            return []
+        logger.info(f"待提取页码: {page_numbers}")
+        
+        if len(page_numbers) == 1:
+            page = page_numbers[0]
+            tables = PDFParser.extract_page_tables(pdf_path, mode, page, engine)
+            return [(page, df, parsing_report) for df, parsing_report in tables]
+        
+        return PDFParser._extract_pages_parallel(pdf_path, page_numbers, mode, engine)
+    
+    @staticmethod
+    def is_valid_pages(pages: str) -> bool:
+        """检查页码参数格式是否合法"""
+        return bool(PDFParser.PAGES_PATTERN.match(pages.replace(' ', '')))
+    
+    @staticmethod
+    def is_valid_engine(engine: str) -> bool:
+        """检查提取引擎参数是否合法"""
+        return engine in PDFParser.ENGINES
+    
+    @staticmethod
+    def _extract_pages_parallel(
+        pdf_path: str,
+        page_numbers: List[int],
+        mode: Optional[str] = None,
+        engine: Optional[str] = None
+    ) -> List[Tuple[int, pd.DataFrame, dict]]:
+        """
+        在提取进程池中按页并行提取，结果按页码顺序收集，与完成先后无关
+        
+        race模式下一次为全部页面提交lattice和stream任务，再逐页选出胜者（与单页竞速相同）。
+        """
+        engine = engine or PDFParser.DEFAULT_ENGINE
+        race = engine == 'camelot' and (mode or PDFParser.EXTRACTION_MODE) == 'race'
+        worker = _page_worker(engine)
+        pool = get_extraction_pool()
+        jobs: List[Dict[str, Any]] = []
+        if pool is None:
+            logger.info(f"未启用提取进程池，逐页提取 {len(page_numbers)} 页")
+            if race:
+                logger.warning("未启用提取进程池，竞速模式退化为顺序提取")
+        elif race:
+            logger.info(f"按页并行竞速提取 {len(page_numbers)} 页，进程池大小: {pool.size}")
+            jobs = [PDFParser._submit_flavors(pool, pdf_path, str(page)) for page in page_numbers]
+        else:
+            logger.info(f"按页并行提取 {len(page_numbers)} 页，进程池大小: {pool.size}")
+            jobs = [{engine: pool.submit(worker, pdf_path, page)} for page in page_numbers]
+        
+        results = []
+        for index, page in enumerate(page_numbers):
+            try:
+                if pool is None:
+                    check_request_deadline()
+                    tables = worker(pdf_path, page)
+                elif race:
+                    tables = PDFParser._race_flavors(pdf_path, str(page), jobs=jobs[index])
+                else:
+                    tables = jobs[index][engine].result()
+            except ExtractionLimitExceeded as e:
+                # 一页超出资源限制即整体失败，不再等待其余页面
+                logger.error(f"第{page}页提取超出资源限制: {e}")
+                for page_jobs in jobs[index + 1:]:
+                    for job in page_jobs.values():
+                        job.cancel()
+                raise
+            except Exception as e:
+                logger.warning(f"第{page}页提取失败: {e}")
+                continue
+            
+            tables = PDFParser._improve_low_accuracy(pdf_path, page, tables)
+            if not tables:
+                logger.warning(f"第{page}页未找到表格")
+                continue
+            
+            for df, parsing_report in tables:
+                logger.info(f"第{page}页表格形状: {df.shape}, 解析报告: {parsing_report}")
+                results.append((page, df, parsing_report))
+        
+        return results
+    
+    @staticmethod
+    def _run_extraction(fn: Callable[..., Any], *args: Any) -> Any:
+        """在提取进程池中执行任务，未启用进程池时在当前进程内直接执行"""
+        pool = get_extraction_pool()
+        if pool is None:
+            check_request_deadline()
+            return fn(*args)
+        return pool.run(fn, *args)
+    
+    @staticmethod
+    def _read_sequential(pdf_path: str, pages: str) -> List[Tuple[pd.DataFrame, dict]]:
+        """先尝试lattice，找不到表格时再尝试stream"""
+        return _strip_geometry(PDFParser._read_sequential_detailed(pdf_path, pages))
+    
+    @staticmethod
+    def _read_sequential_detailed(
+        pdf_path: str,
+        pages: str,
+        handler: Optional['SharedLayoutHandler'] = None
+    ) -> List[Tuple[pd.DataFrame, dict, dict]]:
+        """同_read_sequential，额外返回表格几何信息；lattice与stream共用同一份页面版面分析结果"""
+        if handler is None:
+            with SharedLayoutHandler(pdf_path, pages=pages) as handler:
+                return PDFParser._read_sequential_detailed(pdf_path, pages, handler)
+        
+        # 尝试lattice方法（适合有明确网格线的表格）
+        logger.info("尝试使用lattice方法提取表格...")
+        tables = _read_tables_detailed(pdf_path, 'lattice', pages, handler=handler)
+        logger.info(f"Lattice方法找到 {len(tables)} 个表格")
+        
+        # 如果lattice失败，尝试stream方法
+        if len(tables) == 0:
+            logger.warning("Lattice方法未找到表格，尝试stream方法...")
+            tables = _read_tables_detailed(pdf_path, 'stream', pages, handler=handler)
+            logger.info(f"Stream方法找到 {len(tables)} 个表格")
+        
+        return tables
+    
+    @staticmethod
+    def _read_cropped(
+        pdf_path: str,
+        page: int,
+        template_cache: Optional[LayoutTemplateCache] = None
+    ) -> List[Tuple[pd.DataFrame, dict]]:
+        """
+        只对课表区域提取单页表格
+        
+        从文本层定位课表区域（星期表头到最后一个班级行），把该页裁剪为只含该区域的
+        单页临时PDF后按先lattice后stream提取，页面标题、徽标、页脚不再参与渲染和OpenCV分析。
+        裁剪页与整页一样经SharedLayoutHandler读取：临时PDF每次生成的字节不同，渲染缓存改以
+        原文件内容SHA-256和裁剪区域为键；传入template_cache时按裁剪页的版面指纹使用版面模板。
+        
+        Returns:
+            [(dataframe, parsing_report), ...]（parsing_report中的页码为原页码），
+            无法定位课表区域、页面有旋转或裁剪后未找到表格时返回空列表
+        """
+        layout = read_page_layout(pdf_path, page)
+        bbox = TextLayerParser.locate_table(layout) if layout else None
+        if bbox is None:
+            logger.info(f"第{page}页未能从文本层定位课表区域，不裁剪")
+            return []
+        
+        cropped_path = os.path.join(os.path.dirname(pdf_path), f".{uuid.uuid4().hex}.crop.pdf")
+        try:
+            if not _write_cropped_page(pdf_path, page, bbox, cropped_path):
+                logger.info(f"第{page}页有旋转，不裁剪")
+                return []
+            area = (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) / (layout.width * layout.height)
+            logger.info(f"第{page}页裁剪到课表区域 {tuple(round(v, 1) for v in bbox)}（页面面积的 {area:.0%}）")
+            content_hash = _cropped_content_hash(pdf_path, page, bbox) if get_raster_cache() else None
+            if template_cache is not None:
+                tables = PDFParser._read_with_template(cropped_path, 1, template_cache, content_hash)
+            else:
+                with SharedLayoutHandler(cropped_path, pages='1', content_hash=content_hash) as handler:
+                    tables = _strip_geometry(PDFParser._read_sequential_detailed(cropped_path, '1', handler))
+        finally:
+            if os.path.exists(cropped_path):
+                os.remove(cropped_path)
+        
+        if not tables:
+            logger.warning(f"第{page}页裁剪后未找到表格")
+        return [(df, {**parsing_report, 'page': page}) for df, parsing_report in tables]
+    
+    @staticmethod
+    def _read_with_template(
+        pdf_path: str,
+        page: int,
+        template_cache: LayoutTemplateCache,
+        content_hash: Optional[str] = None
+    ) -> List[Tuple[pd.DataFrame, dict]]:
+        """
+        按版面模板提取单页表格
+        
+        命中模板时直接使用记录的提取方法和每个表格的区域提示；结果未通过校验
+        （表格数、星期总数、列数或accuracy与模板不符）时回退到完整检测，并用新结果更新模板。
+        content_hash为渲染缓存使用的文件内容键（不指定时按文件内容计算）。
+        """
+        pages = str(page)
+        layout = read_page_layout(pdf_path, page)
+        fingerprint = LayoutTemplateCache.fingerprint(layout) if layout else None
+        template = template_cache.get(fingerprint) if fingerprint else None
+        
+        with SharedLayoutHandler(pdf_path, pages=pages, content_hash=content_hash) as handler:
+            if template is not None:
+                hints = LayoutTemplateCache.hints(template)
+                logger.info(f"命中版面模板 {fingerprint[:12]}，方法: {template['flavor']}，"
+                            f"区域提示: {len(hints['table_areas']) if hints else 0} 个表格")
+                tables = _read_tables_detailed(pdf_path, template['flavor'], pages, handler=handler, **hints)
+                if tables and LayoutTemplateCache.validate(template, tables):
+                    return _strip_geometry(tables)
+                logger.warning("按版面模板提取的结果未通过校验，回退到完整检测")
+            
+            tables = PDFParser._read_sequential_detailed(pdf_path, pages, handler)
+        
+        if fingerprint and tables:
+            # 同一方法的模板提示已验证无效时，之后只复用提取方法
+            use_hints = template is None or template['flavor'] != tables[0][2]['flavor']
+            template_cache.set(fingerprint, LayoutTemplateCache.build_template(tables, use_hints))
+        return _strip_geometry(tables)
+    
+    @staticmethod
+    def _race_flavors(
+        pdf_path: str,
+        pages: str,
+        policy: Optional[str] = None,
+        timeout: Optional[float] = None,
+        jobs: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[pd.DataFrame, dict]]:
+        """
+        在提取进程池中并行执行lattice和stream，选出胜者后取消其余任务
+        
+        Args:
+            pdf_path: PDF文件路径
+            pages: 页码
+            policy: 'prefer' 按FLAVOR_PREFERENCE顺序，优先的方法一旦找到表格即胜出；
+                    'score' 等待全部完成，按accuracy高、whitespace低选出胜者
+            timeout: 竞速总超时（秒，从开始等待时计），超时后仍在运行的任务将被取消
+            jobs: 已提交的各方法任务（多页竞速时预先为全部页面提交，见_submit_flavors），
+                  不指定时在此提交
+            
+        Returns:
+            胜出方法提取到的表格列表，均失败时返回空列表
+        """
+        policy = policy or PDFParser.RACE_POLICY
+        timeout = timeout if timeout is not None else PDFParser.RACE_TIMEOUT
+        flavors = PDFParser.FLAVOR_PREFERENCE
+        
+        if jobs is None:
+            pool = get_extraction_pool()
+            if pool is None:
+                logger.warning("未启用提取进程池，竞速模式退化为顺序提取")
+                return PDFParser._read_sequential(pdf_path, pages)
+            jobs = PDFParser._submit_flavors(pool, pdf_path, pages)
+        
+        logger.info(f"并行竞速提取表格（页码 {pages}）: {', '.join(flavors)}（策略: {policy}）")
+        pending = {job.future: flavor for flavor, job in jobs.items()}
+        
+        results: Dict[str, List[Tuple[pd.DataFrame, dict]]] = {}
+        deadline = time.monotonic() + timeout if timeout else None
+        winner = None
+        limit_error: Optional[ExtractionLimitExceeded] = None
+        
+        try:
+            while pending:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    logger.warning(f"竞速提取超时（{timeout}秒），未完成: {sorted(pending.values())}")
+                    break
+                
+                for future in done:
+                    flavor = pending.pop(future)
+                    try:
+                        tables = future.result()
+                        logger.info(f"{flavor}方法完成，找到 {len(tables)} 个表格")
+                    except ExtractionLimitExceeded as e:
+                        logger.warning(f"{flavor}方法超出资源限制: {e}")
+                        limit_error = e
+                        tables = []
+                    except Exception as e:
+                        logger.warning(f"{flavor}方法提取失败: {e}")
+                        tables = []
+                    results[flavor] = tables
+                
+                winner = PDFParser._pick_race_winner(results, flavors, policy)
+                if winner:
+                    break
+            
+            if winner is None:
+                # 超时或全部完成：在已有结果中选出最优者
+                winner = PDFParser._pick_race_winner(results, flavors, 'score', final=True)
+        finally:
+            for flavor, job in jobs.items():
+                if not job.done():
+                    logger.info(f"取消{flavor}方法任务")
+                    job.cancel()
+        
+        if winner is None:
+            if limit_error is not None:
+                raise limit_error
+            return []
+        
+        logger.info(f"竞速胜出方法: {winner}")
+        return results[winner]
+    
+    @staticmethod
+    def _submit_flavors(pool: ExtractionPool, pdf_path: str, pages: str) -> Dict[str, Any]:
+        """向提取进程池提交竞速的各方法任务，返回 {方法: 任务}"""
+        return {flavor: pool.submit(_read_tables, pdf_path, flavor, pages) for flavor in PDFParser.FLAVOR_PREFERENCE}
+    
+    @staticmethod
+    def _pick_race_winner(
+        results: Dict[str, List[Tuple[pd.DataFrame, dict]]],
+        flavors: Sequence[str],
+        policy: str,
+        final: bool = False
+    ) -> Optional[str]:
+        """
+        根据已完成的结果判断胜者
+        
+        Args:
+            results: 已完成方法的结果
+            flavors: 按优先级排序的方法列表
+            policy: 'prefer' 或 'score'
+            final: 是否已无更多结果可等待
+            
+        Returns:
+            胜出方法名，尚无法确定时返回None
+        """
+        if policy == 'prefer':
+            for flavor in flavors:
+                if flavor not in results:
+                    # 优先级更高的方法尚未完成，继续等待
+                    return None
+                if results[flavor]:
+                    return flavor
+            return None
+        
+        if not final and len(results) < len(flavors):
+            return None
+        
+        candidates = [flavor for flavor in flavors if results.get(flavor)]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda flavor: PDFParser._score_report(results[flavor][0][1]))
+    
+    @staticmethod
+    def _score_report(parsing_report: dict) -> float:
+        """解析报告评分：accuracy越高越好，whitespace（空白单元格占比）越低越好"""
+        return parsing_report.get('accuracy', 0.0) - parsing_report.get('whitespace', 100.0)
+    
+    @staticmethod
+    def _improve_low_accuracy(
+        pdf_path: str,
+        page: int,
+        tables: List[Tuple[pd.DataFrame, dict]]
+    ) -> List[Tuple[pd.DataFrame, dict]]:
+        """启用参数搜索且页面提取结果accuracy低于下限（或未找到表格）时执行参数搜索"""
+        if not PDFParser.PARAMETER_SEARCH:
+            return tables
+        accuracy = min((parsing_report.get('accuracy', 0.0) for _, parsing_report in tables), default=0.0)
+        if accuracy >= PDFParser.PARAMETER_SEARCH_MIN_ACCURACY:
+            return tables
+        logger.warning(f"第{page}页提取accuracy为 {accuracy}，低于 {PDFParser.PARAMETER_SEARCH_MIN_ACCURACY}，开始参数搜索")
+        return PDFParser._search_parameters(pdf_path, page, tables)
+    
+    @staticmethod
+    def _search_parameters(
+        pdf_path: str,
+        page: int,
+        baseline: List[Tuple[pd.DataFrame, dict]],
+        budget: Optional[float] = None
+    ) -> List[Tuple[pd.DataFrame, dict]]:
+        """
+        在提取进程池中并行尝试PARAMETER_GRID中的参数组合，返回最优的一组表格
+        
+        候选与常规提取一样经SharedLayoutHandler读取：按不同参数重试时复用已缓存的页面渲染图像
+        （进程内的内存层、跨提取进程的磁盘层），未启用进程池时各候选还共用同一份版面分析结果。
+        每个候选按 accuracy + 课表结构检查（识别到的星期数、班级数）评分，原提取结果也参与评选，
+        得分相同时保留原结果。超出延迟预算（或请求剩余的提取时间）时取消未完成的候选，在已完成的候选中评选。
+        
+        Args:
+            pdf_path: PDF文件路径
+            page: 页码
+            baseline: 原提取结果
+            budget: 延迟预算（秒），默认取环境变量配置
+            
+        Returns:
+            最优候选的 [(dataframe, parsing_report), ...]；选中搜索候选时parsing_report附带parameters
+        """
+        budget = budget if budget is not None else PDFParser.PARAMETER_SEARCH_BUDGET
+        remaining = remaining_request_time()
+        if remaining is not None:
+            budget = max(0.0, min(budget, remaining))
+        grid = PDFParser.PARAMETER_GRID
+        deadline = time.monotonic() + budget
+        candidates: List[Tuple[Optional[dict], List[Tuple[pd.DataFrame, dict]]]] = [(None, baseline)]
+        
+        def collect(flavor: str, params: dict, tables: List[Tuple[pd.DataFrame, dict]]) -> None:
+            logger.info(f"参数候选 {flavor} {params}: 找到 {len(tables)} 个表格")
+            if tables:
+                candidates.append(({'flavor': flavor, **params}, tables))
+        
+        pool = get_extraction_pool()
+        if pool is None:
+            logger.info(f"未启用提取进程池，逐个尝试 {len(grid)} 组参数（预算 {budget}秒）")
+            with SharedLayoutHandler(pdf_path, pages=str(page)) as handler:
+                for flavor, params in grid:
+                    if time.monotonic() >= deadline:
+                        logger.warning("参数搜索超出延迟预算，停止尝试其余参数")
+                        break
+                    try:
+                        tables = _read_tables_detailed(pdf_path, flavor, str(page), handler=handler, **params)
+                        collect(flavor, params, _strip_geometry(tables))
+                    except Exception as e:
+                        logger.warning(f"参数候选 {flavor} {params} 提取失败: {e}")
+        else:
+            logger.info(f"并行尝试 {len(grid)} 组参数（预算 {budget}秒），进程池大小: {pool.size}")
+            jobs = [(flavor, params, pool.submit(_read_tables_with_params, pdf_path, flavor, str(page), params))
+                    for flavor, params in grid]
+            try:
+                done, _ = wait([job.future for _, _, job in jobs], timeout=budget)
+                if len(done) < len(jobs):
+                    logger.warning(f"参数搜索超出延迟预算（{budget}秒），完成 {len(done)}/{len(jobs)} 组")
+                for flavor, params, job in jobs:
+                    if job.future not in done:
+                        continue
+                    try:
+                        collect(flavor, params, job.future.result())
+                    except Exception as e:
+                        logger.warning(f"参数候选 {flavor} {params} 提取失败: {e}")
+            finally:
+                for _, _, job in jobs:
+                    if not job.done():
+                        job.cancel()
+        
+        structures = [CSVParser.check_structure([df for df, _ in tables]) for _, tables in candidates]
+        max_classes = max((structure['classes'] for structure in structures), default=0) or 1
+        
+        def score(index: int) -> float:
+            tables = candidates[index][1]
+            if not tables:
+                return float('-inf')
+            accuracy = sum(report.get('accuracy', 0.0) for _, report in tables) / len(tables)
+            structure = structures[index]
+            return (accuracy
+                    + 100.0 * structure['weekdays'] / len(CSVParser.WEEKDAYS)
+                    + 100.0 * structure['classes'] / max_classes)
+        
+        best = max(range(len(candidates)), key=score)
+        parameters, tables = candidates[best]
+        if parameters is None:
+            logger.info(f"参数搜索未找到更优结果，保留原提取结果（候选 {len(candidates) - 1} 组）")
+            return baseline
+        logger.info(f"参数搜索选用 {parameters}，星期 {structures[best]['weekdays']}，班级 {structures[best]['classes']}")
+        return [(df, {**parsing_report, 'parameters': parameters}) for df, parsing_report in tables]
+
+
+def _camelot_internals_supported() -> bool:
+    """
+    是否可以使用camelot的私有接口
+    
+    SharedLayoutHandler和CachedImageConversion依赖camelot 2.0的内部实现（PDFHandler._parse_page、
+    _get_layout返回值最后一项为旋转方向、lattice解析器的icb.to_array），只在已验证的2.0.x版本上启用，
+    其他版本退化为camelot的默认行为（不复用版面分析结果和页面渲染图像）。
+    """
+    version = tuple(int(part) for part in re.findall(r'\d+', camelot.__version__)[:2])
+    supported = version == (2, 0) and hasattr(PDFHandler, '_parse_page') and hasattr(PDFHandler, '_get_layout')
+    if not supported:
+        logger.warning(f"camelot {camelot.__version__} 未经验证（需要2.0.x），不复用版面分析结果和页面渲染图像")
+    return supported
+
+
+CAMELOT_INTERNALS_SUPPORTED = _camelot_internals_supported()
+
+
+class SharedLayoutHandler(PDFHandler):
+    """
+    在多次解析之间共享页面版面分析结果的camelot PDFHandler
+    
+    camelot每次read_pdf都会重新打开PDF并对每页重新执行pdfminer版面分析
+    （文本行、字符框等），在lattice失败回退stream、或按不同参数重试时这部分
+    工作完全重复。该类按页码和版面参数缓存分析结果，同一个实例上的后续解析直接复用。
+    需要纠正旋转的页面不缓存（camelot会修改页面的变换矩阵后重新分析）。
+    启用渲染缓存时，lattice的页面渲染图像按文件内容和页码缓存，跨实例、跨请求复用；
+    content_hash可指定代替文件内容SHA-256的缓存键（如每次生成的字节不同的裁剪临时PDF）。
+    依赖camelot私有接口的部分只在CAMELOT_INTERNALS_SUPPORTED时启用。
+    """
+    
+    def __init__(self, *args: Any, content_hash: Optional[str] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._layouts: Dict[Tuple[int, str], Tuple[Any, ...]] = {}
+        self._content_hash = content_hash
+    
+    def _parse_page(self, page: Any, parser: Any, *args: Any, **kwargs: Any) -> Any:
+        if not CAMELOT_INTERNALS_SUPPORTED:
+            return super()._parse_page(page, parser, *args, **kwargs)
+        raster_cache = get_raster_cache()
+        conversion = getattr(parser, 'icb', None)
+        if raster_cache is not None and conversion is not None and not isinstance(conversion, CachedImageConversion):
+            if self._content_hash is None:
+                self._content_hash = file_sha256(self.filepath)
+            parser.icb = CachedImageConversion(
+                conversion, raster_cache, self._content_hash, getattr(parser, 'resolution', 300)
+            )
+        return super()._parse_page(page, parser, *args, **kwargs)
+    
+    def _get_layout(self, page: Any, **layout_kwargs: Any) -> Tuple[Any, ...]:
+        if not CAMELOT_INTERNALS_SUPPORTED:
+            return super()._get_layout(page, **layout_kwargs)
+        key = (page.page_idx, repr(sorted(layout_kwargs.items())))
+        cached = self._layouts.get(key)
+        if cached is not None:
+            logger.debug("复用第%d页的版面分析结果", page.page_idx + 1)
+            return cached
+        result = super()._get_layout(page, **layout_kwargs)
+        rotation = result[-1]
+        if not rotation:
+            self._layouts[key] = result
+        return result
+
+
+def _read_tables(pdf_path: str, flavor: str, pages: str, **kwargs: Any) -> List[Tuple[pd.DataFrame, dict]]:
+    """用指定方法读取PDF表格，返回 [(dataframe, parsing_report), ...]"""
+    return _strip_geometry(_read_tables_detailed(pdf_path, flavor, pages, **kwargs))
+
+
+def _read_tables_detailed(
+    pdf_path: str,
+    flavor: str,
+    pages: str,
+    handler: Optional[SharedLayoutHandler] = None,
+    **kwargs: Any
+) -> List[Tuple[pd.DataFrame, dict, dict]]:
+    """
+    用指定方法读取PDF表格，返回 [(dataframe, parsing_report, geometry), ...]
+    
+    传入handler时在该handler上解析（复用其已有的版面分析结果），pages须与handler一致。
+    lattice方法使用启动时选定的渲染后端。
+    """
+    if flavor == 'lattice':
+        backend = get_render_backend()
+        if backend:
+            kwargs.setdefault('backend', backend)
+    if handler is None:
+        tables = camelot.read_pdf(pdf_path, flavor=flavor, pages=pages, **kwargs)
+    else:
+        validate_input(kwargs, flavor=flavor)
+        tables = handler.parse(flavor=flavor, **remove_extra(kwargs, flavor=flavor))
+    return [
+        (
+            table.df,
+            table.parsing_report,
+            {
+                'flavor': flavor,
+                'bbox': [float(v) for v in table._bbox],
+                'cols': [[float(x0), float(x1)] for x0, x1 in table.cols]
+            }
+        )
+        for table in tables
+    ]
+
+
+def _read_tables_with_params(pdf_path: str, flavor: str, pages: str, params: dict) -> List[Tuple[pd.DataFrame, dict]]:
+    """提取进程任务：按指定方法和参数读取PDF表格（参数搜索的候选，经SharedLayoutHandler复用渲染缓存）"""
+    with SharedLayoutHandler(pdf_path, pages=pages) as handler:
+        return _strip_geometry(_read_tables_detailed(pdf_path, flavor, pages, handler=handler, **params))
+
+
+def _strip_geometry(tables: List[Tuple[pd.DataFrame, dict, dict]]) -> List[Tuple[pd.DataFrame, dict]]:
+    return [(df, parsing_report) for df, parsing_report, _ in tables]
+
+
+def _cropped_content_hash(pdf_path: str, page: int, bbox: Tuple[float, float, float, float]) -> str:
+    """裁剪页的渲染缓存键：原文件内容SHA-256 + 页码 + 裁剪区域"""
+    source = f"{file_sha256(pdf_path)}|{page}|{','.join(f'{v:.2f}' for v in bbox)}"
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def _write_cropped_page(pdf_path: str, page: int, bbox: Tuple[float, float, float, float], output_path: str) -> bool:
+    """
+    把PDF的单页裁剪到bbox（左, 下, 右, 上）并保存为单页PDF
+    
+    bbox为文本层坐标（pdfminer以MediaBox左下角为原点），设置页面框时加上MediaBox原点换算为页面坐标。
+    
+    Returns:
+        是否已保存；页面有旋转时（文本层坐标与页面坐标不一致）不裁剪，返回False
+    """
+    source = pdfium.PdfDocument(pdf_path)
+    target = pdfium.PdfDocument.new()
+    try:
+        if source[page - 1].get_rotation():
+            return False
+        target.import_pages(source, [page - 1])
+        cropped = target[0]
+        x0, y0 = cropped.get_mediabox()[:2]
+        box = (bbox[0] + x0, bbox[1] + y0, bbox[2] + x0, bbox[3] + y0)
+        cropped.set_mediabox(*box)
+        cropped.set_cropbox(*box)
+        target.save(output_path)
+        return True
+    finally:
+        target.close()
+        source.close()
+
+
+def _extract_page_worker(pdf_path: str, page: int) -> List[Tuple[pd.DataFrame, dict]]:
+    """提取进程任务：对单页先lattice后stream提取表格（启用表格区域裁剪时先只提取课表区域，
+    启用版面模板缓存时整页和裁剪页都优先按模板提取）"""
+    template_cache = get_layout_template_cache()
+    if PDFParser.CROP_TABLE_REGION:
+        tables = PDFParser._read_cropped(pdf_path, page, template_cache)
+        if tables:
+            return tables
+    if template_cache is not None:
+        return PDFParser._read_with_template(pdf_path, page, template_cache)
+    return PDFParser._read_sequential(pdf_path, pages=str(page))
+
+
+def _extract_page_vector_worker(pdf_path: str, page: int) -> List[Tuple[pd.DataFrame, dict]]:
+    """提取进程任务：按矢量划线提取单页表格，页面没有矢量网格（如扫描件）时回退到camelot"""
+    tables = VectorTableParser.extract_tables(pdf_path, page)
+    if tables:
+        return tables
+    logger.warning(f"第{page}页矢量引擎未找到表格，回退到camelot")
+    return _extract_page_worker(pdf_path, page)
+
+
+def _extract_page_text_worker(pdf_path: str, page: int) -> List[Tuple[pd.DataFrame, dict]]:
+    """提取进程任务：按星期表头和班级名从文本层构建单页课表，置信度检查未通过时回退到camelot"""
+    tables = TextLayerParser.extract_tables(pdf_path, page)
+    if tables:
+        return tables
+    logger.warning(f"第{page}页文本层快速提取未通过置信度检查，回退到camelot")
+    return _extract_page_worker(pdf_path, page)
+
 
+def _page_worker(engine: str) -> Callable[[str, int], List[Tuple[pd.DataFrame, dict]]]:
+    """返回引擎对应的单页提取任务函数"""
+    if engine == 'vector':
+        return _extract_page_vector_worker
+    if engine == 'text':
+        return _extract_page_text_worker
+    return _extract_page_worker
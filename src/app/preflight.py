@@ -0,0 +1,165 @@
+"""PDF上传预检模块"""
+import os
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import pypdfium2 as pdfium
+
+from .csv_parser import CSVParser
+from .logger_config import logger
+
+# PDF文件头（规范允许出现在文件前1024字节内）
+PDF_MAGIC = b'%PDF-'
+MAGIC_SEARCH_BYTES = 1024
+
+# 页面非空白字符少于该值时视为没有文本层（扫描件/图片）
+MIN_TEXT_CHARS = 20
+
+
+class PDFPreflight:
+    """
+    PDF上传预检
+
+    在完整的表格提取之前用毫秒级的检查拦截明显无法解析的上传：
+    文件头不是PDF、无法打开（损坏/加密）、页数超出上限、页面没有文本层（扫描件）、
+    页面中没有星期表头。文本由pdfium直接读取，不做版面分析。
+    通过预检时给出应提取的页码（只保留含星期表头的页面）。
+    """
+
+    # 是否在解析请求中执行预检
+    ENABLED = os.getenv('PDF_PREFLIGHT', 'true').lower() == 'true'
+    # 允许的最大页数（0为不限制，默认不限制，与未启用预检时接受的上传一致）
+    MAX_PAGES = int(os.getenv('PDF_PREFLIGHT_MAX_PAGES', '0'))
+
+    @staticmethod
+    def inspect(source: Union[str, bytes], pages: str = 'all') -> Dict[str, Any]:
+        """
+        预检PDF
+
+        Args:
+            source: PDF文件路径或文件内容
+            pages: 请求提取的页码（camelot页码格式）
+
+        Returns:
+            预检报告：ok、error_code、message、page_count、pages（通过预检、应提取的页码）、
+            text_pages（有文本层的页码）、weekday_pages（含星期表头的页码）、weekdays、elapsed_ms
+        """
+        start = time.perf_counter()
+        report: Dict[str, Any] = {
+            'ok': False,
+            'error_code': None,
+            'message': None,
+            'page_count': None,
+            'pages': [],
+            'text_pages': [],
+            'weekday_pages': [],
+            'weekdays': []
+        }
+
+        def finish(error_code: Optional[str] = None, message: Optional[str] = None) -> Dict[str, Any]:
+            report['ok'] = error_code is None
+            report['error_code'] = error_code
+            report['message'] = message
+            report['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            if error_code:
+                logger.warning(f"PDF预检未通过（{error_code}）: {message}")
+            else:
+                logger.info(f"PDF预检通过，待提取页码: {report['pages']}，耗时 {report['elapsed_ms']}ms")
+            return report
+
+        # 步骤1: 文件头
+        if PDF_MAGIC not in _read_head(source):
+            return finish('NOT_PDF', '文件内容不是PDF（缺少%PDF-文件头）')
+
+        # 步骤2: 打开文档、统计页数
+        try:
+            document = pdfium.PdfDocument(source)
+        except pdfium.PdfiumError as e:
+            return finish('PDF_UNREADABLE', f'无法打开PDF（文件损坏或已加密）: {e}')
+
+        try:
+            page_count = len(document)
+            report['page_count'] = page_count
+            if page_count == 0:
+                return finish('PDF_UNREADABLE', 'PDF中没有页面')
+            if PDFPreflight.MAX_PAGES and page_count > PDFPreflight.MAX_PAGES:
+                return finish('TOO_MANY_PAGES', f'PDF共{page_count}页，超过上限{PDFPreflight.MAX_PAGES}页')
+
+            requested = resolve_pages(pages, page_count)
+            if not requested:
+                return finish('PAGES_OUT_OF_RANGE', f'页码 {pages} 超出范围（PDF共{page_count}页）')
+
+            # 步骤3: 逐页读取文本层，检查星期表头
+            weekdays = set()
+            for page in requested:
+                text = _page_text(document, page)
+                if sum(1 for char in text if not char.isspace()) < MIN_TEXT_CHARS:
+                    continue
+                report['text_pages'].append(page)
+                found = [weekday for weekday in CSVParser.WEEKDAYS if weekday in text]
+                if found:
+                    report['weekday_pages'].append(page)
+                    weekdays.update(found)
+        finally:
+            document.close()
+
+        report['weekdays'] = [weekday for weekday in CSVParser.WEEKDAYS if weekday in weekdays]
+        if not report['text_pages']:
+            return finish('NO_TEXT_LAYER', 'PDF页面没有文本层（可能是扫描件或图片），无法提取课表')
+        if not report['weekday_pages']:
+            return finish('NO_WEEKDAY_HEADER', 'PDF页面中未找到星期表头（星期一…星期五），不是课程表')
+
+        report['pages'] = report['weekday_pages']
+        return finish()
+
+    @staticmethod
+    def pages_spec(report: Dict[str, Any]) -> str:
+        """把预检报告中的待提取页码转换为camelot页码格式"""
+        return ','.join(str(page) for page in report['pages'])
+
+
+def _read_head(source: Union[str, bytes]) -> bytes:
+    """读取文件开头用于检查文件头"""
+    if isinstance(source, bytes):
+        return source[:MAGIC_SEARCH_BYTES]
+    with open(source, 'rb') as f:
+        return f.read(MAGIC_SEARCH_BYTES)
+
+
+def _page_text(document: 'pdfium.PdfDocument', page: int) -> str:
+    """读取单个页面的全部文本（页码从1开始）"""
+    pdf_page = document[page - 1]
+    try:
+        text_page = pdf_page.get_textpage()
+        try:
+            return text_page.get_text_range()
+        finally:
+            text_page.close()
+    finally:
+        pdf_page.close()
+
+
+def resolve_pages(pages: str, page_count: int) -> List[int]:
+    """
+    把camelot页码格式解析为页码列表（去重、升序），超出页数的页码被忽略
+
+    Args:
+        pages: 页码，如 1、1,3-5、2-end、all
+        page_count: PDF总页数
+
+    Returns:
+        页码列表
+    """
+    pages = pages.replace(' ', '')
+    if pages == 'all':
+        return list(range(1, page_count + 1))
+
+    result = set()
+    for part in pages.split(','):
+        if '-' in part:
+            first, last = part.split('-', 1)
+            last_page = page_count if last == 'end' else int(last)
+            result.update(range(int(first), last_page + 1))
+        else:
+            result.add(int(part))
+    return sorted(page for page in result if 1 <= page <= page_count)
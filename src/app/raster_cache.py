@@ -0,0 +1,251 @@
+"""lattice页面渲染图像缓存模块"""
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .logger_config import logger
+
+_raster_cache: Optional['PageRasterCache'] = None
+_raster_cache_initialized = False
+_raster_cache_lock = threading.Lock()
+
+
+class PageRasterCache:
+    """
+    页面渲染图像缓存
+
+    camelot lattice每次解析都会把页面渲染为300dpi的BGR图像（A4约25MB），
+    按模板提示提取失败后的完整检测、按不同参数重试、以及同一文档的再次提取
+    都会重复渲染同一页面。该缓存以文件内容SHA-256、页码、渲染后端和渲染分辨率为键保存渲染结果：
+    内存层按总字节数LRU淘汰；可选的磁盘层把图像保存为.npy文件并以内存映射方式读取，
+    在所有提取进程间共享。缓存的图像是只读数组。
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 128 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024
+    ):
+        """
+        Args:
+            max_bytes: 内存层总大小上限（字节），0表示关闭内存层
+            disk_dir: 磁盘层目录，None表示关闭磁盘层
+            disk_max_bytes: 磁盘层总大小上限（字节）
+        """
+        self.max_bytes = max(0, max_bytes)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['PageRasterCache']:
+        """
+        根据环境变量创建缓存，内存层和磁盘层都未启用时返回None
+
+        内存层属于每个进程：启用提取进程池时每个提取进程各有一份，默认只保留约一页（64 MB，300dpi的A3页面约50 MB），
+        跨进程复用交给磁盘层；未启用进程池时默认128 MB。
+        """
+        default_mb = '64' if int(os.getenv('EXTRACTION_POOL_SIZE', '0')) > 0 else '128'
+        max_mb = int(os.getenv('RASTER_CACHE_MAX_MB', default_mb))
+        disk_dir = os.getenv('RASTER_CACHE_DIR') or None
+        disk_max_mb = int(os.getenv('RASTER_CACHE_DISK_MAX_MB', '1024'))
+        if max_mb <= 0 and not disk_dir:
+            return None
+        return cls(max_mb * 1024 * 1024, disk_dir, disk_max_mb * 1024 * 1024)
+
+    @staticmethod
+    def make_key(content_hash: str, page: int, backend: str, resolution: int) -> str:
+        """组合缓存键：文件内容SHA-256 + 页码 + 渲染后端 + 渲染分辨率（dpi）"""
+        return f"{content_hash}-p{page}-{backend}-r{resolution}"
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键（见make_key）
+
+        Returns:
+            只读的BGR图像数组，未命中返回None
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._hits += 1
+                return self._memory[key]
+
+        image = self._disk_get(key)
+        with self._lock:
+            if image is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._memory_set(key, image)
+        return image
+
+    def set(self, key: str, image: np.ndarray) -> np.ndarray:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键（见make_key）
+            image: 渲染出的BGR图像
+
+        Returns:
+            缓存中保存的只读图像（调用方应使用该数组，而不是继续修改原数组）
+        """
+        image.flags.writeable = False
+        with self._lock:
+            self._memory_set(key, image)
+        self._disk_set(key, image)
+        return image
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            return {
+                'memory_entries': len(self._memory),
+                'memory_mb': round(self._memory_bytes / 1024 / 1024, 1),
+                'hits': self._hits,
+                'misses': self._misses
+            }
+
+    def _memory_set(self, key: str, image: np.ndarray) -> None:
+        """写入内存层（调用方需持有锁）"""
+        if self.max_bytes == 0 or image.nbytes > self.max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key).nbytes
+        self._memory[key] = image
+        self._memory_bytes += image.nbytes
+        while self._memory_bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.npy"
+
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        """以内存映射方式读取磁盘层，命中时刷新文件修改时间用于LRU淘汰"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            image = np.load(path, mmap_mode='r')
+            os.utime(path)
+            return image
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取渲染缓存文件失败 {path}: {e}")
+            return None
+
+    def _disk_set(self, key: str, image: np.ndarray) -> None:
+        """写入磁盘层（先写临时文件再原子替换），并按总大小淘汰最旧的文件"""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = self.disk_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, image)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入渲染缓存文件失败 {path}: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return
+        self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        """磁盘层超出大小上限时，按修改时间从旧到新删除"""
+        entries = []
+        total_size = 0
+        for path in self.disk_dir.glob('*.npy'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        if total_size <= self.disk_max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.disk_max_bytes:
+                break
+            try:
+                path.unlink()
+                total_size -= size
+            except OSError as e:
+                logger.warning(f"删除渲染缓存文件失败 {path}: {e}")
+
+
+class CachedImageConversion:
+    """
+    带渲染缓存的camelot图像转换后端
+
+    包装lattice解析器的ImageConversionBackend，to_array先查缓存，
+    未命中时调用原后端渲染并写入缓存；其余属性和方法直接转发给原后端。
+    缓存键包含解析器的渲染分辨率，按不同resolution参数重试时不会复用其他分辨率的图像。
+    """
+
+    def __init__(self, conversion: Any, cache: PageRasterCache, content_hash: str, resolution: int = 300):
+        """
+        Args:
+            conversion: camelot的ImageConversionBackend实例
+            cache: 渲染缓存
+            content_hash: PDF文件内容的SHA-256
+            resolution: lattice解析器的渲染分辨率（dpi）
+        """
+        self._conversion = conversion
+        self._cache = cache
+        self._content_hash = content_hash
+        self._resolution = resolution
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._conversion, name)
+
+    def to_array(self, pdf_path: str, page: int = 1) -> np.ndarray:
+        backend = type(self._conversion.backend).__name__
+        key = PageRasterCache.make_key(self._content_hash, page, backend, self._resolution)
+        image = self._cache.get(key)
+        if image is not None:
+            logger.debug("复用第%d页的渲染图像（%s）", page, backend)
+            return image
+        return self._cache.set(key, self._conversion.to_array(pdf_path, page))
+
+
+def file_sha256(path: str) -> str:
+    """计算文件内容的SHA-256"""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_raster_cache() -> Optional[PageRasterCache]:
+    """获取当前进程的渲染缓存（首次调用时按环境变量创建），未启用时返回None"""
+    global _raster_cache, _raster_cache_initialized
+    with _raster_cache_lock:
+        if not _raster_cache_initialized:
+            _raster_cache = PageRasterCache.from_env()
+            _raster_cache_initialized = True
+        return _raster_cache
@@ -0,0 +1,228 @@
+"""lattice页面渲染后端选择模块"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from importlib import metadata
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional
+
+from .logger_config import logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# 可选的渲染后端（camelot支持的名称），按优先顺序排列：基准结果相同时取靠前者
+RENDER_BACKENDS = ('pdfium', 'ghostscript', 'poppler')
+
+# 自检用的内置课表样例
+SAMPLE_PDF = Path(__file__).parent / 'samples' / 'render_benchmark.pdf'
+
+# 每个后端的基准运行次数（取最短耗时，第一次包含依赖加载）
+BENCHMARK_REPEAT = 2
+
+# 自检结果文件名：保存在渲染缓存目录（未设置时为系统临时目录）中，同一主机上的服务进程共用一次自检
+SELECTION_FILE = 'render_backend.json'
+
+_selection: Optional[Dict[str, Any]] = None
+_selection_lock = threading.Lock()
+
+
+def benchmark_backends(sample_pdf: Path = SAMPLE_PDF) -> Dict[str, Dict[str, Any]]:
+    """
+    用内置样例逐个测试渲染后端
+
+    第一个可用后端的提取结果作为参照，其余后端须与其完全一致。
+    渲染失败（未安装ghostscript/poppler等）的后端标记为不可用。
+
+    Args:
+        sample_pdf: 样例PDF路径
+
+    Returns:
+        {后端名: {'available', 'seconds', 'identical'}}
+    """
+    import camelot
+
+    results: Dict[str, Dict[str, Any]] = {}
+    reference: Optional['pd.DataFrame'] = None
+    for backend in RENDER_BACKENDS:
+        best = None
+        df = None
+        try:
+            for _ in range(BENCHMARK_REPEAT):
+                start = time.perf_counter()
+                tables = camelot.read_pdf(
+                    str(sample_pdf), flavor='lattice', pages='1', backend=backend, use_fallback=False
+                )
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+                df = tables[0].df if tables else None
+        except Exception as e:
+            logger.info(f"渲染后端 {backend} 不可用: {type(e).__name__}")
+            results[backend] = {'available': False, 'seconds': None, 'identical': None}
+            continue
+
+        if reference is None:
+            reference = df
+        identical = df is not None and reference is not None and df.equals(reference)
+        results[backend] = {'available': True, 'seconds': round(best, 3), 'identical': identical}
+        logger.info(f"渲染后端 {backend}: {best:.3f}秒，结果{'一致' if identical else '不一致'}")
+    return results
+
+
+def select_render_backend() -> Dict[str, Any]:
+    """
+    确定lattice使用的渲染后端（进程启动时调用一次）
+
+    PDF_RENDER_BACKEND（或 RENDER_BACKEND）为具体后端名时直接使用，不运行自检；
+    为 auto（默认）时先读取保存的自检结果，没有（或依赖版本、已安装的渲染程序发生变化）时
+    运行自检基准，选出结果与参照一致且最快的后端并保存，其他服务进程（如gunicorn的各个worker）
+    直接沿用，不再各自测量。提取进程启动时由父进程传入同一选择。
+
+    Returns:
+        选择结果：name（None表示使用camelot默认后端）、mode、backends（各后端基准）
+    """
+    global _selection
+    with _selection_lock:
+        if _selection is not None:
+            return _selection
+
+        configured = _configured_backend()
+        if configured != 'auto':
+            if configured not in RENDER_BACKENDS:
+                logger.warning(f"未知的渲染后端 '{configured}'，使用camelot默认后端")
+                configured = None
+            _selection = {'name': configured, 'mode': 'configured', 'backends': {}}
+            return _selection
+
+        if not SAMPLE_PDF.exists():
+            logger.warning(f"渲染后端自检样例不存在: {SAMPLE_PDF}，使用camelot默认后端")
+            _selection = {'name': None, 'mode': 'auto', 'backends': {}}
+            return _selection
+
+        path = _selection_path()
+        signature = _environment_signature()
+        # 多个进程同时启动时只有一个运行自检，其余等待后读取其结果
+        with _file_lock(path.with_name(f".{path.name}.lock")):
+            saved = _load_selection(path, signature)
+            if saved is not None:
+                logger.info(f"沿用已保存的渲染后端自检结果: {saved['name'] or 'camelot默认'}（{path}）")
+                _selection = {'name': saved['name'], 'mode': 'saved', 'backends': saved['backends']}
+                return _selection
+
+            logger.info("开始渲染后端自检...")
+            backends = benchmark_backends()
+            candidates = [
+                name for name in RENDER_BACKENDS
+                if backends[name]['available'] and backends[name]['identical']
+            ]
+            name = min(candidates, key=lambda n: backends[n]['seconds']) if candidates else None
+            logger.info(f"选用渲染后端: {name or 'camelot默认'}")
+            _selection = {'name': name, 'mode': 'auto', 'backends': backends}
+            _save_selection(path, {'signature': signature, 'name': name, 'backends': backends})
+        return _selection
+
+
+def get_render_backend() -> Optional[str]:
+    """返回当前选用的渲染后端名，尚未选择或使用camelot默认后端时返回None"""
+    if _selection is None:
+        configured = _configured_backend()
+        return configured if configured in RENDER_BACKENDS else None
+    return _selection['name']
+
+
+def use_render_backend(name: Optional[str]) -> None:
+    """在提取进程中沿用父进程选定的渲染后端（spawn/forkserver启动的进程不继承父进程的选择）"""
+    global _selection
+    with _selection_lock:
+        _selection = {'name': name, 'mode': 'inherited', 'backends': {}}
+
+
+def render_backend_info() -> Dict[str, Any]:
+    """渲染后端选择结果（用于/health）"""
+    if _selection is None:
+        return {'name': get_render_backend(), 'mode': 'pending', 'backends': {}}
+    return _selection
+
+
+def _configured_backend() -> str:
+    """读取配置的渲染后端（PDF_RENDER_BACKEND，未设置时读取RENDER_BACKEND）"""
+    return os.getenv('PDF_RENDER_BACKEND') or os.getenv('RENDER_BACKEND') or 'auto'
+
+
+def _selection_path() -> Path:
+    """自检结果文件路径（渲染缓存目录，未设置时为系统临时目录）"""
+    directory = os.getenv('RASTER_CACHE_DIR') or tempfile.gettempdir()
+    return Path(directory) / SELECTION_FILE
+
+
+def _environment_signature() -> str:
+    """
+    自检结果的适用条件签名：camelot/pypdfium2版本、已安装的ghostscript/poppler程序和样例文件
+
+    任一变化后保存的结果失效，重新自检（不导入camelot，读取签名只需几毫秒）。
+    """
+    parts = [','.join(RENDER_BACKENDS)]
+    for package in ('camelot-py', 'pypdfium2'):
+        try:
+            parts.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            parts.append(f"{package}=")
+    for program in ('gs', 'pdftoppm'):
+        parts.append(f"{program}={shutil.which(program) or ''}")
+    parts.append(f"sample={SAMPLE_PDF.stat().st_size}")
+    return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def _load_selection(path: Path, signature: str) -> Optional[Dict[str, Any]]:
+    """读取保存的自检结果，不存在或签名不一致时返回None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"读取渲染后端自检结果失败 {path}: {e}")
+        return None
+    if saved.get('signature') != signature:
+        logger.info("依赖版本或已安装的渲染程序发生变化，重新进行渲染后端自检")
+        return None
+    if saved.get('name') is not None and saved['name'] not in RENDER_BACKENDS:
+        return None
+    return saved
+
+
+def _save_selection(path: Path, selection: Dict[str, Any]) -> None:
+    """保存自检结果（先写临时文件再原子替换）"""
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(selection, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"保存渲染后端自检结果失败 {path}: {e}")
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """跨进程的排他文件锁（不支持fcntl的平台或无法创建锁文件时不加锁）"""
+    try:
+        import fcntl
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(path, 'a')
+    except (ImportError, OSError):
+        yield
+        return
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+    finally:
+        lock_file.close()
@@ -0,0 +1,213 @@
+"""解析结果缓存模块"""
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from . import __version__
+from .logger_config import logger
+
+
+class ResultCache:
+    """
+    解析结果缓存
+
+    以上传文件内容的SHA-256为键，缓存 data/statistics/parsing_report。
+    包含一个有容量上限的内存LRU层，以及一个可选的、有总大小上限的磁盘层。
+    磁盘层跨重启保留，因此缓存键还包含代码版本和影响解析结果的配置，修改配置或部署后不会命中旧结果。
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024
+    ):
+        """
+        Args:
+            max_entries: 内存层最多保存的条目数，0表示关闭内存层
+            disk_dir: 磁盘层目录，None表示关闭磁盘层
+            disk_max_bytes: 磁盘层总大小上限（字节）
+        """
+        self.max_entries = max(0, max_entries)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._memory: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            logger.info(f"结果缓存磁盘层目录: {self.disk_dir}，上限 {disk_max_bytes / 1024 / 1024:.0f} MB")
+
+    @classmethod
+    def from_env(cls) -> 'ResultCache':
+        """根据环境变量创建缓存"""
+        max_entries = int(os.getenv('RESULT_CACHE_MAX_ENTRIES', '128'))
+        disk_dir = os.getenv('RESULT_CACHE_DIR') or None
+        disk_max_mb = int(os.getenv('RESULT_CACHE_DISK_MAX_MB', '256'))
+        return cls(max_entries, disk_dir, disk_max_mb * 1024 * 1024)
+
+    @staticmethod
+    def make_key(content_hash: str, **options: Any) -> str:
+        """
+        组合缓存键：内容SHA-256 + 代码版本 + 影响解析结果的请求参数和配置
+        
+        Args:
+            content_hash: 上传文件内容的SHA-256
+            options: 请求参数和配置，值为None的参数会被忽略
+            
+        Returns:
+            缓存键
+        """
+        items = sorted((k, str(v)) for k, v in options.items() if v is not None)
+        items.append(('code_version', code_version()))
+        options_digest = hashlib.sha256(json.dumps(items).encode('utf-8')).hexdigest()[:16]
+        return f"{content_hash}-{options_digest}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键（见make_key）
+
+        Returns:
+            缓存的结果字典，未命中返回None
+        """
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self._hits += 1
+                logger.debug(f"结果缓存命中（内存）: {key[:12]}")
+                return self._memory[key]
+
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._memory_set(key, value)
+        logger.debug(f"结果缓存命中（磁盘）: {key[:12]}")
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键（见make_key）
+            value: 需要缓存的结果字典（必须可JSON序列化）
+        """
+        with self._lock:
+            self._memory_set(key, value)
+        self._disk_set(key, value)
+
+    def clear(self) -> None:
+        """清空所有缓存层"""
+        with self._lock:
+            self._memory.clear()
+        if self.disk_dir:
+            for path in self.disk_dir.glob('*.json'):
+                try:
+                    path.unlink()
+                except OSError as e:
+                    logger.warning(f"删除缓存文件失败 {path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            return {
+                'memory_entries': len(self._memory),
+                'hits': self._hits,
+                'misses': self._misses
+            }
+
+    def _memory_set(self, key: str, value: Dict[str, Any]) -> None:
+        """写入内存层（调用方需持有锁）"""
+        if self.max_entries == 0:
+            return
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            evicted_key, _ = self._memory.popitem(last=False)
+            logger.debug(f"结果缓存淘汰（内存）: {evicted_key[:12]}")
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.json"
+
+    def _disk_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取磁盘层，命中时刷新文件修改时间用于LRU淘汰"""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取缓存文件失败 {path}: {e}")
+            return None
+
+    def _disk_set(self, key: str, value: Dict[str, Any]) -> None:
+        """写入磁盘层（先写临时文件再原子替换），并按总大小淘汰最旧的文件"""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = self.disk_dir / f".{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"写入缓存文件失败 {path}: {e}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return
+        self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        """磁盘层超出大小上限时，按修改时间从旧到新删除"""
+        entries = []
+        total_size = 0
+        for path in self.disk_dir.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+
+        if total_size <= self.disk_max_bytes:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.disk_max_bytes:
+                break
+            try:
+                path.unlink()
+                total_size -= size
+                logger.debug(f"结果缓存淘汰（磁盘）: {path.name}")
+            except OSError as e:
+                logger.warning(f"删除缓存文件失败 {path}: {e}")
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """代码版本：包版本号 + app包内Python源文件内容的摘要（部署新代码后即改变）"""
+    sha256 = hashlib.sha256(__version__.encode('utf-8'))
+    for path in sorted(Path(__file__).parent.glob('*.py')):
+        sha256.update(path.name.encode('utf-8'))
+        sha256.update(path.read_bytes())
+    return sha256.hexdigest()[:16]
@@ -0,0 +1,106 @@
+"""按文档谱系缓存班级行解析结果的模块"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .logger_config import logger
+from .timetable_grid import PeriodEntry
+
+
+class LineageState(NamedTuple):
+    """一个文档谱系最近一次上传的解析状态"""
+    # 行哈希 -> 该行解析出的课时
+    rows: Dict[bytes, Tuple[PeriodEntry, ...]]
+    # 班级名 -> 行哈希
+    classes: Dict[str, bytes]
+
+
+class RowParseCache:
+    """
+    班级行解析结果缓存
+
+    同一学校每周重新上传的课表通常只有少数班级变化。缓存以文档谱系
+    （学校ID + 表头取值计划签名）为范围，记录上一次上传中每个班级行的内容哈希及其解析结果；
+    再次上传时只解析哈希发生变化的行，并据此标出发生变化的班级。
+    每个谱系只保留最近一次上传的行，谱系数量按LRU淘汰。
+    """
+
+    def __init__(self, max_lineages: int = 64):
+        """
+        Args:
+            max_lineages: 最多保存的谱系数
+        """
+        self.max_lineages = max(1, max_lineages)
+        self._lineages: 'OrderedDict[str, LineageState]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['RowParseCache']:
+        """根据环境变量创建缓存，ROW_CACHE_MAX_LINEAGES为0时返回None（不做增量解析）"""
+        max_lineages = int(os.getenv('ROW_CACHE_MAX_LINEAGES', '64'))
+        if max_lineages <= 0:
+            return None
+        return cls(max_lineages)
+
+    @staticmethod
+    def lineage_key(school_id: str, columns: Sequence[int], days: Sequence[Tuple[str, int, int]]) -> str:
+        """
+        组合谱系键：学校ID + 表头签名
+
+        表头签名取自表头编译出的取值计划，表头布局变化后旧的行缓存不再适用。
+        """
+        signature = hashlib.sha256(repr((list(columns), list(days))).encode('utf-8')).hexdigest()[:16]
+        return f"{school_id}-{signature}"
+
+    @staticmethod
+    def row_hash(cells: Sequence[str]) -> bytes:
+        """计算班级行课程单元格的内容哈希"""
+        return hashlib.blake2b('\x1f'.join(cells).encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key: str) -> Optional[LineageState]:
+        """读取谱系最近一次上传的状态，未命中返回None"""
+        with self._lock:
+            state = self._lineages.get(key)
+            if state is None:
+                self._misses += 1
+                return None
+            self._lineages.move_to_end(key)
+            self._hits += 1
+            return state
+
+    def set(self, key: str, state: LineageState) -> None:
+        """保存谱系本次上传的状态（替换上一次的状态）"""
+        with self._lock:
+            self._lineages[key] = state
+            self._lineages.move_to_end(key)
+            while len(self._lineages) > self.max_lineages:
+                evicted, _ = self._lineages.popitem(last=False)
+                logger.debug(f"行解析缓存淘汰谱系: {evicted}")
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            return {
+                'lineages': len(self._lineages),
+                'rows': sum(len(state.rows) for state in self._lineages.values()),
+                'hits': self._hits,
+                'misses': self._misses
+            }
+
+
+def diff_classes(previous: Optional[LineageState], classes: Dict[str, bytes]) -> Tuple[List[str], List[str]]:
+    """
+    比较本次与上一次上传的班级行哈希
+
+    Returns:
+        (发生变化或新增的班级, 本次不再出现的班级)；没有上一次上传时全部班级视为变化
+    """
+    if previous is None:
+        return list(classes), []
+    changed = [name for name, row_hash in classes.items() if previous.classes.get(name) != row_hash]
+    removed = [name for name in previous.classes if name not in classes]
+    return changed, removed
@@ -0,0 +1,297 @@
+"""基于PDF文本层的课表快速提取模块"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .csv_parser import CSVParser
+from .logger_config import logger
+from .pdf_layout import PageLayout, Word, read_page_layout
+
+# 节次表头
+PERIOD_LABELS = [str(period) for period in range(1, CSVParser.PERIODS_PER_DAY + 1)]
+
+
+class TextLayerParser:
+    """
+    文本层课表解析器
+
+    利用课表自身的结构直接从PDF文本层构建表格，不识别表格线：
+    列以星期一…星期五表头和其下的1-9节次表头定位，行以班级名（初/高…班）定位。
+    输出的DataFrame与camelot的表格结构一致（第0行星期表头、第1行节次、其后为班级行），
+    可直接交给CSVParser解析。置信度检查未通过时返回空结果，由调用方回退到camelot。
+    """
+
+    # 置信度下限：无歧义地落入单元格的文本行占比
+    MIN_CONFIDENCE = float(os.getenv('TEXT_LAYER_MIN_CONFIDENCE', '0.98'))
+
+    @staticmethod
+    def extract_tables(pdf_path: str, page: int = 1) -> List[Tuple[pd.DataFrame, dict]]:
+        """
+        从PDF指定页的文本层提取课表
+
+        Args:
+            pdf_path: PDF文件路径
+            page: 页码（从1开始）
+
+        Returns:
+            [(dataframe, parsing_report)]，置信度检查未通过时返回空列表
+        """
+        layout = read_page_layout(pdf_path, page)
+        if layout is None:
+            logger.warning(f"第{page}页不存在")
+            return []
+
+        table = TextLayerParser.parse_layout(layout)
+        if table is None:
+            return []
+        return [table]
+
+    @staticmethod
+    def parse_layout(layout: PageLayout) -> Optional[Tuple[pd.DataFrame, dict]]:
+        """
+        从页面版面构建课表
+
+        Args:
+            layout: 页面版面
+
+        Returns:
+            (dataframe, parsing_report)，课表结构不完整或置信度不足时返回None
+        """
+        page = layout.page_number
+        lines = layout.text_lines()
+
+        # 步骤1: 星期表头（每个星期取最上方的一处，须从左到右排列）
+        headers = TextLayerParser._find_weekday_headers(lines)
+        if headers is None:
+            logger.info(f"第{page}页文本层未找到完整的星期表头")
+            return None
+        header_bottom = min(line.y0 for line in headers)
+
+        # 步骤2: 班级行（表头下方、第一个星期左侧，符合班级命名格式）
+        class_lines = TextLayerParser._find_class_lines(lines, headers)
+        if not class_lines:
+            logger.info(f"第{page}页文本层未找到班级名")
+            return None
+        row_edges = _band_edges(
+            [_middle_y(line) for line in class_lines],
+            single_half=(class_lines[0].y1 - class_lines[0].y0) * 2
+        )
+
+        # 步骤3: 节次列（优先使用1-9节次表头，缺失时按星期表头均分）
+        period_lines = TextLayerParser._find_period_headers(lines, header_bottom, row_edges[0])
+        if period_lines is not None:
+            anchors, alignment = TextLayerParser._column_anchors(period_lines, lines, row_edges)
+        else:
+            logger.info(f"第{page}页未找到完整的节次表头，按星期表头均分节次列")
+            centers = [_middle_x(line) for line in headers]
+            day_edges = _band_edges(centers)
+            anchors = []
+            for left, right in zip(day_edges, day_edges[1:]):
+                width = (right - left) / CSVParser.PERIODS_PER_DAY
+                anchors.extend(left + width * (i + 0.5) for i in range(CSVParser.PERIODS_PER_DAY))
+            alignment = 'center'
+        pitch = (anchors[-1] - anchors[0]) / (len(anchors) - 1)
+
+        # 步骤4: 把表格区域内的其他文本行分配到单元格
+        skip = {id(line) for line in headers + class_lines + (period_lines or [])}
+        grid_left = anchors[0] - pitch
+        grid_right = anchors[-1] + pitch
+        cells: Dict[Tuple[int, int], List[Word]] = {}
+        total, ambiguous = 0, 0
+        for line in lines:
+            y = _middle_y(line)
+            if id(line) in skip or not (row_edges[-1] < y < row_edges[0]):
+                continue
+            if line.x0 >= grid_right or line.x1 <= grid_left:
+                continue
+            total += 1
+            position = line.x0 if alignment == 'left' else _middle_x(line)
+            col = min(range(len(anchors)), key=lambda i: abs(position - anchors[i]))
+            if abs(position - anchors[col]) > pitch * 0.4:
+                ambiguous += 1
+            row = _band_index(y, row_edges)
+            cell = cells.setdefault((row, col), [])
+            if any(min(other.y1, line.y1) > max(other.y0, line.y0) for other in cell):
+                # 同一单元格内出现水平并排的两行文本，说明列定位有误
+                ambiguous += 1
+            cell.append(line)
+
+        confidence = 1.0 - ambiguous / total if total else 0.0
+        filled_rows = {row for row, _ in cells}
+        if confidence < TextLayerParser.MIN_CONFIDENCE or len(filled_rows) < len(class_lines):
+            logger.info(f"第{page}页文本层置信度不足: {confidence:.2%}，"
+                        f"有课程的班级 {len(filled_rows)}/{len(class_lines)}")
+            return None
+
+        # 步骤5: 组装与camelot一致的表格结构
+        n_cols = 1 + len(anchors)
+        header_row = [''] * n_cols
+        for index, weekday in enumerate(CSVParser.WEEKDAYS):
+            header_row[1 + index * CSVParser.PERIODS_PER_DAY] = weekday
+        period_row = [''] + PERIOD_LABELS * len(CSVParser.WEEKDAYS)
+        data = [header_row, period_row]
+        for row, class_line in enumerate(class_lines):
+            values = [class_line.text] + [''] * len(anchors)
+            for col in range(len(anchors)):
+                cell = cells.get((row, col))
+                if cell:
+                    cell.sort(key=lambda line: (-line.y0, line.x0))
+                    values[1 + col] = '\n'.join(line.text for line in cell)
+            data.append(values)
+
+        df = pd.DataFrame(data)
+        body_cells = len(class_lines) * len(anchors)
+        parsing_report = {
+            'accuracy': round(confidence * 100, 2),
+            'whitespace': round(100.0 * (body_cells - len(cells)) / body_cells, 2),
+            'order': 1,
+            'page': page,
+            'engine': 'text'
+        }
+        logger.info(f"第{page}页文本层提取成功: {len(class_lines)} 个班级，置信度 {confidence:.2%}")
+        return df, parsing_report
+
+    @staticmethod
+    def locate_table(layout: PageLayout) -> Optional[Tuple[float, float, float, float]]:
+        """
+        从文本层定位课表区域：从星期表头到最后一个班级行，从班级名列到最右侧的课程
+
+        四周各外扩一个行距，使区域包含表格边框线。
+
+        Args:
+            layout: 页面版面
+
+        Returns:
+            (左, 下, 右, 上)（PDF坐标，已限制在页面内），找不到星期表头或班级行时返回None
+        """
+        lines = layout.text_lines()
+        headers = TextLayerParser._find_weekday_headers(lines)
+        if headers is None:
+            return None
+        class_lines = TextLayerParser._find_class_lines(lines, headers)
+        if not class_lines:
+            return None
+
+        top = max(line.y1 for line in headers)
+        bottom = min(line.y0 for line in class_lines)
+        left = min(line.x0 for line in class_lines)
+        right = max(line.x1 for line in lines if bottom <= _middle_y(line) <= top)
+        if len(class_lines) > 1:
+            pitch = (_middle_y(class_lines[0]) - _middle_y(class_lines[-1])) / (len(class_lines) - 1)
+        else:
+            pitch = (class_lines[0].y1 - class_lines[0].y0) * 2
+        return (
+            max(0.0, left - pitch),
+            max(0.0, bottom - pitch),
+            min(layout.width, right + pitch),
+            min(layout.height, top + pitch)
+        )
+
+    @staticmethod
+    def _find_class_lines(lines: List[Word], headers: List[Word]) -> List[Word]:
+        """返回星期表头下方、第一个星期左侧、符合班级命名格式的文本行（从上到下）"""
+        header_bottom = min(line.y0 for line in headers)
+        return sorted(
+            (line for line in lines
+             if line.y1 <= header_bottom and line.x1 <= headers[0].x0
+             and CSVParser.CLASS_NAME_PATTERN.match(line.text)),
+            key=lambda line: -line.y0
+        )
+
+    @staticmethod
+    def _find_weekday_headers(lines: List[Word]) -> Optional[List[Word]]:
+        """按星期顺序返回表头文本行，缺少任一星期或顺序不对时返回None"""
+        headers = []
+        for weekday in CSVParser.WEEKDAYS:
+            matches = [line for line in lines if weekday in line.text]
+            if not matches:
+                return None
+            headers.append(max(matches, key=lambda line: line.y1))
+        centers = [_middle_x(line) for line in headers]
+        if any(left >= right for left, right in zip(centers, centers[1:])):
+            return None
+        return headers
+
+    @staticmethod
+    def _find_period_headers(lines: List[Word], header_bottom: float, grid_top: float) -> Optional[List[Word]]:
+        """
+        查找星期表头与第一个班级行之间的节次表头（每天1-9）
+
+        Returns:
+            按从左到右排列的节次表头文本行，数量不等于 5×9 或顺序不符时返回None
+        """
+        candidates = sorted(
+            (line for line in lines
+             if line.text in PERIOD_LABELS and grid_top <= _middle_y(line) < header_bottom),
+            key=lambda line: line.x0
+        )
+        if len(candidates) != len(CSVParser.WEEKDAYS) * CSVParser.PERIODS_PER_DAY:
+            return None
+        if [line.text for line in candidates] != PERIOD_LABELS * len(CSVParser.WEEKDAYS):
+            return None
+        return candidates
+
+    @staticmethod
+    def _column_anchors(
+        period_lines: List[Word],
+        lines: List[Word],
+        row_edges: List[float]
+    ) -> Tuple[List[float], str]:
+        """
+        根据节次表头确定每列的定位坐标
+
+        单元格文字可能左对齐也可能居中：分别以节次表头的左边界和中点作为锚点，
+        取班级行内文本与锚点距离更小的一种对齐方式。
+
+        Returns:
+            (锚点x坐标列表, 'left' 或 'center')
+        """
+        lefts = [line.x0 for line in period_lines]
+        centers = [_middle_x(line) for line in period_lines]
+        body = [line for line in lines if row_edges[-1] < _middle_y(line) < row_edges[0] and line.x0 >= lefts[0] - 1]
+
+        def distance(anchors: List[float], key) -> float:
+            if not body:
+                return 0.0
+            total = sum(min(abs(key(line) - anchor) for anchor in anchors) for line in body)
+            return total / len(body)
+
+        if distance(lefts, lambda line: line.x0) < distance(centers, _middle_x):
+            return lefts, 'left'
+        return centers, 'center'
+
+
+def _middle_x(line: Word) -> float:
+    return (line.x0 + line.x1) / 2
+
+
+def _middle_y(line: Word) -> float:
+    return (line.y0 + line.y1) / 2
+
+
+def _band_edges(centers: List[float], single_half: float = 12.0) -> List[float]:
+    """
+    由各行（列）的中心坐标推算边界：相邻中心取中点，首尾按相邻间距外扩半格
+
+    Args:
+        centers: 按从上到下（y递减）或从左到右（x递增）排序的中心坐标
+        single_half: 只有一个中心时无法推算间距，按该值向两侧外扩
+
+    Returns:
+        len(centers)+1 个边界坐标，顺序与centers一致
+    """
+    if len(centers) == 1:
+        return [centers[0] + single_half, centers[0] - single_half]
+    edges = [(a + b) / 2 for a, b in zip(centers, centers[1:])]
+    first = centers[0] + (centers[0] - edges[0])
+    last = centers[-1] + (centers[-1] - edges[-1])
+    return [first] + edges + [last]
+
+
+def _band_index(y: float, edges: List[float]) -> int:
+    """返回y所在的行序号（edges从上到下排列）"""
+    for index in range(len(edges) - 1):
+        if edges[index + 1] <= y <= edges[index]:
+            return index
+    return len(edges) - 2
@@ -0,0 +1,231 @@
+"""数组形式的紧凑课表模块"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .logger_config import logger
+
+# 一节课的解析结果：(星期序号, 节次（从1开始）, 课程名, 教师名, 是否班主任)
+PeriodEntry = Tuple[int, int, str, Optional[str], bool]
+
+
+class TimetableGrid:
+    """
+    紧凑课表：班级 × 星期 × 节次 的整数数组
+
+    每节课只保存课程编号和教师编号，分别指向驻留的课程名表和教师名表（编号0表示无课/无教师），
+    同一课程名、教师名在整个课表中只保存一份；班主任标识按班级和星期保存为节次位掩码。
+    解析和拼接全程使用该结构，只在接口返回时展开为课时字典（见schedule）。
+    """
+
+    def __init__(self, weekdays: Sequence[str], periods_per_day: int, capacity: int = 64):
+        """
+        Args:
+            weekdays: 星期名（数组第二维的顺序）
+            periods_per_day: 每天节数（数组第三维的长度，不超过16）
+            capacity: 预分配的班级数，超出时自动扩容
+        """
+        if periods_per_day > 16:
+            raise ValueError(f"每天节数不能超过16（班主任位掩码为16位）: {periods_per_day}")
+        self.weekdays = tuple(weekdays)
+        self.periods_per_day = periods_per_day
+        self.class_names: List[str] = []
+        # 编号0保留给无课/无教师
+        self.courses: List[Optional[str]] = [None]
+        self.teachers: List[Optional[str]] = [None]
+        self._class_rows: Dict[str, int] = {}
+        self._course_ids: Dict[str, int] = {}
+        self._teacher_ids: Dict[str, int] = {}
+
+        shape = (max(1, capacity), len(self.weekdays), periods_per_day)
+        self._course_grid = np.zeros(shape, dtype=np.int32)
+        self._teacher_grid = np.zeros(shape, dtype=np.int32)
+        self._class_teacher_mask = np.zeros(shape[:2], dtype=np.uint16)
+
+    def __len__(self) -> int:
+        return len(self.class_names)
+
+    def __contains__(self, class_name: object) -> bool:
+        return class_name in self._class_rows
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # 跨进程传递时只序列化已使用的行
+        state = self.__dict__.copy()
+        for name in ('_course_grid', '_teacher_grid', '_class_teacher_mask'):
+            state[name] = state[name][:len(self.class_names)].copy()
+        return state
+
+    @property
+    def course_ids(self) -> np.ndarray:
+        """课程编号数组（班级 × 星期 × 节次），0表示无课"""
+        return self._course_grid[:len(self.class_names)]
+
+    @property
+    def teacher_ids(self) -> np.ndarray:
+        """教师编号数组（班级 × 星期 × 节次），0表示无教师"""
+        return self._teacher_grid[:len(self.class_names)]
+
+    @property
+    def class_teacher_mask(self) -> np.ndarray:
+        """班主任位掩码（班级 × 星期），第i位对应第i+1节"""
+        return self._class_teacher_mask[:len(self.class_names)]
+
+    def intern_course(self, course: str) -> int:
+        """返回课程名的编号（首次出现时加入课程名表）"""
+        course_id = self._course_ids.get(course)
+        if course_id is None:
+            course_id = self._course_ids[course] = len(self.courses)
+            self.courses.append(course)
+        return course_id
+
+    def intern_teacher(self, teacher: Optional[str]) -> int:
+        """返回教师名的编号（None为0，首次出现时加入教师名表）"""
+        if teacher is None:
+            return 0
+        teacher_id = self._teacher_ids.get(teacher)
+        if teacher_id is None:
+            teacher_id = self._teacher_ids[teacher] = len(self.teachers)
+            self.teachers.append(teacher)
+        return teacher_id
+
+    def set_class(self, class_name: str, periods: Iterable[PeriodEntry]) -> int:
+        """
+        写入一个班级的课表
+
+        班级已存在时整行覆盖（与按班级名写入字典的语义一致）。
+
+        Args:
+            class_name: 班级名
+            periods: 该班级的课时 (星期序号, 节次, 课程名, 教师名, 是否班主任)
+
+        Returns:
+            班级所在行
+        """
+        n_periods = self.periods_per_day
+        size = len(self.weekdays) * n_periods
+        course_row = [0] * size
+        teacher_row = [0] * size
+        mask_row = [0] * len(self.weekdays)
+        for day, period, course, teacher, is_class_teacher in periods:
+            index = day * n_periods + period - 1
+            course_row[index] = self.intern_course(course)
+            teacher_row[index] = self.intern_teacher(teacher)
+            if is_class_teacher:
+                mask_row[day] |= 1 << (period - 1)
+
+        row = self._row_for(class_name)
+        self._course_grid[row] = np.reshape(course_row, (len(self.weekdays), n_periods))
+        self._teacher_grid[row] = np.reshape(teacher_row, (len(self.weekdays), n_periods))
+        self._class_teacher_mask[row] = mask_row
+        return row
+
+    def schedule(self, class_name: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        把一个班级展开为课时字典
+
+        Returns:
+            {星期名: [{'period', 'course', 'teacher', 'is_class_teacher'}, ...]}
+        """
+        row = self._class_rows[class_name]
+        course_rows = self._course_grid[row].tolist()
+        teacher_rows = self._teacher_grid[row].tolist()
+        masks = self._class_teacher_mask[row].tolist()
+
+        schedule = {}
+        for day, weekday in enumerate(self.weekdays):
+            teacher_row = teacher_rows[day]
+            periods = []
+            for index, course_id in enumerate(course_rows[day]):
+                if not course_id:
+                    continue
+                periods.append({
+                    'period': index + 1,
+                    'course': self.courses[course_id],
+                    'teacher': self.teachers[teacher_row[index]],
+                    'is_class_teacher': bool(masks[day] >> index & 1)
+                })
+            schedule[weekday] = periods
+        return schedule
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, List[Dict[str, Any]]]]]:
+        """按班级加入顺序逐个展开 (班级名, 课时字典)"""
+        for class_name in self.class_names:
+            yield class_name, self.schedule(class_name)
+
+    def to_dict(self) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+        """展开为 {班级名: {星期名: [课时字典]}}"""
+        return dict(self.items())
+
+    def total_periods(self) -> int:
+        """课时总数"""
+        return int(np.count_nonzero(self.course_ids))
+
+    def update(self, other: 'TimetableGrid') -> None:
+        """
+        用另一个课表中的班级整行覆盖本课表（与dict.update语义一致：已有班级保留原位置）
+        """
+        course_map, teacher_map = self._id_maps(other)
+        rows = [self._row_for(class_name, clear=False) for class_name in other.class_names]
+        self._course_grid[rows] = course_map[other.course_ids]
+        self._teacher_grid[rows] = teacher_map[other.teacher_ids]
+        self._class_teacher_mask[rows] = other.class_teacher_mask
+
+    def merge(self, other: 'TimetableGrid') -> None:
+        """
+        按班级名把另一个课表拼接进来
+
+        同一班级在多个表格中出现时（如周一至周三、周四至周五分成两个表格），
+        按星期补全尚无课程的天；同一天在两个课表中都有课程时保留已有的数据。
+        """
+        course_map, teacher_map = self._id_maps(other)
+        other_courses = course_map[other.course_ids]
+        other_teachers = teacher_map[other.teacher_ids]
+        other_masks = other.class_teacher_mask
+
+        for other_row, class_name in enumerate(other.class_names):
+            is_new = class_name not in self._class_rows
+            row = self._row_for(class_name, clear=False)
+            for day, weekday in enumerate(self.weekdays):
+                if not other_courses[other_row, day].any():
+                    continue
+                if not is_new and self._course_grid[row, day].any():
+                    logger.warning(f"班级 {class_name} 的{weekday}在多个表格中出现，保留第一次出现的数据")
+                    continue
+                self._course_grid[row, day] = other_courses[other_row, day]
+                self._teacher_grid[row, day] = other_teachers[other_row, day]
+                self._class_teacher_mask[row, day] = other_masks[other_row, day]
+                if not is_new:
+                    logger.debug("班级 %s 拼接%s的 %d 节课",
+                                 class_name, weekday, np.count_nonzero(other_courses[other_row, day]))
+
+    def _id_maps(self, other: 'TimetableGrid') -> Tuple[np.ndarray, np.ndarray]:
+        """把另一个课表的课程/教师编号映射为本课表编号的查找数组（按需驻留对方的字符串）"""
+        course_map = np.array([0] + [self.intern_course(course) for course in other.courses[1:]], dtype=np.int32)
+        teacher_map = np.array([0] + [self.intern_teacher(teacher) for teacher in other.teachers[1:]], dtype=np.int32)
+        return course_map, teacher_map
+
+    def _row_for(self, class_name: str, clear: bool = True) -> int:
+        """返回班级所在行（新班级追加一行，必要时扩容）；已有班级按clear清空该行"""
+        row = self._class_rows.get(class_name)
+        if row is not None:
+            if clear:
+                self._course_grid[row] = 0
+                self._teacher_grid[row] = 0
+                self._class_teacher_mask[row] = 0
+            return row
+
+        row = len(self.class_names)
+        if row == len(self._course_grid):
+            self._course_grid = _grow(self._course_grid)
+            self._teacher_grid = _grow(self._teacher_grid)
+            self._class_teacher_mask = _grow(self._class_teacher_mask)
+        self.class_names.append(class_name)
+        self._class_rows[class_name] = row
+        return row
+
+
+def _grow(array: np.ndarray) -> np.ndarray:
+    """按第一维容量翻倍扩容（新增部分为0）"""
+    grown = np.zeros((max(1, len(array) * 2),) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
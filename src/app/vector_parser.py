@@ -0,0 +1,185 @@
+"""基于PDF矢量划线的表格提取模块"""
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .logger_config import logger
+from .pdf_layout import PageLayout, Segment, Word, best_overlap_index, read_page_layout
+
+# 坐标聚类容差（pt）：相距不超过该值的划线视为同一条
+LINE_TOLERANCE = 2.0
+# 忽略长度小于该值（pt）的划线（如文字下划线、装饰短线）
+MIN_LINE_LENGTH = 5.0
+
+
+class VectorTableParser:
+    """
+    矢量划线表格解析器
+
+    Excel/WPS导出的课表PDF中，表格线以矢量绘图指令保存在内容流里。
+    该解析器直接读取这些线段和矩形构建单元格网格，再把字符分配到单元格，
+    不需要像camelot lattice那样先用ghostscript渲染页面、再用OpenCV找线。
+    输出的DataFrame与camelot一致：合并单元格的文字放在左上角单元格，其余为空。
+    """
+
+    @staticmethod
+    def extract_tables(pdf_path: str, page: int = 1) -> List[Tuple[pd.DataFrame, dict]]:
+        """
+        从PDF指定页提取表格
+
+        Args:
+            pdf_path: PDF文件路径
+            page: 页码（从1开始）
+
+        Returns:
+            [(dataframe, parsing_report)]，页面中没有可用的矢量网格时返回空列表
+        """
+        layout = read_page_layout(pdf_path, page)
+        if layout is None:
+            logger.warning(f"第{page}页不存在")
+            return []
+
+        table = VectorTableParser.parse_layout(layout)
+        if table is None:
+            logger.info(f"第{page}页未找到矢量表格网格")
+            return []
+        return [table]
+
+    @staticmethod
+    def parse_layout(layout: PageLayout) -> Optional[Tuple[pd.DataFrame, dict]]:
+        """
+        从页面版面构建表格
+
+        Args:
+            layout: 页面版面
+
+        Returns:
+            (dataframe, parsing_report)，没有可用网格时返回None
+        """
+        horizontal = [s for s in layout.segments if s.is_horizontal and s.x1 - s.x0 >= MIN_LINE_LENGTH]
+        vertical = [s for s in layout.segments if s.is_vertical and s.y1 - s.y0 >= MIN_LINE_LENGTH]
+        if len(horizontal) < 2 or len(vertical) < 2:
+            return None
+
+        # 网格线坐标：行从上到下，列从左到右
+        ys = sorted(_cluster([(s.y0 + s.y1) / 2 for s in horizontal]), reverse=True)
+        xs = sorted(_cluster([(s.x0 + s.x1) / 2 for s in vertical]))
+        if len(ys) < 2 or len(xs) < 2:
+            return None
+
+        n_rows, n_cols = len(ys) - 1, len(xs) - 1
+        anchors = VectorTableParser._span_anchors(xs, ys, horizontal, vertical)
+        spans = _merged_spans(anchors)
+
+        # 把文本行分配到单元格：行按中线定位，列取水平重叠最多的一列
+        # （超出单元格宽度的文字仍归属重叠最多的单元格，与camelot一致），合并单元格归入左上角单元格
+        cell_lines: Dict[Tuple[int, int], List[Word]] = {}
+        lines_in_table = 0
+        assigned = 0.0
+        for line in layout.text_lines():
+            y = (line.y0 + line.y1) / 2
+            if not (ys[-1] < y < ys[0]) or line.x1 <= xs[0] or line.x0 >= xs[-1]:
+                continue
+            lines_in_table += 1
+            row = _locate(y, ys, descending=True)
+            col = best_overlap_index(line.x0, line.x1, xs)
+            anchor = anchors[row][col]
+            cell_lines.setdefault(anchor, []).append(line)
+            assigned += _span_overlap(line, spans[anchor], xs, ys)
+
+        data = [[''] * n_cols for _ in range(n_rows)]
+        for (row, col), lines in cell_lines.items():
+            lines.sort(key=lambda w: (-w.y0, w.x0))
+            data[row][col] = '\n'.join(w.text for w in lines)
+
+        df = pd.DataFrame(data)
+        empty_cells = sum(1 for row in data for text in row if not text)
+        # accuracy与camelot的计算方式相同：文本行落在所属（合并）单元格内的面积占比的平均值，
+        # 超出单元格、跨越网格线的文字会拉低该值
+        parsing_report = {
+            'accuracy': round(100.0 * assigned / lines_in_table, 2) if lines_in_table else 0.0,
+            'whitespace': round(100.0 * empty_cells / (n_rows * n_cols), 2),
+            'order': 1,
+            'page': layout.page_number,
+            'engine': 'vector'
+        }
+        return df, parsing_report
+
+    @staticmethod
+    def _span_anchors(
+        xs: List[float],
+        ys: List[float],
+        horizontal: List[Segment],
+        vertical: List[Segment]
+    ) -> List[List[Tuple[int, int]]]:
+        """
+        计算每个单元格所属合并单元格的左上角单元格
+
+        两个相邻单元格之间没有划线覆盖时，视为同一个合并单元格。
+        """
+        n_rows, n_cols = len(ys) - 1, len(xs) - 1
+        anchors = [[(row, col) for col in range(n_cols)] for row in range(n_rows)]
+
+        for row in range(n_rows):
+            for col in range(n_cols):
+                anchor_row, anchor_col = row, col
+                # 左边界没有竖线：与左侧单元格合并
+                if col > 0 and not _covered(vertical, xs[col], ys[row + 1], ys[row], axis='x'):
+                    anchor_row, anchor_col = anchors[row][col - 1]
+                # 上边界没有横线：与上方单元格合并
+                elif row > 0 and not _covered(horizontal, ys[row], xs[col], xs[col + 1], axis='y'):
+                    anchor_row, anchor_col = anchors[row - 1][col]
+                anchors[row][col] = (anchor_row, anchor_col)
+        return anchors
+
+
+def _cluster(values: List[float]) -> List[float]:
+    """把相近的坐标聚为一类，返回每类的平均值"""
+    clusters: List[List[float]] = []
+    for value in sorted(values):
+        if clusters and value - clusters[-1][-1] <= LINE_TOLERANCE:
+            clusters[-1].append(value)
+        else:
+            clusters.append([value])
+    return [sum(c) / len(c) for c in clusters]
+
+
+def _merged_spans(anchors: List[List[Tuple[int, int]]]) -> Dict[Tuple[int, int], Tuple[int, int, int, int]]:
+    """每个合并单元格（以左上角单元格为键）覆盖的 (首行, 首列, 末行, 末列)"""
+    spans: Dict[Tuple[int, int], Tuple[int, int, int, int]] = {}
+    for row, cells in enumerate(anchors):
+        for col, anchor in enumerate(cells):
+            first_row, first_col, last_row, last_col = spans.get(anchor, (row, col, row, col))
+            spans[anchor] = (first_row, first_col, max(last_row, row), max(last_col, col))
+    return spans
+
+
+def _span_overlap(line: Word, span: Tuple[int, int, int, int], xs: List[float], ys: List[float]) -> float:
+    """文本行落在合并单元格内的面积占比（0~1）"""
+    first_row, first_col, last_row, last_col = span
+    width = max(0.0, min(line.x1, xs[last_col + 1]) - max(line.x0, xs[first_col]))
+    height = max(0.0, min(line.y1, ys[first_row]) - max(line.y0, ys[last_row + 1]))
+    area = (line.x1 - line.x0) * (line.y1 - line.y0)
+    return width * height / area if area > 0 else 1.0
+
+
+def _locate(value: float, edges: List[float], descending: bool = False) -> int:
+    """返回value所在的区间序号"""
+    for index in range(len(edges) - 1):
+        low, high = (edges[index + 1], edges[index]) if descending else (edges[index], edges[index + 1])
+        if low <= value <= high:
+            return index
+    return len(edges) - 2
+
+
+def _covered(segments: List[Segment], position: float, start: float, end: float, axis: str) -> bool:
+    """检查在position处是否有划线覆盖 [start, end] 区间的中点"""
+    middle = (start + end) / 2
+    for s in segments:
+        if axis == 'x':
+            if abs((s.x0 + s.x1) / 2 - position) <= LINE_TOLERANCE and s.y0 - LINE_TOLERANCE <= middle <= s.y1 + LINE_TOLERANCE:
+                return True
+        else:
+            if abs((s.y0 + s.y1) / 2 - position) <= LINE_TOLERANCE and s.x0 - LINE_TOLERANCE <= middle <= s.x1 + LINE_TOLERANCE:
+                return True
+    return False
@@ -0,0 +1,537 @@
+"""PDF提取进程池模块"""
+import atexit
+import contextvars
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from .logger_config import flush_logs, logger
+from .render_backends import get_render_backend, use_render_backend
+
+# 等待子进程结果时的轮询间隔（秒）
+POLL_INTERVAL = 0.05
+
+# 单个请求全部提取任务的总时间预算（秒），0表示不限制
+REQUEST_TIMEOUT = float(os.getenv('EXTRACTION_REQUEST_TIMEOUT', '300'))
+
+# 当前进程是否为提取进程（提取进程内不再向进程池提交任务）
+_IN_WORKER = False
+
+# 当前请求的提取截止时间：(time.monotonic()截止时刻, 总预算秒数)，None表示不限制
+_request_deadline: contextvars.ContextVar[Optional[Tuple[float, float]]] = contextvars.ContextVar(
+    'extraction_request_deadline', default=None
+)
+
+_pool: Optional['ExtractionPool'] = None
+_pool_initialized = False
+_pool_lock = threading.Lock()
+
+
+class ExtractionError(Exception):
+    """提取进程异常退出"""
+
+
+class ExtractionLimitExceeded(ExtractionError):
+    """提取任务超出资源限制（进程已被终止）"""
+
+    error_code = 'EXTRACTION_LIMIT_EXCEEDED'
+
+
+class ExtractionTimeout(ExtractionLimitExceeded):
+    """提取任务超时"""
+
+    error_code = 'EXTRACTION_TIMEOUT'
+
+
+class ExtractionMemoryExceeded(ExtractionLimitExceeded):
+    """提取进程内存超出上限"""
+
+    error_code = 'EXTRACTION_MEMORY_LIMIT'
+
+
+class ExtractionCancelled(ExtractionError):
+    """提取任务被取消"""
+
+
+@contextmanager
+def request_deadline(timeout: Optional[float] = None) -> Iterator[None]:
+    """
+    为当前请求设置提取截止时间（外层已设置时沿用外层的截止时间）
+
+    期间提交到进程池的每个任务（含按页并行、竞速、参数搜索）的超时都不超过剩余预算，
+    等待空闲进程的时间也计入预算；未启用进程池时在页面、候选之间检查（见check_request_deadline）。
+
+    Args:
+        timeout: 总预算（秒），默认取EXTRACTION_REQUEST_TIMEOUT，0表示不限制
+    """
+    timeout = REQUEST_TIMEOUT if timeout is None else timeout
+    if not timeout or _request_deadline.get() is not None:
+        yield
+        return
+    token = _request_deadline.set((time.monotonic() + timeout, timeout))
+    try:
+        yield
+    finally:
+        _request_deadline.reset(token)
+
+
+def remaining_request_time() -> Optional[float]:
+    """当前请求剩余的提取时间（秒，可能为负），未设置截止时间时返回None"""
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline[0] - time.monotonic()
+
+
+def check_request_deadline() -> None:
+    """
+    检查当前请求的提取时间预算
+
+    Raises:
+        ExtractionTimeout: 预算已用完
+    """
+    remaining = remaining_request_time()
+    if remaining is not None and remaining <= 0:
+        raise _request_timeout_error()
+
+
+def _request_timeout_error() -> 'ExtractionTimeout':
+    deadline = _request_deadline.get()
+    budget = deadline[1] if deadline else REQUEST_TIMEOUT
+    return ExtractionTimeout(f"请求的提取时间超出预算（{budget:g}秒）")
+
+
+def _rss_bytes(pid: Optional[int]) -> Optional[int]:
+    """读取进程的常驻内存（RSS，字节），不支持/proc的平台返回None"""
+    return _statm_bytes(pid, 1)
+
+
+def _statm_bytes(pid: Optional[int], field: int) -> Optional[int]:
+    """读取/proc/<pid>/statm的指定字段（0为虚拟内存，1为常驻内存）并换算为字节，不支持/proc的平台返回None"""
+    if pid is None:
+        return None
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            pages = int(f.read().split()[field])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def _limit_address_space(memory_limit: Optional[int]) -> bool:
+    """
+    用RLIMIT_AS限制提取进程的地址空间：上限为预热后的虚拟内存加memory_limit
+
+    超出上限的内存分配直接失败（MemoryError），不会像轮询常驻内存那样在两次检查之间超出数GB。
+
+    Returns:
+        是否已设置（未设置内存上限、平台不支持RLIMIT_AS或无法读取当前虚拟内存时返回False）
+    """
+    if not memory_limit:
+        return False
+    try:
+        import resource
+    except ImportError:
+        return False
+    baseline = _statm_bytes(os.getpid(), 0)
+    if baseline is None or not hasattr(resource, 'RLIMIT_AS'):
+        return False
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        soft = baseline + memory_limit
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+    except (ValueError, OSError) as e:
+        logger.warning(f"设置提取进程地址空间上限失败，只按常驻内存轮询检查: {e}")
+        return False
+    return True
+
+
+def _warm_up() -> None:
+    """预先导入camelot/OpenCV等重量级依赖，使进程处于就绪状态（CSV专用模式下只做CSV解析，不预先导入）"""
+    if os.getenv('APP_PROFILE', 'full').lower() == 'csv':
+        return
+    import camelot  # noqa: F401
+    import cv2  # noqa: F401
+
+
+def _mp_context() -> Any:
+    """
+    提取进程的启动方式：优先forkserver，不支持时使用spawn
+
+    不直接fork请求进程：请求进程中有日志写入、任务执行等线程，fork出的子进程可能继承被持有的锁。
+    forkserver模式下预先在fork服务进程中导入camelot/OpenCV，新进程从其fork，启动时无需重新导入。
+    """
+    methods = multiprocessing.get_all_start_methods()
+    ctx = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    if ctx.get_start_method() == 'forkserver' and os.getenv('APP_PROFILE', 'full').lower() != 'csv':
+        ctx.set_forkserver_preload(['camelot', 'cv2'])
+    return ctx
+
+
+def _worker_main(conn: Any, render_backend: Optional[str] = None, memory_limit: Optional[int] = None) -> None:
+    """提取进程主循环：接收任务、执行、回传结果"""
+    global _IN_WORKER
+    _IN_WORKER = True
+    # 提取进程内直接写日志（进程被回收时不会丢失队列中的日志）
+    flush_logs()
+    # 新进程不继承父进程的渲染后端选择，使用父进程传入的结果
+    use_render_backend(render_backend)
+    try:
+        _warm_up()
+    except Exception as e:
+        logger.warning(f"提取进程预热失败: {e}")
+    # 预热之后再设置地址空间上限，上限只约束任务执行时新分配的内存
+    _limit_address_space(memory_limit)
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+
+        fn, args, kwargs = job
+        try:
+            result = (True, fn(*args, **kwargs))
+        except MemoryError:
+            result = (False, ExtractionMemoryExceeded(
+                f"任务 {fn.__name__} 内存分配失败，超出上限（{(memory_limit or 0) / 1024 / 1024:.0f} MB）"
+            ))
+        except Exception as e:
+            result = (False, e)
+
+        try:
+            conn.send(result)
+        except Exception as e:
+            # 返回值或异常对象无法序列化时，退化为字符串形式的错误
+            error = result[1] if not result[0] else e
+            conn.send((False, ExtractionError(f"{type(error).__name__}: {error}")))
+
+
+class _Worker:
+    """单个提取进程"""
+
+    def __init__(self, ctx: Any, memory_limit: Optional[int] = None):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, get_render_backend(), memory_limit), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def stop(self) -> None:
+        """通知进程正常退出"""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self) -> None:
+        """强制终止进程"""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """
+    常驻的PDF提取进程池
+
+    进程启动后即预先导入camelot/OpenCV，请求处理时只需提交任务。
+    支持单任务超时与内存上限（超出后终止该进程并补充新进程）、取消正在执行的任务，
+    内存上限在提取进程内用RLIMIT_AS强制执行（超出时内存分配失败），并轮询常驻内存作为补充检查；
+    以及每个进程执行一定数量任务后自动回收重建，避免内存持续增长。
+    回收和补充进程在后台线程中完成，不占用请求的处理时间。
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_jobs_per_worker: int = 50,
+        job_timeout: Optional[float] = None,
+        memory_limit: Optional[int] = None
+    ):
+        """
+        Args:
+            size: 进程数
+            max_jobs_per_worker: 每个进程最多执行的任务数，达到后回收重建，0表示不回收
+            job_timeout: 默认的单任务超时（秒），None表示不限制
+            memory_limit: 单个进程执行任务时新增内存的上限（字节），None表示不限制
+        """
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.job_timeout = job_timeout
+        self.memory_limit = memory_limit
+        self._stats = {'jobs': 0, 'timeouts': 0, 'memory_limit_exceeded': 0, 'crashed': 0, 'cancelled': 0}
+        self._stats_lock = threading.Lock()
+        self._ctx = _mp_context()
+        self._idle: 'queue.Queue[_Worker]' = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='extraction')
+        self._closed = False
+
+        if memory_limit and _rss_bytes(os.getpid()) is None:
+            logger.warning("当前平台不支持RLIMIT_AS和/proc，EXTRACTION_MEMORY_LIMIT_MB 不生效")
+        for _ in range(size):
+            self._idle.put(_Worker(self._ctx, memory_limit))
+        memory_limit_mb = f"{memory_limit / 1024 / 1024:.0f} MB" if memory_limit else '不限'
+        logger.info(f"提取进程池已启动: {size} 个进程，每进程最多 {max_jobs_per_worker} 个任务，"
+                    f"任务超时 {job_timeout or '不限'} 秒，内存上限 {memory_limit_mb}")
+
+    @classmethod
+    def from_env(cls) -> Optional['ExtractionPool']:
+        """
+        根据环境变量创建进程池，EXTRACTION_POOL_SIZE为0（默认）时返回None（在请求进程内直接提取）
+
+        进程池需显式启用：每个服务进程（如gunicorn的每个worker）各自启动EXTRACTION_POOL_SIZE个提取进程，
+        内存占用最多为 服务进程数 × 提取进程数 × EXTRACTION_MEMORY_LIMIT_MB。
+        """
+        size = int(os.getenv('EXTRACTION_POOL_SIZE', '0'))
+        max_jobs = int(os.getenv('EXTRACTION_MAX_JOBS_PER_WORKER', '50'))
+        job_timeout = float(os.getenv('EXTRACTION_JOB_TIMEOUT', '120')) or None
+        memory_limit_mb = int(os.getenv('EXTRACTION_MEMORY_LIMIT_MB', '2048'))
+        memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb > 0 else None
+        if size <= 0:
+            if 'EXTRACTION_JOB_TIMEOUT' in os.environ or 'EXTRACTION_MEMORY_LIMIT_MB' in os.environ:
+                # 在请求进程内提取时无法终止正在执行的任务
+                logger.warning("未启用提取进程池：EXTRACTION_JOB_TIMEOUT、EXTRACTION_MEMORY_LIMIT_MB 不生效，"
+                               "EXTRACTION_REQUEST_TIMEOUT 只在页面、参数候选之间检查")
+            else:
+                logger.info("未启用提取进程池（EXTRACTION_POOL_SIZE=0），在请求进程内提取")
+            return None
+        return cls(size, max_jobs, job_timeout, memory_limit)
+
+    def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        在空闲进程中执行任务并等待结果
+
+        在请求截止时间内（见request_deadline）调用时，等待空闲进程和任务执行的时间都不超过剩余预算。
+
+        Args:
+            fn: 任务函数（须为模块级函数，参数和返回值须可序列化）
+            timeout: 任务超时（秒），默认使用进程池配置
+            cancel_event: 取消信号，被设置时终止执行该任务的进程
+
+        Returns:
+            任务函数的返回值
+
+        Raises:
+            ExtractionTimeout: 任务超时或请求的提取时间预算已用完
+            ExtractionMemoryExceeded: 进程内存超出上限
+            ExtractionCancelled: 任务被取消
+            ExtractionError: 进程异常退出
+        """
+        if self._closed:
+            raise ExtractionError("提取进程池已关闭")
+
+        timeout = (timeout if timeout is not None else self.job_timeout) or None
+        remaining = remaining_request_time()
+        try:
+            if remaining is not None and remaining <= 0:
+                raise queue.Empty
+            worker = self._idle.get(timeout=remaining)
+        except queue.Empty:
+            self._count('timeouts')
+            raise _request_timeout_error() from None
+        if cancel_event is not None and cancel_event.is_set():
+            self._idle.put(worker)
+            self._count('cancelled')
+            raise ExtractionCancelled(f"任务 {fn.__name__} 已取消")
+
+        timeout_error = f"任务 {fn.__name__} 超时（{timeout}秒）"
+        remaining = remaining_request_time()
+        if remaining is not None and (timeout is None or remaining < timeout):
+            timeout = max(0.0, remaining)
+            timeout_error = str(_request_timeout_error())
+        started = time.monotonic()
+        self._count('jobs')
+
+        try:
+            worker.conn.send((fn, args, kwargs))
+            while not worker.conn.poll(POLL_INTERVAL):
+                if cancel_event is not None and cancel_event.is_set():
+                    self._replace(worker, '任务已取消')
+                    worker = None
+                    self._count('cancelled')
+                    raise ExtractionCancelled(f"任务 {fn.__name__} 已取消")
+                if timeout is not None and time.monotonic() - started > timeout:
+                    self._replace(worker, timeout_error)
+                    worker = None
+                    self._count('timeouts')
+                    raise ExtractionTimeout(timeout_error)
+                if self.memory_limit:
+                    # 补充检查：RLIMIT_AS未能设置时，按常驻内存轮询
+                    rss = _rss_bytes(worker.pid)
+                    if rss is not None and rss > self.memory_limit:
+                        rss_mb = rss / 1024 / 1024
+                        self._replace(worker, f'内存超出上限（{rss_mb:.0f} MB）')
+                        worker = None
+                        self._count('memory_limit_exceeded')
+                        raise ExtractionMemoryExceeded(
+                            f"任务 {fn.__name__} 内存超出上限（{rss_mb:.0f} MB > "
+                            f"{self.memory_limit / 1024 / 1024:.0f} MB）"
+                        )
+                if not worker.process.is_alive():
+                    break
+            ok, value = worker.conn.recv()
+            if not ok and isinstance(value, ExtractionMemoryExceeded):
+                # 内存分配失败后进程的堆可能已碎片化，不再复用
+                self._replace(worker, '内存分配失败（RLIMIT_AS）')
+                worker = None
+                self._count('memory_limit_exceeded')
+        except (EOFError, OSError, BrokenPipeError) as e:
+            exitcode = worker.process.exitcode if worker else None
+            if worker is not None:
+                self._replace(worker, f'进程异常退出（exitcode={exitcode}）')
+                worker = None
+            self._count('crashed')
+            raise ExtractionError(f"提取进程异常退出（exitcode={exitcode}）: {e}") from e
+        finally:
+            if worker is not None:
+                self._release(worker)
+
+        if not ok:
+            raise value
+        return value
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> 'ExtractionJob':
+        """
+        异步提交任务（在调用方的上下文中执行，沿用其请求截止时间）
+
+        Returns:
+            ExtractionJob，可等待结果或取消
+        """
+        cancel_event = threading.Event()
+        context = contextvars.copy_context()
+        future = self._executor.submit(context.run, self.run, fn, *args, cancel_event=cancel_event, **kwargs)
+        return ExtractionJob(future, cancel_event)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取进程池配置与任务计数（含超时、内存超限等被终止的任务数）"""
+        with self._stats_lock:
+            counters = dict(self._stats)
+        return {
+            'size': self.size,
+            'job_timeout': self.job_timeout,
+            'request_timeout': REQUEST_TIMEOUT or None,
+            'memory_limit_mb': self.memory_limit // (1024 * 1024) if self.memory_limit else None,
+            **counters
+        }
+
+    def shutdown(self) -> None:
+        """关闭进程池，终止所有进程"""
+        self._closed = True
+        self._executor.shutdown(wait=False)
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()
+        logger.info("提取进程池已关闭")
+
+    def _count(self, name: str) -> None:
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _release(self, worker: _Worker) -> None:
+        """任务完成后归还进程，达到任务上限时在后台回收重建"""
+        worker.jobs_done += 1
+        if self._closed:
+            worker.stop()
+            return
+        if self.max_jobs_per_worker and worker.jobs_done >= self.max_jobs_per_worker:
+            logger.info(f"提取进程 {worker.pid} 已执行 {worker.jobs_done} 个任务，回收重建")
+            self._respawn(retired=worker)
+            return
+        self._idle.put(worker)
+
+    def _replace(self, worker: _Worker, reason: str) -> None:
+        """终止进程并在后台补充一个新进程"""
+        logger.warning(f"终止提取进程 {worker.pid}: {reason}")
+        worker.kill()
+        if not self._closed:
+            self._respawn()
+
+    def _respawn(self, retired: Optional[_Worker] = None) -> None:
+        """在后台线程中停止被回收的进程、启动新进程并放回空闲队列"""
+        def run() -> None:
+            if retired is not None:
+                retired.stop()
+            if self._closed:
+                return
+            try:
+                worker = _Worker(self._ctx, self.memory_limit)
+            except Exception as e:
+                if not self._closed:
+                    logger.error(f"启动提取进程失败: {e}", exc_info=True)
+                return
+            if self._closed:
+                worker.stop()
+                return
+            self._idle.put(worker)
+
+        threading.Thread(target=run, name='extraction-respawn', daemon=True).start()
+
+
+class ExtractionJob:
+    """已提交到进程池的任务"""
+
+    def __init__(self, future: 'Future[Any]', cancel_event: threading.Event):
+        self.future = future
+        self._cancel_event = cancel_event
+
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """等待并返回任务结果"""
+        return self.future.result(timeout)
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def cancel(self) -> None:
+        """取消任务：尚未开始则不再执行，正在执行则终止其进程"""
+        self._cancel_event.set()
+        self.future.cancel()
+
+
+def get_extraction_pool() -> Optional[ExtractionPool]:
+    """
+    获取全局提取进程池（首次调用时按环境变量创建）
+
+    Returns:
+        进程池；未启用进程池或当前已在提取进程内时返回None
+    """
+    global _pool, _pool_initialized
+    if _IN_WORKER:
+        return None
+    with _pool_lock:
+        if not _pool_initialized:
+            _pool = ExtractionPool.from_env()
+            if _pool is not None:
+                atexit.register(_pool.shutdown)
+            _pool_initialized = True
+        return _pool
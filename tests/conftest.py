@@ -0,0 +1,59 @@
+"""测试公共夹具"""
+import csv
+import random
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+WEEKDAYS = ['星期一', '星期二', '星期三', '星期四', '星期五']
+COURSES = ['语文', '数学', '英语', '物理', '化学', '体育', '选修课', '班会', '阳光体']
+TEACHERS = ['张三', '李四', '王五', '赵六']
+
+
+def timetable_rows(class_count: int, seed: int = 0) -> list:
+    """生成与PDF提取结果格式相同的课表表格行：两行表头（星期、节次）+ 每个班级一行"""
+    rng = random.Random(seed)
+    header = ['']
+    periods = ['']
+    for weekday in WEEKDAYS:
+        header += [weekday] + [''] * 8
+        periods += [str(period) for period in range(1, 10)]
+
+    rows = [header, periods]
+    for index in range(class_count):
+        row = [f"初{index // 20 + 1}.{index % 20 + 1}班"]
+        for _ in range(len(WEEKDAYS) * 9):
+            if rng.random() < 0.1:
+                row.append('')
+                continue
+            teacher = rng.choice(TEACHERS)
+            if rng.random() < 0.1:
+                teacher += '（班）'
+            row.append(f"{rng.choice(COURSES)}\n{teacher}")
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture
+def timetable_csv(tmp_path: Path) -> Callable[..., Path]:
+    """返回生成课表CSV文件的函数：timetable_csv(班级数, seed=0) -> 文件路径"""
+    def write(class_count: int, seed: int = 0) -> Path:
+        path = tmp_path / f"timetable_{class_count}_{seed}.csv"
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f, quoting=csv.QUOTE_ALL).writerows(timetable_rows(class_count, seed))
+        return path
+    return write
+
+
+@pytest.fixture
+def timetable_dataframes() -> Callable[..., list]:
+    """返回生成表格DataFrame的函数：timetable_dataframes(班级数, 拆分位置...) -> 按班级行拆分、每个都带表头的表格列表"""
+    pd = pytest.importorskip('pandas')
+
+    def build(class_count: int, *splits: int, seed: int = 0) -> list:
+        rows = timetable_rows(class_count, seed)
+        header, body = rows[:2], rows[2:]
+        bounds = [0, *splits, len(body)]
+        return [pd.DataFrame(header + body[start:end]) for start, end in zip(bounds, bounds[1:])]
+    return build
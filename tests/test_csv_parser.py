@@ -0,0 +1,112 @@
+"""CSV解析测试"""
+import io
+
+import pytest
+
+from app import csv_parser
+from app.api import create_app
+from app.handlers import stream_csv_response
+from app.csv_parser import CSVParser
+from app.worker_pool import ExtractionTimeout, request_deadline
+
+
+@pytest.fixture
+def parallel_csv(monkeypatch):
+    """把并行解析阈值调低，使小文件也分块并行解析"""
+    monkeypatch.setattr(CSVParser, 'PARALLEL_MIN_ROWS', 40)
+    monkeypatch.setattr(CSVParser, 'PARALLEL_CHUNK_ROWS', 16)
+    monkeypatch.setattr(csv_parser, '_parse_pool', None)
+    monkeypatch.setattr(csv_parser, '_parse_pool_initialized', False)
+    yield
+    if csv_parser._parse_pool is not None:
+        csv_parser._parse_pool.shutdown(cancel_futures=True)
+
+
+def test_parallel_parse_matches_sequential(timetable_csv, parallel_csv, monkeypatch):
+    """分块并行解析的结果与在请求进程内逐行解析一致"""
+    path = str(timetable_csv(100))
+    parallel = CSVParser.parse_to_json(path)
+    assert csv_parser._parse_pool is not None
+
+    monkeypatch.setattr(CSVParser, 'PARALLEL_MIN_ROWS', 0)
+    sequential = CSVParser.parse_to_json(path)
+
+    assert len(parallel) == 100
+    assert parallel.to_dict() == sequential.to_dict()
+
+
+def test_csv_profile_parses_in_process(timetable_csv, parallel_csv, monkeypatch):
+    """CSV专用模式下不创建解析进程池"""
+    monkeypatch.setenv('APP_PROFILE', 'csv')
+
+    timetable = CSVParser.parse_to_json(str(timetable_csv(100)))
+
+    assert len(timetable) == 100
+    assert csv_parser._parse_pool is None
+
+
+def test_parallel_parse_respects_request_deadline(timetable_csv, parallel_csv):
+    """分块并行解析超出请求的时间预算时抛出ExtractionTimeout，而不是返回解析失败"""
+    path = str(timetable_csv(100))
+
+    with request_deadline(1e-6), pytest.raises(ExtractionTimeout):
+        CSVParser.parse_to_json(path)
+
+
+def test_parse_dataframes_below_threshold_stays_in_process(timetable_dataframes, parallel_csv, monkeypatch):
+    """表格总行数低于并行阈值时在当前进程内解析，不创建进程池"""
+    monkeypatch.setattr(CSVParser, 'PARALLEL_MIN_ROWS', 1000)
+    dfs = timetable_dataframes(30, 15)
+
+    merged = CSVParser.parse_dataframes(dfs)
+
+    assert len(merged) == 30
+    assert csv_parser._parse_pool is None
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    """上传临时文件的单独目录，便于检查是否已清理"""
+    directory = tmp_path / 'uploads'
+    directory.mkdir()
+    return directory
+
+
+def _client(upload_dir):
+    """上传文件保存到upload_dir的测试客户端"""
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = str(upload_dir)
+    return app.test_client()
+
+
+def _post_stream(client, path):
+    """以流式返回方式上传CSV，不缓冲响应体"""
+    with open(path, 'rb') as f:
+        return client.post('/api/csv/to-json', data={
+            'file': (io.BytesIO(f.read()), 'timetable.csv'),
+            'stream': 'true'
+        }, content_type='multipart/form-data', buffered=False)
+
+
+def test_stream_removes_temp_file_after_body(timetable_csv, upload_dir):
+    """流式返回全部班级后删除临时文件"""
+    client = _client(upload_dir)
+
+    response = _post_stream(client, timetable_csv(30))
+    lines = response.get_data(as_text=True).splitlines()
+    response.close()
+
+    assert len(lines) == 30
+    assert list(upload_dir.iterdir()) == []
+
+
+def test_stream_removes_temp_file_when_body_not_iterated(timetable_csv, upload_dir):
+    """响应体从未被迭代（客户端提前断开）时，关闭响应同样删除临时文件"""
+    csv_path = upload_dir / 'timetable.csv'
+    csv_path.write_bytes(timetable_csv(30).read_bytes())
+
+    with create_app().test_request_context():
+        response = stream_csv_response(str(csv_path))
+        response.close()
+
+    assert not csv_path.exists()
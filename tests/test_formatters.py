@@ -0,0 +1,30 @@
+"""课表格式化测试"""
+import pandas as pd
+
+from app.formatters import csv_to_json_internal, dataframes_to_json_internal
+
+
+def test_dataframes_match_csv_path(timetable_csv, timetable_dataframes):
+    """PDF表格直接转JSON的结果与先写CSV再解析的结果一致"""
+    expected = csv_to_json_internal(str(timetable_csv(40)))
+
+    result = dataframes_to_json_internal(timetable_dataframes(40, 15, 30))
+
+    assert result[2] is None
+    assert result[:2] == expected[:2]
+    assert result[1] == {'total_classes': 40, 'total_periods': expected[1]['total_periods']}
+
+
+def test_weekday_split_tables_match_csv_path(timetable_csv, timetable_dataframes):
+    """一周被拆成周一至周三、周四至周五两个表格时，按班级名拼接后与整表CSV一致"""
+    expected = csv_to_json_internal(str(timetable_csv(25)))
+    df, = timetable_dataframes(25)
+    split = 1 + 3 * 9
+    dfs = [
+        pd.DataFrame(df.iloc[:, :split].values),
+        pd.DataFrame(df.iloc[:, [0, *range(split, df.shape[1])]].values)
+    ]
+
+    result = dataframes_to_json_internal(dfs)
+
+    assert result[:2] == expected[:2]
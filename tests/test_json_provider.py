@@ -0,0 +1,52 @@
+"""JSON响应编码测试"""
+import json
+
+import pytest
+from flask import Flask
+
+from app.csv_parser import CSVParser
+from app.formatters import format_timetable
+from app.json_provider import JSON_ENCODERS, StdlibJSONProvider, create_json_provider
+
+
+@pytest.fixture
+def payload(timetable_csv):
+    """与 /api/csv/to-json 相同结构的响应数据"""
+    timetable = CSVParser.parse_to_json(str(timetable_csv(60)))
+    return {
+        'success': True,
+        'message': '转换成功',
+        'data': format_timetable(timetable),
+        'statistics': CSVParser.get_statistics(timetable)
+    }
+
+
+@pytest.mark.parametrize('encoder', JSON_ENCODERS)
+def test_provider_output_matches_stdlib(encoder, payload, monkeypatch):
+    """每个可用的编码器生成的响应体解码后与标准库完全一致"""
+    monkeypatch.delenv('JSON_ENSURE_ASCII', raising=False)
+    app = Flask(__name__)
+    provider = create_json_provider(app, encoder)
+    if provider.encoder_name != encoder:
+        pytest.skip(f"{encoder} 未安装")
+    stdlib = StdlibJSONProvider(app, ensure_ascii=False)
+
+    body = provider.response(payload).get_data()
+    expected = stdlib.response(payload).get_data()
+
+    assert json.loads(body) == json.loads(expected) == payload
+    assert not body.isascii()
+    assert provider.loads(provider.dumps(payload)) == payload
+
+
+def test_ensure_ascii_uses_stdlib(payload, monkeypatch):
+    """JSON_ENSURE_ASCII=true 时固定使用标准库并转义非ASCII字符"""
+    monkeypatch.setenv('JSON_ENSURE_ASCII', 'true')
+    app = Flask(__name__)
+    provider = create_json_provider(app, 'orjson')
+
+    body = provider.response(payload).get_data()
+
+    assert provider.encoder_name == 'stdlib'
+    assert body.isascii()
+    assert json.loads(body) == payload
@@ -0,0 +1,61 @@
+"""版面模板测试"""
+from pathlib import Path
+
+import pytest
+
+from app.layout_templates import LayoutTemplateCache
+from app.pdf_layout import read_page_layout
+from app.pdf_parser import PDFParser, SharedLayoutHandler, _read_tables_detailed
+
+SAMPLE_PDF = Path(__file__).resolve().parents[1] / 'src' / 'app' / 'samples' / 'render_benchmark.pdf'
+
+
+@pytest.fixture(scope='module')
+def detected():
+    """样例页完整检测的结果 [(dataframe, parsing_report, geometry), ...]"""
+    with SharedLayoutHandler(str(SAMPLE_PDF), pages='1') as handler:
+        return PDFParser._read_sequential_detailed(str(SAMPLE_PDF), '1', handler)
+
+
+def test_template_round_trip(detected, tmp_path):
+    """模板保存后读回，按其区域提示提取的结果通过校验且与完整检测一致"""
+    cache = LayoutTemplateCache(str(tmp_path))
+    fingerprint = LayoutTemplateCache.fingerprint(read_page_layout(str(SAMPLE_PDF), 1))
+    cache.set(fingerprint, LayoutTemplateCache.build_template(detected))
+
+    template = cache.get(fingerprint)
+    hints = LayoutTemplateCache.hints(template)
+    tables = _read_tables_detailed(str(SAMPLE_PDF), template['flavor'], '1', **hints)
+
+    assert len(hints['table_areas']) == len(detected)
+    assert LayoutTemplateCache.validate(template, tables)
+    assert tables[0][0].equals(detected[0][0])
+
+
+def test_template_without_hints_only_reuses_flavor(detected):
+    """use_hints为False的模板只复用提取方法，不给出区域提示"""
+    template = LayoutTemplateCache.build_template(detected, use_hints=False)
+
+    assert LayoutTemplateCache.hints(template) == {}
+    assert template['flavor'] == detected[0][2]['flavor']
+
+
+def test_validate_rejects_degraded_results(detected):
+    """表格数、列数不符或accuracy明显低于模板记录值时校验不通过"""
+    template = LayoutTemplateCache.build_template(detected)
+    df, report, geometry = detected[0]
+    low_accuracy = report['accuracy'] - LayoutTemplateCache.ACCURACY_TOLERANCE - 1
+
+    assert LayoutTemplateCache.validate(template, detected)
+    assert not LayoutTemplateCache.validate(template, [])
+    assert not LayoutTemplateCache.validate(template, detected + detected)
+    assert not LayoutTemplateCache.validate(template, [(df.iloc[:, :-1], report, geometry)])
+    assert not LayoutTemplateCache.validate(template, [(df, {**report, 'accuracy': low_accuracy}, geometry)])
+
+
+def test_fingerprint_is_stable_across_reads():
+    """同一页面多次读取得到相同的版面指纹"""
+    first = LayoutTemplateCache.fingerprint(read_page_layout(str(SAMPLE_PDF), 1))
+    second = LayoutTemplateCache.fingerprint(read_page_layout(str(SAMPLE_PDF), 1))
+
+    assert first == second
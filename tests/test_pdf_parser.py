@@ -0,0 +1,89 @@
+"""PDF提取测试"""
+from pathlib import Path
+
+import pypdfium2 as pdfium
+
+from app import pdf_parser
+from app.pdf_parser import PDFParser
+from app.worker_pool import ExtractionPool
+
+SAMPLE_PDF = Path(__file__).resolve().parents[1] / 'src' / 'app' / 'samples' / 'render_benchmark.pdf'
+
+
+def _write_offset_pdf(output_path: Path, dx: float = 100.0, dy: float = 60.0) -> None:
+    """把样例PDF的页面内容和MediaBox整体平移，生成MediaBox原点不在(0, 0)的PDF"""
+    pdf = pdfium.PdfDocument(str(SAMPLE_PDF))
+    try:
+        page = pdf[0]
+        left, bottom, right, top = page.get_mediabox()
+        for obj in list(page.get_objects(max_depth=1)):
+            obj.transform(pdfium.PdfMatrix().translate(dx, dy))
+        page.gen_content()
+        page.set_mediabox(left + dx, bottom + dy, right + dx, top + dy)
+        page.set_cropbox(left + dx, bottom + dy, right + dx, top + dy)
+        pdf.save(str(output_path))
+    finally:
+        pdf.close()
+
+
+def test_cropped_read_matches_full_page_with_offset_mediabox(tmp_path):
+    """MediaBox原点不在(0, 0)时，裁剪到课表区域后的提取结果与整页提取一致"""
+    pdf_path = tmp_path / 'offset.pdf'
+    _write_offset_pdf(pdf_path)
+
+    full = PDFParser._read_sequential(str(pdf_path), pages='1')
+    cropped = PDFParser._read_cropped(str(pdf_path), 1)
+
+    assert len(full) == 1
+    assert len(cropped) == len(full)
+    assert cropped[0][0].equals(full[0][0])
+    assert cropped[0][1]['page'] == 1
+
+
+def test_shared_handler_falls_back_without_camelot_internals(monkeypatch):
+    """camelot版本未经验证时SharedLayoutHandler退化为默认行为，提取结果不变"""
+    expected = PDFParser._read_sequential(str(SAMPLE_PDF), pages='1')
+    monkeypatch.setattr(pdf_parser, 'CAMELOT_INTERNALS_SUPPORTED', False)
+
+    with pdf_parser.SharedLayoutHandler(str(SAMPLE_PDF), pages='1') as handler:
+        tables = pdf_parser._read_tables_detailed(str(SAMPLE_PDF), 'lattice', '1', handler=handler)
+        assert not handler._layouts
+
+    assert len(tables) == len(expected)
+    assert tables[0][0].equals(expected[0][0])
+
+
+def _write_two_page_pdf(output_path: Path) -> None:
+    """把样例PDF的第1页复制为两页"""
+    source = pdfium.PdfDocument(str(SAMPLE_PDF))
+    target = pdfium.PdfDocument.new()
+    try:
+        target.import_pages(source, [0, 0])
+        target.save(str(output_path))
+    finally:
+        target.close()
+        source.close()
+
+
+def test_multi_page_race_mode_races_each_page(tmp_path, monkeypatch):
+    """多页提取同样遵循race模式：每页分别提交lattice和stream任务并选出胜者"""
+    pdf_path = tmp_path / 'two_pages.pdf'
+    _write_two_page_pdf(pdf_path)
+    expected = PDFParser._read_sequential(str(SAMPLE_PDF), pages='1')
+
+    pool = ExtractionPool(2)
+    monkeypatch.setattr(pdf_parser, 'get_extraction_pool', lambda: pool)
+    submitted = []
+    submit = pool.submit
+    monkeypatch.setattr(pool, 'submit', lambda fn, *args: submitted.append((fn, args)) or submit(fn, *args))
+    try:
+        results = PDFParser.extract_pages(str(pdf_path), '1-2', mode='race', engine='camelot')
+    finally:
+        pool.shutdown()
+
+    assert sorted((args[1], args[2]) for _, args in submitted) == [
+        ('lattice', '1'), ('lattice', '2'), ('stream', '1'), ('stream', '2')
+    ]
+    assert [page for page, _, _ in results] == [1, 2]
+    for _, df, _ in results:
+        assert df.equals(expected[0][0])
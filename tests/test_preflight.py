@@ -0,0 +1,135 @@
+"""PDF预检测试"""
+import io
+from pathlib import Path
+
+import pypdfium2 as pdfium
+import pytest
+
+from app import preflight
+from app.api import create_app
+from app.preflight import PDFPreflight
+
+SAMPLE_PDF = Path(__file__).resolve().parents[1] / 'src' / 'app' / 'samples' / 'render_benchmark.pdf'
+
+
+@pytest.fixture
+def client():
+    """测试客户端"""
+    app = create_app()
+    app.config['TESTING'] = True
+    return app.test_client()
+
+
+def _pdf_bytes(page_count: int, blank: bool = False) -> bytes:
+    """生成由样例页（或空白页）组成的PDF"""
+    source = pdfium.PdfDocument(str(SAMPLE_PDF))
+    target = pdfium.PdfDocument.new()
+    try:
+        if blank:
+            for _ in range(page_count):
+                target.new_page(595, 842)
+        else:
+            target.import_pages(source, [0] * page_count)
+        buffer = io.BytesIO()
+        target.save(buffer)
+        return buffer.getvalue()
+    finally:
+        target.close()
+        source.close()
+
+
+def test_inspect_passes_and_keeps_weekday_pages():
+    """通过预检时只保留含星期表头的页码"""
+    report = PDFPreflight.inspect(_pdf_bytes(2), 'all')
+
+    assert report['ok'] is True and report['error_code'] is None
+    assert report['page_count'] == 2
+    assert report['pages'] == report['weekday_pages'] == [1, 2]
+    assert report['weekdays'][0] == '星期一'
+    assert PDFPreflight.pages_spec(report) == '1,2'
+
+
+@pytest.mark.parametrize('content, pages, error_code', [
+    (b'PK\x03\x04 not a pdf', 'all', 'NOT_PDF'),
+    (b'%PDF-1.7\n%%EOF garbage', 'all', 'PDF_UNREADABLE'),
+    (None, '5-end', 'PAGES_OUT_OF_RANGE'),
+])
+def test_inspect_error_codes(content, pages, error_code):
+    """文件头、打开失败和页码超出范围分别给出对应的错误码"""
+    report = PDFPreflight.inspect(content or _pdf_bytes(2), pages)
+
+    assert report['ok'] is False
+    assert report['error_code'] == error_code
+    assert report['pages'] == []
+
+
+def test_inspect_too_many_pages(monkeypatch):
+    """设置了页数上限时超出上限的PDF返回TOO_MANY_PAGES；默认不限制页数"""
+    content = _pdf_bytes(3)
+    assert PDFPreflight.MAX_PAGES == 0
+    assert PDFPreflight.inspect(content)['ok'] is True
+
+    monkeypatch.setattr(PDFPreflight, 'MAX_PAGES', 2)
+
+    assert PDFPreflight.inspect(content)['error_code'] == 'TOO_MANY_PAGES'
+
+
+def test_inspect_no_text_layer():
+    """页面没有文本层（扫描件、空白页）时返回NO_TEXT_LAYER"""
+    report = PDFPreflight.inspect(_pdf_bytes(1, blank=True))
+
+    assert report['error_code'] == 'NO_TEXT_LAYER'
+    assert report['text_pages'] == []
+
+
+def test_inspect_no_weekday_header(monkeypatch):
+    """有文本层但不含星期表头时返回NO_WEEKDAY_HEADER"""
+    monkeypatch.setattr(preflight, '_page_text', lambda document, page: '学期成绩单 ' * 10)
+
+    report = PDFPreflight.inspect(_pdf_bytes(1))
+
+    assert report['error_code'] == 'NO_WEEKDAY_HEADER'
+    assert report['text_pages'] == [1]
+
+
+def test_parse_route_rejects_with_error_code(client, monkeypatch):
+    """解析接口在预检未通过时返回400和预检错误码，不进入表格提取"""
+    monkeypatch.setattr(PDFPreflight, 'ENABLED', True)
+
+    response = client.post('/api/timetable/parse', data={
+        'file': (io.BytesIO(_pdf_bytes(1, blank=True)), 'timetable.pdf')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body['success'] is False
+    assert body['error_code'] == 'NO_TEXT_LAYER'
+    assert body['preflight']['page_count'] == 1
+
+
+def _post(client, content: bytes, pages: str = '1'):
+    """上传文件到预检接口"""
+    return client.post('/api/timetable/preflight', data={
+        'file': (io.BytesIO(content), 'timetable.pdf'),
+        'pages': pages
+    }, content_type='multipart/form-data')
+
+
+def test_preflight_route_passes_sample(client):
+    """样例课表通过预检"""
+    response = _post(client, SAMPLE_PDF.read_bytes())
+
+    assert response.status_code == 200
+    assert response.get_json()['preflight']['ok'] is True
+
+
+def test_preflight_route_error_returns_json_envelope(client, monkeypatch):
+    """预检过程中的异常返回统一的JSON错误格式，而不是未格式化的500页面"""
+    def fail(source, pages):
+        raise RuntimeError('pdfium页面读取失败')
+    monkeypatch.setattr(PDFPreflight, 'inspect', staticmethod(fail))
+
+    response = _post(client, SAMPLE_PDF.read_bytes())
+
+    assert response.status_code == 500
+    assert response.get_json() == {'success': False, 'message': '处理失败: pdfium页面读取失败'}
@@ -0,0 +1,56 @@
+"""页面渲染图像缓存测试"""
+import numpy as np
+
+from app.raster_cache import CachedImageConversion, PageRasterCache
+
+
+class _Backend:
+    pass
+
+
+class _Conversion:
+    """记录渲染次数的ImageConversionBackend替身"""
+
+    def __init__(self):
+        self.backend = _Backend()
+        self.calls = 0
+
+    def to_array(self, pdf_path, page=1):
+        self.calls += 1
+        return np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def test_same_page_is_rendered_once():
+    """同一文件、页码、后端和分辨率只渲染一次，缓存的图像为只读"""
+    cache = PageRasterCache(max_bytes=1024 * 1024)
+    conversion = _Conversion()
+
+    first = CachedImageConversion(conversion, cache, 'hash').to_array('a.pdf', 1)
+    second = CachedImageConversion(conversion, cache, 'hash').to_array('a.pdf', 1)
+
+    assert conversion.calls == 1
+    assert second is first
+    assert not second.flags.writeable
+    assert cache.stats()['hits'] == 1
+
+
+def test_resolution_is_part_of_the_key():
+    """不同渲染分辨率不复用缓存的图像"""
+    cache = PageRasterCache(max_bytes=1024 * 1024)
+    conversion = _Conversion()
+
+    CachedImageConversion(conversion, cache, 'hash', resolution=300).to_array('a.pdf', 1)
+    CachedImageConversion(conversion, cache, 'hash', resolution=600).to_array('a.pdf', 1)
+
+    assert conversion.calls == 2
+
+
+def test_memory_tier_defaults_small_with_pool(monkeypatch):
+    """启用提取进程池时内存层默认只保留约一页"""
+    monkeypatch.delenv('RASTER_CACHE_MAX_MB', raising=False)
+    monkeypatch.delenv('RASTER_CACHE_DIR', raising=False)
+
+    monkeypatch.setenv('EXTRACTION_POOL_SIZE', '4')
+    assert PageRasterCache.from_env().max_bytes == 64 * 1024 * 1024
+    monkeypatch.setenv('EXTRACTION_POOL_SIZE', '0')
+    assert PageRasterCache.from_env().max_bytes == 128 * 1024 * 1024
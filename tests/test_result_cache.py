@@ -0,0 +1,48 @@
+"""解析结果缓存测试"""
+from app import result_cache
+from app.pdf_parser import PDFParser
+from app.result_cache import ResultCache
+
+CONTENT_HASH = 'a' * 64
+
+
+def test_key_is_stable_for_same_settings():
+    """相同内容、参数和配置得到相同的缓存键"""
+    first = ResultCache.make_key(CONTENT_HASH, pages='1', settings=PDFParser.output_settings())
+    second = ResultCache.make_key(CONTENT_HASH, pages='1', settings=PDFParser.output_settings())
+
+    assert first == second
+    assert first.startswith(CONTENT_HASH)
+
+
+def test_key_changes_with_settings(monkeypatch):
+    """影响提取结果的配置变化后缓存键随之变化"""
+    before = ResultCache.make_key(CONTENT_HASH, pages='1', settings=PDFParser.output_settings())
+
+    monkeypatch.setattr(PDFParser, 'CROP_TABLE_REGION', not PDFParser.CROP_TABLE_REGION)
+    cropped = ResultCache.make_key(CONTENT_HASH, pages='1', settings=PDFParser.output_settings())
+    monkeypatch.setenv('LAYOUT_TEMPLATE_DIR', '/tmp/templates')
+    templated = ResultCache.make_key(CONTENT_HASH, pages='1', settings=PDFParser.output_settings())
+
+    assert len({before, cropped, templated}) == 3
+
+
+def test_key_changes_with_code_version(monkeypatch):
+    """代码版本变化（部署）后不再命中磁盘层中的旧结果"""
+    before = ResultCache.make_key(CONTENT_HASH, pages='1')
+    monkeypatch.setattr(result_cache, 'code_version', lambda: 'deployed')
+
+    assert ResultCache.make_key(CONTENT_HASH, pages='1') != before
+
+
+def test_disk_tier_misses_after_code_version_change(tmp_path, monkeypatch):
+    """磁盘层跨重启保留，但部署新代码后按新键查询不会读到旧结果"""
+    cache = ResultCache(max_entries=0, disk_dir=str(tmp_path))
+    old_key = ResultCache.make_key(CONTENT_HASH, pages='1')
+    cache.set(old_key, {'data': {'classes': []}})
+
+    monkeypatch.setattr(result_cache, 'code_version', lambda: 'deployed')
+    restarted = ResultCache(max_entries=0, disk_dir=str(tmp_path))
+
+    assert restarted.get(old_key) == {'data': {'classes': []}}
+    assert restarted.get(ResultCache.make_key(CONTENT_HASH, pages='1')) is None
@@ -0,0 +1,83 @@
+"""班级行解析缓存测试"""
+import csv
+
+from app.csv_parser import CSVParser
+from app.row_cache import LineageState, RowParseCache, diff_classes
+
+
+def _rewrite(path, change):
+    """读出CSV的全部行，经change修改后写回"""
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    change(rows)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        csv.writer(f, quoting=csv.QUOTE_ALL).writerows(rows)
+
+
+def test_first_upload_parses_every_row(timetable_csv):
+    """谱系中没有上一次上传时全部行都重新解析，全部班级视为变化"""
+    cache = RowParseCache()
+
+    grid, changes = CSVParser.parse_incremental(str(timetable_csv(20)), 'school-1', cache)
+
+    assert changes['previous_version'] is False
+    assert changes['reparsed_rows'] == 20 and changes['reused_rows'] == 0
+    assert changes['changed_classes'] == grid.class_names
+    assert changes['removed_classes'] == []
+
+
+def test_reupload_reparses_only_changed_rows(timetable_csv):
+    """再次上传时只重新解析内容变化的行，并标出变化、新增和移除的班级"""
+    cache = RowParseCache()
+    path = timetable_csv(20)
+    CSVParser.parse_incremental(str(path), 'school-1', cache)
+
+    def change(rows):
+        rows[3][5] = '体育\n王五'
+        rows[4][0] = '初9.9班'
+    _rewrite(path, change)
+    grid, changes = CSVParser.parse_incremental(str(path), 'school-1', cache)
+
+    assert changes['previous_version'] is True
+    assert changes['changed_classes'] == ['初1.2班', '初9.9班']
+    assert changes['removed_classes'] == ['初1.3班']
+    # 只改了班级名的行内容哈希不变，直接复用
+    assert changes['reparsed_rows'] == 1 and changes['reused_rows'] == 19
+    assert grid.to_dict() == CSVParser.parse_to_json(str(path)).to_dict()
+
+
+def test_lineage_is_scoped_by_school(timetable_csv):
+    """不同学校的上传属于不同谱系，互不复用"""
+    cache = RowParseCache()
+    path = str(timetable_csv(10))
+    CSVParser.parse_incremental(path, 'school-1', cache)
+
+    _, changes = CSVParser.parse_incremental(path, 'school-2', cache)
+
+    assert changes['previous_version'] is False
+    assert changes['reparsed_rows'] == 10
+    assert cache.stats()['lineages'] == 2
+
+
+def test_lineages_are_evicted_lru():
+    """谱系数超出上限时淘汰最久未使用的谱系"""
+    cache = RowParseCache(max_lineages=2)
+    state = LineageState({}, {})
+    cache.set('a', state)
+    cache.set('b', state)
+    cache.get('a')
+    cache.set('c', state)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is state and cache.get('c') is state
+
+
+def test_diff_classes():
+    """按班级行哈希比较本次与上一次上传"""
+    previous = LineageState({}, {'初1.1班': b'1', '初1.2班': b'2', '初1.3班': b'3'})
+
+    changed, removed = diff_classes(previous, {'初1.1班': b'1', '初1.2班': b'x', '初1.4班': b'4'})
+
+    assert changed == ['初1.2班', '初1.4班']
+    assert removed == ['初1.3班']
+    assert diff_classes(None, {'初1.1班': b'1'}) == (['初1.1班'], [])
@@ -0,0 +1,94 @@
+"""紧凑课表测试"""
+import pickle
+
+from app.timetable_grid import TimetableGrid
+
+WEEKDAYS = ['星期一', '星期二', '星期三']
+
+
+def _grid(*classes):
+    """按 (班级名, 课时列表) 创建课表"""
+    grid = TimetableGrid(WEEKDAYS, 4, capacity=1)
+    for class_name, periods in classes:
+        grid.set_class(class_name, periods)
+    return grid
+
+
+def test_set_class_overwrites_like_dict():
+    """重复写入同一班级时整行覆盖并保留原位置，与按班级名写入字典一致"""
+    grid = _grid(
+        ('初1.1班', [(0, 1, '语文', '张三', True), (1, 2, '数学', '李四', False)]),
+        ('初1.2班', [(0, 1, '英语', None, False)])
+    )
+    grid.set_class('初1.1班', [(2, 4, '体育', '王五', False)])
+
+    assert grid.class_names == ['初1.1班', '初1.2班']
+    assert '初1.1班' in grid and '初1.3班' not in grid
+    assert grid.to_dict() == {
+        '初1.1班': {
+            '星期一': [],
+            '星期二': [],
+            '星期三': [{'period': 4, 'course': '体育', 'teacher': '王五', 'is_class_teacher': False}]
+        },
+        '初1.2班': {
+            '星期一': [{'period': 1, 'course': '英语', 'teacher': None, 'is_class_teacher': False}],
+            '星期二': [],
+            '星期三': []
+        }
+    }
+    assert grid.total_periods() == 2
+
+
+def test_strings_are_interned_once():
+    """同一课程名、教师名在课表中只保存一份，编号0表示无课/无教师"""
+    grid = _grid(
+        ('初1.1班', [(0, 1, '语文', '张三', False), (1, 1, '语文', '张三', False)]),
+        ('初1.2班', [(0, 1, '语文', None, False)])
+    )
+
+    assert grid.courses == [None, '语文']
+    assert grid.teachers == [None, '张三']
+    assert grid.teacher_ids[1, 0, 0] == 0
+
+
+def test_update_keeps_existing_positions():
+    """update与dict.update一致：已有班级整行覆盖并保留位置，新班级追加在后"""
+    grid = _grid(('初1.1班', [(0, 1, '语文', '张三', False)]), ('初1.2班', [(0, 1, '数学', '李四', False)]))
+    other = _grid(('初1.3班', [(1, 2, '化学', '赵六', False)]), ('初1.1班', [(2, 3, '物理', '王五', True)]))
+
+    grid.update(other)
+
+    expected = {'初1.1班': other.schedule('初1.1班'), '初1.2班': grid.schedule('初1.2班'),
+                '初1.3班': other.schedule('初1.3班')}
+    assert grid.class_names == ['初1.1班', '初1.2班', '初1.3班']
+    assert grid.to_dict() == expected
+
+
+def test_merge_fills_missing_days_and_keeps_first():
+    """merge按星期补全已有班级尚无课程的天；同一天两边都有课程时保留已有的数据"""
+    grid = _grid(('初1.1班', [(0, 1, '语文', '张三', True)]))
+    other = _grid(
+        ('初1.1班', [(0, 2, '英语', '李四', False), (1, 1, '数学', '王五', True)]),
+        ('初1.2班', [(2, 1, '体育', None, False)])
+    )
+
+    grid.merge(other)
+
+    schedule = grid.schedule('初1.1班')
+    assert schedule['星期一'] == [{'period': 1, 'course': '语文', 'teacher': '张三', 'is_class_teacher': True}]
+    assert schedule['星期二'] == [{'period': 1, 'course': '数学', 'teacher': '王五', 'is_class_teacher': True}]
+    assert grid.schedule('初1.2班') == other.schedule('初1.2班')
+    assert grid.class_names == ['初1.1班', '初1.2班']
+
+
+def test_pickle_round_trip():
+    """跨进程传递（pickle）后课表内容不变，且只序列化已使用的行"""
+    grid = _grid(('初1.1班', [(0, 1, '语文', '张三', True)]))
+    grid.set_class('初1.2班', [(1, 1, '数学', '李四', False)])
+
+    restored = pickle.loads(pickle.dumps(grid))
+
+    assert restored.to_dict() == grid.to_dict()
+    assert len(restored._course_grid) == len(grid)
+    restored.set_class('初1.3班', [(2, 2, '体育', None, False)])
+    assert len(restored) == 3
@@ -0,0 +1,28 @@
+"""矢量划线表格提取测试"""
+from pathlib import Path
+
+from app.pdf_layout import read_page_layout
+from app.pdf_parser import PDFParser
+from app.vector_parser import VectorTableParser
+
+SAMPLE_PDF = Path(__file__).resolve().parents[1] / 'src' / 'app' / 'samples' / 'render_benchmark.pdf'
+
+
+def test_accuracy_matches_camelot_scale():
+    """accuracy按文本落在所属单元格内的比例计算，与camelot的accuracy可直接比较"""
+    (_, vector_report), = VectorTableParser.extract_tables(str(SAMPLE_PDF), 1)
+    camelot_report = PDFParser._read_sequential(str(SAMPLE_PDF), pages='1')[0][1]
+
+    assert 0.0 < vector_report['accuracy'] < 100.0
+    assert abs(vector_report['accuracy'] - camelot_report['accuracy']) < 1.0
+
+
+def test_accuracy_drops_when_text_crosses_grid_lines():
+    """文字整体偏移、跨越网格线时accuracy下降，而不是固定为100"""
+    layout = read_page_layout(str(SAMPLE_PDF), 1)
+    shifted = layout._replace(chars=[char._replace(x0=char.x0 + 20, x1=char.x1 + 20) for char in layout.chars])
+
+    _, report = VectorTableParser.parse_layout(layout)
+    _, shifted_report = VectorTableParser.parse_layout(shifted)
+
+    assert shifted_report['accuracy'] < report['accuracy'] - 10
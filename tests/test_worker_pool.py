@@ -0,0 +1,96 @@
+"""提取进程池测试"""
+import time
+
+import numpy as np
+import pytest
+
+from app.worker_pool import (
+    ExtractionMemoryExceeded,
+    ExtractionPool,
+    ExtractionTimeout,
+    request_deadline,
+)
+
+
+def _add(a, b):
+    return a + b
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _allocate(size):
+    return int(np.ones(size, dtype=np.uint8).sum())
+
+
+def _fail(message):
+    raise ValueError(message)
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    """创建单进程的进程池（CSV专用模式下启动，不预先导入camelot/OpenCV），测试结束时关闭"""
+    monkeypatch.setenv('APP_PROFILE', 'csv')
+    pools = []
+
+    def create(**kwargs):
+        pool = ExtractionPool(1, **kwargs)
+        pools.append(pool)
+        return pool
+    yield create
+    for pool in pools:
+        pool.shutdown()
+
+
+def _wait_idle(pool, timeout=30.0):
+    """等待后台补充的进程回到空闲队列"""
+    deadline = time.monotonic() + timeout
+    while pool._idle.qsize() < pool.size and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+
+def test_task_exception_is_reraised(make_pool):
+    """任务函数抛出的异常原样返回给调用方，进程继续复用"""
+    pool = make_pool()
+
+    with pytest.raises(ValueError, match='课表'):
+        pool.run(_fail, '课表')
+    assert pool.run(_add, 1, 2) == 3
+    assert pool.stats()['crashed'] == 0
+
+
+def test_job_timeout_maps_to_extraction_timeout(make_pool):
+    """任务超时时抛出ExtractionTimeout，终止该进程并补充新进程"""
+    pool = make_pool(job_timeout=0.5)
+
+    with pytest.raises(ExtractionTimeout):
+        pool.run(_sleep, 10)
+    _wait_idle(pool)
+
+    assert pool.stats()['timeouts'] == 1
+    assert pool.run(_add, 2, 3) == 5
+
+
+def test_request_deadline_caps_job_timeout(make_pool):
+    """请求的时间预算小于任务超时时，按剩余预算终止任务"""
+    pool = make_pool(job_timeout=60)
+
+    started = time.monotonic()
+    with request_deadline(0.5), pytest.raises(ExtractionTimeout, match='预算'):
+        pool.run(_sleep, 10)
+
+    assert time.monotonic() - started < 5
+
+
+def test_memory_limit_maps_to_memory_exceeded(make_pool):
+    """任务分配的内存超出上限时抛出ExtractionMemoryExceeded，终止该进程并补充新进程"""
+    pool = make_pool(memory_limit=128 * 1024 * 1024)
+
+    with pytest.raises(ExtractionMemoryExceeded):
+        pool.run(_allocate, 1024 * 1024 * 1024)
+    _wait_idle(pool)
+
+    assert pool.stats()['memory_limit_exceeded'] == 1
+    assert pool.run(_allocate, 1024) == 1024